@@ -1,122 +1,748 @@
 # ---------------------------------------------------------
 # FASTAPI PRICE PREDICTION API
 # ---------------------------------------------------------
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
-import pandas as pd
-import pickle
-from .predict import make_prediction   # ← import from predict.py
+import asyncio
+import functools
+import hmac
+from contextlib import asynccontextmanager
+from typing import Annotated, Literal
+from typing_extensions import TypedDict
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, Response
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, create_model, model_validator
+import numpy as np
+import csv
+import io
+import json
+import os
+from .predict import (   # ← import from predict.py
+    make_batch_prediction, predict_matrix, predict_row, predict_encoded, to_model_row,
+    lookup_prediction, remember_prediction, price_interval, interval_response,
+    make_whatif, explain_row, make_batch_explanation, to_api_row, EXPLAIN_METHOD, prediction_cache, retain_cached,
+    active_model, activate, load_model, warm_up, registry as model_registry, candidate, score_shadow
+)
+from .batching import MicroBatcher, Overloaded
+from .executor import DeadlineExceeded, executor_from_env
+from .registry import VersionNotLoaded
+from .comparables import ComparablesIndex
+from .shadow import BREAKDOWNS, ShadowScorer, ab_draw, breakdown
+from . import features
+from . import metrics
+from .metrics import now, observe_stage
 
-app = FastAPI(
-    title="Immo Price Prediction API",
-    description="API for predicting real estate prices"
+# ----------------------------------------
+# MODEL EXECUTOR (see executor.py)
+# ----------------------------------------
+# Every model call runs in this dedicated pool, never in Starlette's
+# threadpool or on the event loop, so the health check is always answered
+model_executor = executor_from_env()
+
+metrics.Collected("immo_executor_pending", "Model calls queued or running in the executor", "gauge", [],
+                  lambda: {(): model_executor.pending})
+
+# Longest time a request may wait for the model, in seconds; a client can
+# ask for less with the X-Request-Timeout header
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "10"))
+
+
+def request_timeout(request: Request) -> float:
+    try:
+        return min(REQUEST_TIMEOUT, float(request.headers["x-request-timeout"]))
+    except (KeyError, ValueError):
+        return REQUEST_TIMEOUT
+
+
+async def run_model(request: Request, what: str, fn, *args):
+    """
+    Runs a model call in the executor within the request's deadline and
+    maps failures to HTTP errors (503 overloaded or version swapped
+    meanwhile, 504 deadline, 500).
+    """
+    try:
+        return await model_executor.run(fn, *args, timeout=request_timeout(request))
+    except Overloaded as e:
+        metrics.model_errors.inc(what, "overloaded")
+        raise HTTPException(status_code=503, detail=f"Server overloaded: {e}",
+                            headers={"Retry-After": "1"})
+    except VersionNotLoaded as e:
+        metrics.model_errors.inc(what, "swapped")
+        raise HTTPException(status_code=503, detail=f"Model swapped during the request: {e}",
+                            headers={"Retry-After": "1"})
+    except DeadlineExceeded as e:
+        metrics.model_errors.inc(what, "deadline")
+        raise HTTPException(status_code=504, detail=f"Model {what} deadline exceeded: {e}")
+    except Exception as e:
+        metrics.model_errors.inc(what, "error")
+        raise HTTPException(status_code=500, detail=f"Model {what} failed: {e}")
+
+
+# ----------------------------------------
+# MICRO-BATCHING (see batching.py)
+# ----------------------------------------
+MICRO_BATCHING = os.getenv("MICRO_BATCHING", "0") == "1"
+
+batcher = MicroBatcher(
+    predict_encoded,
+    max_batch_size=int(os.getenv("MICRO_BATCH_MAX_SIZE", "64")),
+    max_wait_ms=float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "2")),
+    max_queue=int(os.getenv("MICRO_BATCH_MAX_QUEUE", "10000")),
 )
 
+# Single-row predictions look up the cache where they are scored: in the
+# API process with micro-batching or threads, in each executor process
+# otherwise. The API process cannot see those caches, so their stats are
+# reported as unavailable rather than as the API process's empty one
+CACHE_IN_EXECUTOR = model_executor.kind == "process" and not MICRO_BATCHING
+
+if not CACHE_IN_EXECUTOR:
+    metrics.Collected("immo_cache_hits_total", "Prediction cache hits", "counter", [],
+                      lambda: {(): prediction_cache.hits})
+    metrics.Collected("immo_cache_misses_total", "Prediction cache misses", "counter", [],
+                      lambda: {(): prediction_cache.misses})
+
 
 # ----------------------------------------
-# ALLOWED OPTIONS 
+# COMPARABLES INDEX (see comparables.py)
 # ----------------------------------------
-PROPERTY_TYPES = ["Apartment", "House"]
+# Loaded once at start: points and listings are memory-mapped (shared by
+# preloaded Gunicorn workers), the trees rebuilt over the points
+COMPARABLES_INDEX_PATH = os.getenv("COMPARABLES_INDEX_PATH", "")
+
+comparables_index = ComparablesIndex.load(COMPARABLES_INDEX_PATH) if COMPARABLES_INDEX_PATH else None
+
+
+# ----------------------------------------
+# SHADOW SCORING AND A/B SPLIT (see shadow.py)
+# ----------------------------------------
+# Both need a candidate model (CANDIDATE_MODEL_VERSION). SHADOW_FRACTION
+# of the requests served by the active model are also scored by the
+# candidate in the background (in the model executor, on rows already
+# encoded by the candidate's plan); AB_CANDIDATE_WEIGHT of the requests
+# are served by the candidate instead
+SHADOW_FRACTION = float(os.getenv("SHADOW_FRACTION", "0"))
+AB_CANDIDATE_WEIGHT = float(os.getenv("AB_CANDIDATE_WEIGHT", "0"))
+
+shadow = None
+if candidate is not None:
+    shadow = ShadowScorer(
+        functools.partial(score_shadow, version=candidate),
+        fraction=SHADOW_FRACTION,
+        max_queue=int(os.getenv("SHADOW_MAX_QUEUE", "10000")),
+        max_batch_size=int(os.getenv("SHADOW_BATCH_SIZE", "256")),
+        max_wait_ms=float(os.getenv("SHADOW_MAX_WAIT_MS", "100")),
+    )
+    metrics.Collected("immo_shadow_rows_total", "Shadow rows by outcome (scored, dropped, failed)", "counter",
+                      ["result"], lambda: {("scored",): shadow.scored, ("dropped",): shadow.dropped,
+                                           ("failed",): shadow.failed})
+    metrics.Collected("immo_shadow_mean_rel_delta", "Mean |candidate − live| / live price of shadow rows",
+                      "gauge", [], lambda: {(): shadow.overall.summary()["mean_rel_delta"]})
+
+
+def shadow_batch(rows: list, predictions: np.ndarray):
+    # The sampled rows of a batch, encoded for the candidate at once
+    sampled = shadow.sample(len(rows))
+    if len(sampled):
+        picked = [rows[k] for k in sampled]
+        shadow.submit_batch(candidate.plan.encode_rows(picked), predictions[sampled],
+                            [breakdown(row) for row in picked])
+
+
+def serving_version(request: Request):
+    """
+    The model version that scores a request: the candidate for the A/B
+    share (the same side for every request with the same X-AB-Key), else
+    the active one.
+    """
+    if AB_CANDIDATE_WEIGHT > 0 and candidate is not None:
+        if ab_draw(request.headers.get("x-ab-key")) < AB_CANDIDATE_WEIGHT:
+            return candidate
+    return active_model()
+
+
+def shadowed(version) -> bool:
+    # Only rows served by another model than the candidate are compared
+    return shadow is not None and version.name != candidate.name
+
+
+# ----------------------------------------
+# MODEL HOT-SWAP (see registry.py)
+# ----------------------------------------
+# A registry version is loaded and warmed up in the background, then one
+# assignment makes it the active version: requests already running finish
+# on the version they started with, new ones get the new one. Triggered by
+# POST /admin/model, or by the file watch when the registry's CURRENT
+# changes (every Gunicorn worker watches on its own).
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+
+# Admin endpoints answer 404 unless a token is set (sent as X-Admin-Token)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+swap_lock = asyncio.Lock()
+last_swap = {}
+
+
+async def hot_swap(name: str = None) -> dict:
+    """
+    Swaps in a registry version (default: the registry's current one) and
+    returns the seconds spent loading, warming up and starting executor
+    processes. Nothing changes when loading or warming up fails.
+    """
+    async with swap_lock:
+        name = name or model_registry.current()
+        if name == active_model().name:
+            return {"version": name, "status": "unchanged"}
+
+        start = now()
+        try:
+            version = await run_in_threadpool(load_model, name)
+            loaded = now()
+            await run_in_threadpool(warm_up, version)
+            warmed = now()
+            # With micro-batching the old processes stay until the rows
+            # queued for the old version are scored
+            old_pool = await model_executor.replace({"MODEL_VERSION": name}, retire=not MICRO_BATCHING)
+        except Exception as e:
+            metrics.model_swaps.inc("failed")
+            last_swap.update(version=name, status="failed", error=str(e))
+            raise
+        ready = now()
+
+        previous = activate(version)
+        # Cached answers of the previous version are no longer served
+        retain_cached(version, candidate)
+        if MICRO_BATCHING:
+            if old_pool is not None:
+                batcher.route(previous, old_pool)
+            batcher.executor = model_executor.pool
+        if shadow is not None:
+            shadow.executor = model_executor.pool
+            shadow.reset()
+        metrics.model_swaps.inc("swapped")
+        metrics.stage_seconds.observe(loaded - start, "model_load")
+        metrics.stage_seconds.observe(warmed - loaded, "model_warm_up")
+
+        last_swap.clear()
+        last_swap.update(version=name, previous=previous.name, status="swapped",
+                         load_s=loaded - start, warm_up_s=warmed - loaded, executor_s=ready - warmed,
+                         swap_ms=(now() - ready) * 1000)
+        if MICRO_BATCHING and old_pool is not None:
+            await batcher.drain(previous)
+            model_executor.retire(old_pool)
+        return dict(last_swap)
+
 
-PROPERTY_SUBTYPES = sorted([
-    "Apartment", "Residence", "Villa", "Ground floor", "Penthouse",
-    "Duplex", "Mixed building", "Studio", "Chalet", "Bungalow",
-    "Cottage", "Loft", "Triplex", "Mansion", "Masterhouse"
-])
+async def watch_registry():
+    # A version that failed is not retried until CURRENT names another one
+    name = failed = None
+    while True:
+        await asyncio.sleep(MODEL_WATCH_INTERVAL)
+        try:
+            name = model_registry.current()
+            if name != active_model().name and name != failed:
+                await hot_swap(name)
+        except Exception:
+            failed = name
 
-PROVINCES = sorted([
-    "Brussels", "Antwerp", "West-Flanders", "East-Flanders",
-    "Flemish-Brabant", "Limburg", "Liège", "Brabant-Wallon",
-    "Hainaut", "Luxembourg", "Namur"
-])
 
-STATE_OF_BUILDING = sorted([
-    "To demolish", "Under construction", "To restore", "To renovate",
-    "To be renovated", "Normal", "Fully renovated", "Excellent", "New"
-])
+@asynccontextmanager
+async def lifespan(app):
+    await model_executor.warm_up()
+    if MICRO_BATCHING:
+        # Micro-batches are scored in the model executor as well
+        batcher.executor = model_executor.pool
+        await batcher.start()
+    if shadow is not None:
+        shadow.executor = model_executor.pool
+        shadow.start()
+    watcher = None
+    if model_registry is not None and MODEL_WATCH_INTERVAL > 0:
+        watcher = asyncio.create_task(watch_registry())
+    yield
+    if watcher is not None:
+        watcher.cancel()
+    if shadow is not None:
+        shadow.stop()
+    if MICRO_BATCHING:
+        await batcher.stop()
+    model_executor.stop()
+
+
+app = FastAPI(
+    title="Immo Price Prediction API",
+    description="API for predicting real estate prices",
+    lifespan=lifespan
+)
+
+# Request counts and latency per route (see metrics.py)
+app.add_middleware(metrics.MetricsMiddleware)
+
+# GET /profile samples the stacks of this process (off unless PROFILER=1)
+PROFILER = os.getenv("PROFILER", "0") == "1"
+
+
+# ----------------------------------------
+# ALLOWED OPTIONS (see features.py)
+# ----------------------------------------
+PROPERTY_TYPES = features.PROPERTY_TYPES
+PROPERTY_SUBTYPES = sorted(features.PROPERTY_SUBTYPES)
+PROVINCES = sorted(features.PROVINCES)
+STATE_OF_BUILDING = sorted(features.STATE_OF_BUILDING)
+YES_NO = features.YES_NO
 
-YES_NO = ["Yes", "No"]
 
 # ----------------------------------------
 # PYDANTIC MODEL 
 # ----------------------------------------
-class PropertyInput(BaseModel):
-    # Step 1 fields
-    type: str = Field(..., description="Property type", pattern="|".join(PROPERTY_TYPES))
-    subtype: str = Field(..., description="Property subtype", pattern="|".join(PROPERTY_SUBTYPES))
-    province: str = Field(..., description="Province", pattern="|".join(PROVINCES))
-    state_of_building: str = Field(..., description="State of the building", pattern="|".join(STATE_OF_BUILDING))
+# Generated from the shared feature spec: categories are Literals (one
+# set lookup, exact match) and Yes/No flags are booleans ("Yes"/"No",
+# true/false and 1/0 are accepted)
+def field_type(feature):
+    if feature.kind == "category":
+        return Literal[feature.choices]
+    if feature.kind == "flag":
+        return bool
+    return int if feature.kind == "int" else float
+
 
-    # Step 2 fields
-    living_area: float = Field(..., ge=18, le=2670, description="Living area (m²)")
-    number_of_bedrooms: int = Field(..., ge=1, le=50)
-    has_equiped_kitchen: str = Field(..., pattern="|".join(YES_NO))
-    is_furnished: str = Field(..., pattern="|".join(YES_NO))
-    has_open_fire: str = Field(..., pattern="|".join(YES_NO))
+def field_info(feature):
+    return Field(..., ge=feature.minimum, le=feature.maximum, description=feature.description)
 
-    # Step 3 fields
-    has_terrace: str = Field(..., pattern="|".join(YES_NO))
-    terrace_area: float = Field(..., ge=0, le=150)
-    has_garden: str = Field(..., pattern="|".join(YES_NO))
-    number_facades: int = Field(..., ge=1, le=4)
-    has_swimming_pool: str = Field(..., pattern="|".join(YES_NO))
+
+def timed_validation(cls, data, handler):
+    # Wraps the whole model validation: the "validate" stage of /predict
+    start = now()
+    try:
+        return handler(data)
+    finally:
+        observe_stage("validate", start)
+
+
+PropertyInput = create_model(
+    "PropertyInput",
+    __validators__={"timed_validation": model_validator(mode="wrap")(timed_validation)},
+    **{f.name: (field_type(f), field_info(f)) for f in features.FEATURES}
+)
+
+# The same fields as a TypedDict: a whole batch is validated in one call
+# into plain dicts, without a PropertyInput object per row
+PropertyRow = TypedDict(
+    "PropertyRow",
+    {f.name: Annotated[field_type(f), field_info(f)] for f in features.FEATURES}
+)
+
+batch_adapter = TypeAdapter(list[PropertyRow])
+
+
+def validate_rows(rows: list) -> tuple:
+    """
+    Validates a list of payloads at once. Returns (valid_index,
+    valid_rows, errors): the indices and validated dicts of the valid
+    rows, and the validation errors of every invalid row by index.
+    """
+    try:
+        return list(range(len(rows))), batch_adapter.validate_python(rows), {}
+    except ValidationError as e:
+        errors = {}
+        for error in e.errors(include_url=False, include_context=False):
+            i, *loc = error["loc"]
+            errors.setdefault(i, []).append({**error, "loc": tuple(loc)})
+
+    # Second pass over the rows without errors
+    valid_index = [i for i in range(len(rows)) if i not in errors]
+    return valid_index, batch_adapter.validate_python([rows[i] for i in valid_index]), errors
 
 
 # ----------------------------------------
 # HEALTH CHECK ENDPOINT
 # ----------------------------------------
 @app.get("/")
-def alive():
+async def alive():
+    # Answered on the event loop: never queues behind model calls
     return {"status": "alive", "message": "FastAPI backend running!"}
 
 
+# ----------------------------------------
+# CACHE STATISTICS ENDPOINT
+# ----------------------------------------
+@app.get("/cache")
+async def cache_stats():
+    if CACHE_IN_EXECUTOR:
+        return {"available": False,
+                "detail": "With MODEL_EXECUTOR=process the cache lives in each executor process"}
+    return {"available": True, **prediction_cache.stats()}
+
+
+# ----------------------------------------
+# MODEL EXECUTOR STATISTICS ENDPOINT
+# ----------------------------------------
+@app.get("/executor")
+async def executor_stats():
+    return model_executor.stats()
+
+
+# ----------------------------------------
+# MODEL VERSION ENDPOINTS
+# ----------------------------------------
+@app.get("/model")
+async def model_info():
+    return {
+        **active_model().info(),
+        "versions": model_registry.versions() if model_registry is not None else [],
+        "last_swap": last_swap,
+    }
+
+
+@app.post("/admin/model")
+async def swap_model(version: str = Query(None, description="Registry version (default: its CURRENT)"),
+                     x_admin_token: str = Header("")):
+    if not ADMIN_TOKEN or model_registry is None:
+        raise HTTPException(status_code=404, detail="Model admin is off (set ADMIN_TOKEN, with a model registry)")
+    if not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    try:
+        return await hot_swap(version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model version not swapped in: {e}")
+
+
+@app.get("/shadow")
+async def shadow_stats():
+    # Candidate vs. live prices of the shadow-scored rows so far
+    if shadow is None:
+        raise HTTPException(status_code=404, detail="No candidate model (set CANDIDATE_MODEL_VERSION)")
+    return {
+        "candidate": candidate.name,
+        "live": active_model().name,
+        "ab_candidate_weight": AB_CANDIDATE_WEIGHT,
+        **shadow.stats(),
+    }
+
+
+# ----------------------------------------
+# METRICS AND PROFILER ENDPOINTS
+# ----------------------------------------
+@app.get("/metrics")
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/profile")
+async def sampling_profile(seconds: float = Query(10, gt=0, le=120),
+                           interval_ms: float = Query(5, ge=1, le=1000)):
+    # Folded stacks of every thread (flamegraph.pl / speedscope input);
+    # sampled in Starlette's threadpool, not in the model executor
+    if not PROFILER:
+        raise HTTPException(status_code=404, detail="The profiler is off (set PROFILER=1)")
+    stacks = await run_in_threadpool(metrics.profile, seconds, interval_ms / 1000)
+    return PlainTextResponse(stacks)
+
+
 # ----------------------------------------
 # PREDICTION ENDPOINT
 # ----------------------------------------
 @app.post("/predict")
-def predict_price(data: PropertyInput):
-
-    # Convert Yes/No → 1/0
-    def yn(x):
-        return 1 if x == "Yes" else 0
-
-    # Build DataFrame exactly like Streamlit
-    input_df = pd.DataFrame([{
-        "type": data.type,
-        "subtype": data.subtype,
-        "province": data.province,
-        "state_of_building": data.state_of_building,
-        "living_area (m²)": data.living_area,
-        "number_of_bedrooms": data.number_of_bedrooms,
-        "number_facades": data.number_facades,
-        "equiped_kitchen (yes:1, no:0)": yn(data.has_equiped_kitchen),
-        "furnished (yes:1, no:0)": yn(data.is_furnished),
-        "open_fire (yes:1, no:0)": yn(data.has_open_fire),
-        "terrace (yes:1, no:0)": yn(data.has_terrace),
-        "terrace_area (m²)": data.terrace_area,
-        "garden (yes:1, no:0)": yn(data.has_garden),
-        "swimming_pool (yes:1, no:0)": yn(data.has_swimming_pool),
-    }])
-
-    # Reorder columns as required by trained model
-    model_order = [
-        'number_of_bedrooms', 'living_area (m²)', 'equiped_kitchen (yes:1, no:0)',
-        'furnished (yes:1, no:0)', 'open_fire (yes:1, no:0)', 'terrace (yes:1, no:0)',
-        'terrace_area (m²)', 'garden (yes:1, no:0)', 'number_facades',
-        'swimming_pool (yes:1, no:0)', 'state_of_building', 'type', 'subtype', 'province'
-    ]
-
-    input_df = input_df[model_order]
+async def predict_price(data: PropertyInput, request: Request):
+
+    # Same columns as the Streamlit DataFrame, encoded by the compiled plan
+    row = to_model_row(data.model_dump())
+
+    # The whole request is scored by one version, even across a swap
+    version = serving_version(request)
 
     # Try model prediction
+    if MICRO_BATCHING:
+        try:
+            # Table/cache answers stay inline, model rows join the next batch
+            # (a row whose deadline passes is dropped from it)
+            prediction, X_row, key = lookup_prediction(row, version)
+            if prediction is None:
+                prediction = await asyncio.wait_for(batcher.submit(X_row, version), request_timeout(request))
+                remember_prediction(key, prediction)
+        except Overloaded as e:
+            metrics.model_errors.inc("prediction", "overloaded")
+            raise HTTPException(status_code=503, detail=f"Server overloaded: {e}",
+                                headers={"Retry-After": "1"})
+        except VersionNotLoaded as e:
+            metrics.model_errors.inc("prediction", "swapped")
+            raise HTTPException(status_code=503, detail=f"Model swapped during the request: {e}",
+                                headers={"Retry-After": "1"})
+        except asyncio.TimeoutError:
+            metrics.model_errors.inc("prediction", "deadline")
+            raise HTTPException(status_code=504, detail="Model prediction deadline exceeded")
+        except Exception as e:
+            metrics.model_errors.inc("prediction", "error")
+            raise HTTPException(status_code=500, detail=f"Model prediction failed: {e}")
+    else:
+        prediction = await run_model(request, "prediction", predict_row, row, version)
+
+    # Sampled rows go to the candidate's queue (never waits)
+    if shadowed(version) and shadow.sampled():
+        shadow.submit(candidate.plan.encode_row(row)[0], prediction, breakdown(row))
+
+    response = {
+        "predicted_price": float(prediction),
+        "model_version": version.name,
+        "status": "success"
+    }
+
+    # Conformal bounds of the same prediction, when the model has them
+    interval = price_interval(prediction, version)
+    if interval is not None:
+        response["price_interval"] = interval
+    return response
+
+
+# ----------------------------------------
+# BATCH PREDICTION ENDPOINT
+# ----------------------------------------
+def parse_batch_body(body: bytes, content_type: str) -> list:
+    """
+    Turns a JSON array, NDJSON or CSV request body into a list of dicts.
+    """
+    text = body.decode("utf-8")
+
+    if "text/csv" in content_type:
+        return list(csv.DictReader(io.StringIO(text)))
+
+    if "ndjson" in content_type:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    rows = json.loads(text)
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON array of properties")
+    return rows
+
+
+async def read_batch(request: Request) -> tuple:
+    """
+    Parses and validates a batch body off the event loop. Returns
+    (results, valid_index, valid_rows): invalid rows already have their
+    result with the validation errors, valid rows still have to be scored.
+    """
+    body = await request.body()
     try:
-        prediction = model.predict(input_df)[0]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Model prediction failed: {e}")
+        return await run_in_threadpool(validate_batch, body, request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch body: {e}")
+
+
+def validate_batch(body: bytes, content_type: str) -> tuple:
+    # Parse the body according to its content type
+    start = now()
+    rows = parse_batch_body(body, content_type)
+    observe_stage("parse_batch", start)
+
+    # Validate all rows at once, keeping errors per row instead of failing the batch
+    start = now()
+    valid_index, valid_rows, errors = validate_rows(rows)
+    observe_stage("validate_batch", start)
+    metrics.batch_rows.observe(len(rows), "validate_batch")
+
+    results = [None] * len(rows)
+    for i, row_errors in errors.items():
+        results[i] = {"index": i, "status": "invalid", "errors": row_errors}
+
+    return results, valid_index, [to_model_row(row) for row in valid_rows]
+
+
+# Arrow IPC stream bodies are answered in the same format (see arrow_io.py)
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+
+async def predict_arrow_batch(request: Request, version):
+    try:
+        from . import arrow_io   # pyarrow is only needed for Arrow bodies
+    except ImportError:
+        raise HTTPException(status_code=415, detail="Arrow bodies need pyarrow on the server")
+
+    body = await request.body()
+    try:
+        n_rows, valid_index, X_enc, errors, columns = await run_in_threadpool(arrow_io.read_batch, body,
+                                                                              version.plan)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch body: {e}")
+
+    predictions, lower, upper = await run_model(request, "prediction", predict_matrix, X_enc, True, version)
+    if shadowed(version):
+        # The sampled rows are encoded for the candidate straight from the columns
+        sampled = shadow.sample(len(predictions))
+        rows = valid_index[sampled]
+        shadow.submit_batch(arrow_io.encode_table(candidate.plan, columns, rows), predictions[sampled],
+                            list(zip(*(arrow_io.category_values(columns, field, rows) for field in BREAKDOWNS))))
+
+    metadata = {"model_version": version.name}
+    if lower is not None:
+        metadata["coverage"] = version.intervals.coverage
+    content = await run_in_threadpool(arrow_io.write_predictions, n_rows, valid_index, predictions,
+                                      lower, upper, errors, metadata)
+    return Response(content, media_type=ARROW_STREAM)
+
+
+@app.post("/predict/batch")
+async def predict_batch(request: Request):
+
+    version = serving_version(request)
+    if ARROW_STREAM in request.headers.get("content-type", ""):
+        return await predict_arrow_batch(request, version)
+
+    results, valid_index, valid_rows = await read_batch(request)
+
+    # One vectorized model call per chunk for all valid rows (with intervals)
+    predictions, lower, upper = await run_model(request, "prediction", make_batch_prediction,
+                                                valid_rows, True, version)
+    if shadowed(version):
+        shadow_batch(valid_rows, predictions)
+
+    for k, (i, prediction) in enumerate(zip(valid_index, predictions)):
+        results[i] = {"index": i, "status": "success", "predicted_price": float(prediction)}
+        if lower is not None:
+            results[i]["price_interval"] = interval_response(lower[k], upper[k], version)
 
     return {
-        "predicted_price": float(prediction),
+        "n_rows": len(results),
+        "n_valid": len(valid_rows),
+        "results": results,
+        "model_version": version.name,
         "status": "success"
     }
 
 
+# ----------------------------------------
+# WHAT-IF ENDPOINT
+# ----------------------------------------
+# Fields a what-if can sweep: a range of a numeric field, or every state
+# of the building (from worst to best)
+SWEEP_FIELDS = ("living_area", "terrace_area", "state_of_building")
+
+# Largest grid (product of the points of the swept fields) of one /whatif
+WHATIF_MAX_POINTS = int(os.getenv("WHATIF_MAX_POINTS", "2500"))
+
+
+class Sweep(BaseModel):
+    field: Literal[SWEEP_FIELDS]
+    start: float = None      # default: the field's minimum
+    stop: float = None       # default: the field's maximum
+    points: int = Field(21, ge=2)
+
+    @model_validator(mode="after")
+    def within_bounds(self):
+        feature = features.FEATURES_BY_NAME[self.field]
+        if feature.kind == "category":
+            return self
+        self.start = feature.minimum if self.start is None else self.start
+        self.stop = feature.maximum if self.stop is None else self.stop
+        if not feature.minimum <= self.start < self.stop <= feature.maximum:
+            raise ValueError(f"{self.field} must be swept within [{feature.minimum}, {feature.maximum}], "
+                             f"with start < stop")
+        return self
+
+    def values(self) -> list:
+        feature = features.FEATURES_BY_NAME[self.field]
+        if feature.kind == "category":
+            return list(feature.choices)
+        return np.linspace(self.start, self.stop, self.points).tolist()
+
+
+class WhatIfInput(BaseModel):
+    base: PropertyInput
+    sweep: list[Sweep] = Field(..., min_length=1, max_length=2)
+
+    @model_validator(mode="after")
+    def grid_size(self):
+        if len({s.field for s in self.sweep}) != len(self.sweep):
+            raise ValueError("A field can only be swept once")
+        n_points = int(np.prod([len(s.values()) for s in self.sweep]))
+        if n_points > WHATIF_MAX_POINTS:
+            raise ValueError(f"The grid has {n_points} points, more than {WHATIF_MAX_POINTS}")
+        return self
+
+
+@app.post("/whatif")
+async def whatif(data: WhatIfInput, request: Request):
+
+    row = to_model_row(data.base.model_dump())
+    version = serving_version(request)
+
+    # The whole grid (and the base property) is one encoded matrix, scored in one model call
+    values = {s.field: s.values() for s in data.sweep}
+    sweeps = [(features.FEATURES_BY_NAME[field].column, field_values) for field, field_values in values.items()]
+    predictions, lower, upper = await run_model(request, "prediction", make_whatif, row, sweeps, version)
+
+    # Prices as a list over the first field, nested per value of the second
+    shape = [len(field_values) for field_values in values.values()]
+
+    def grid(prices):
+        return prices[:-1].reshape(shape).tolist()
+
+    response = {
+        "fields": list(values),
+        "values": values,
+        "predicted_price": grid(predictions),
+        "base_price": float(predictions[-1]),
+        "n_points": len(predictions) - 1,
+        "model_version": version.name,
+        "status": "success"
+    }
+    if lower is not None:
+        response["price_interval"] = {"lower": grid(lower), "upper": grid(upper),
+                                      "coverage": version.intervals.coverage}
+    return response
+
+
+# ----------------------------------------
+# EXPLANATION ENDPOINTS
+# ----------------------------------------
+@app.post("/explain")
+async def explain_price(data: PropertyInput, request: Request,
+                        method: Literal["approx", "exact"] = EXPLAIN_METHOD):
+
+    # Per-field contributions from the booster's pred_contribs (cached per feature row)
+    explanation = await run_model(request, "explanation", explain_row, to_model_row(data.model_dump()), method,
+                                  active_model())
+
+    return {**explanation, "status": "success"}
+
+
+@app.post("/explain/batch")
+async def explain_batch(request: Request, method: Literal["approx", "exact"] = EXPLAIN_METHOD):
+
+    results, valid_index, valid_rows = await read_batch(request)
+
+    # One vectorized contributions call per chunk for all valid rows
+    explanations = await run_model(request, "explanation", make_batch_explanation, valid_rows, method,
+                                   active_model())
+
+    for i, explanation in zip(valid_index, explanations):
+        results[i] = {"index": i, "status": "success", **explanation}
+
+    return {
+        "n_rows": len(results),
+        "n_valid": len(valid_rows),
+        "results": results,
+        "status": "success"
+    }
+
+
+# ----------------------------------------
+# COMPARABLE PROPERTIES ENDPOINT
+# ----------------------------------------
+@app.post("/comparables")
+async def comparables(data: PropertyInput, k: int = Query(5, ge=1, le=50)):
+
+    if comparables_index is None:
+        raise HTTPException(status_code=503, detail="No comparables index is configured")
+
+    # One small KD-tree query (well under a millisecond): answered inline
+    matches = comparables_index.query(to_model_row(data.model_dump()), k)
+
+    return {
+        "comparables": [
+            {**to_api_row(row), "price": price, "id": listing_id, "distance": distance}
+            for row, price, listing_id, distance in matches
+        ],
+        "n": len(matches),
+        "status": "success"
+    }
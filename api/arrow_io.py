@@ -0,0 +1,249 @@
+# ---------------------------------------------------------
+# ARROW IPC BATCHES
+# ---------------------------------------------------------
+# /predict/batch also takes an Apache Arrow IPC stream, one column
+# per API field (the 14 fields of features.py), and answers with one.
+# Nothing goes through Python objects row by row:
+#   - validation is columnar: categories and string flags are checked
+#     once per distinct value of the column's dictionary, numbers with
+#     NumPy comparisons on the Arrow buffers;
+#   - encoding writes the float32 matrix of the plan straight from
+#     those buffers (numeric columns without nulls are read in place)
+#     and maps categories through their dictionary codes;
+#   - the answer is a record batch with the row index, the price and
+#     its bounds (null for invalid rows), the status and the errors of
+#     invalid rows as JSON; the model version is in the schema metadata.
+# Column types are checked first: a category must be a string (or
+# dictionary of strings) column, a number an integer or float column,
+# a flag a boolean, 0/1 or Yes/No column; a wrong type rejects the batch.
+import json
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .encoding import NUMERIC
+from .features import FEATURES
+from . import metrics
+from .metrics import now, observe_stage
+
+# String flags accepted like Pydantic's booleans (case-insensitive)
+TRUE_STRINGS = {"yes", "y", "true", "t", "on", "1"}
+FALSE_STRINGS = {"no", "n", "false", "f", "off", "0"}
+
+# A null is a value given as null (JSON null), not a missing field: it gets
+# Pydantic's type error (a null category gets its literal_error)
+NULL_ERRORS = {
+    "flag": ("bool_type", "Input should be a valid boolean"),
+    "int": ("int_type", "Input should be a valid integer"),
+    "float": ("float_type", "Input should be a valid number"),
+}
+
+
+def read_table(body: bytes) -> pa.Table:
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except pa.ArrowInvalid as e:
+        raise ValueError(f"Not an Arrow IPC stream: {e}")
+    # One dictionary per column across the record batches
+    return table.unify_dictionaries()
+
+
+def column_array(table: pa.Table, name: str) -> pa.Array:
+    # One contiguous array; a single record batch is used as is
+    column = table.column(name)
+    return column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+
+
+def dictionary_encoded(array: pa.Array) -> tuple:
+    """
+    (distinct values, index of each row's value, -1 for null) of a
+    string or dictionary column.
+    """
+    if not pa.types.is_dictionary(array.type):
+        array = array.dictionary_encode()
+    indices = pc.fill_null(array.indices, -1).to_numpy(zero_copy_only=False)
+    return array.dictionary.to_pylist(), indices
+
+
+def is_string(data_type) -> bool:
+    if pa.types.is_dictionary(data_type):
+        data_type = data_type.value_type
+    return pa.types.is_string(data_type) or pa.types.is_large_string(data_type)
+
+
+def is_number(data_type) -> bool:
+    return pa.types.is_integer(data_type) or pa.types.is_floating(data_type)
+
+
+def literal_message(choices: tuple) -> str:
+    quoted = [repr(choice) for choice in choices]
+    return f"Input should be {', '.join(quoted[:-1])} or {quoted[-1]}"
+
+
+def add_errors(errors: dict, mask: np.ndarray, array: pa.Array, feature, error_type: str, msg: str):
+    # Same fields as the Pydantic errors of the JSON path
+    for i in np.flatnonzero(mask):
+        errors.setdefault(int(i), []).append(
+            {"type": error_type, "loc": (feature.name,), "msg": msg, "input": array[int(i)].as_py()})
+
+
+def validate_table(table: pa.Table) -> tuple:
+    """
+    Checks every column against the feature spec. Returns (columns,
+    errors): the columns keyed by model column – NumPy arrays for numbers
+    and flags, (dictionary, indices) for categories – and the validation
+    errors of every invalid row by index.
+    """
+    columns, errors = {}, {}
+    for feature in FEATURES:
+        if feature.name not in table.column_names:
+            raise ValueError(f"Missing column {feature.name!r}")
+        array = column_array(table, feature.name)
+
+        if feature.kind == "category":
+            if not is_string(array.type):
+                raise ValueError(f"Column {feature.name!r} must hold strings, not {array.type}")
+            dictionary, indices = dictionary_encoded(array)
+            allowed = np.array([value in feature.choices for value in dictionary] + [False])   # last: null
+            add_errors(errors, ~allowed[indices], array, feature, "literal_error",
+                       literal_message(feature.choices))
+            # Values outside the spec only occur in invalid rows, which are not encoded
+            columns[feature.column] = ([v if ok else None for v, ok in zip(dictionary, allowed)], indices)
+            continue
+
+        if feature.kind == "flag":
+            if is_string(array.type):
+                dictionary, indices = dictionary_encoded(array)
+                codes = [1.0 if str(v).lower() in TRUE_STRINGS else 0.0 if str(v).lower() in FALSE_STRINGS
+                         else -1.0 for v in dictionary]
+                values = np.array(codes + [np.nan])[indices]
+            elif pa.types.is_boolean(array.type) or is_number(array.type):
+                values = np.array(array.to_numpy(zero_copy_only=False), dtype=np.float64)
+                values[(values != 0) & (values != 1) & ~np.isnan(values)] = -1.0
+            else:
+                raise ValueError(f"Column {feature.name!r} must hold booleans, 0/1 or Yes/No, not {array.type}")
+            add_errors(errors, np.isnan(values), array, feature, *NULL_ERRORS[feature.kind])
+            add_errors(errors, values == -1.0, array, feature, "bool_parsing",
+                       "Input should be a valid boolean, unable to interpret input")
+            columns[feature.column] = values
+            continue
+
+        if not is_number(array.type):
+            raise ValueError(f"Column {feature.name!r} must hold numbers, not {array.type}")
+        # A view of the Arrow buffer unless the column has nulls (NaN then)
+        values = array.to_numpy(zero_copy_only=False)
+        if values.dtype.kind == "f":
+            add_errors(errors, np.isnan(values), array, feature, *NULL_ERRORS[feature.kind])
+            if feature.kind == "int":
+                fractional = np.isfinite(values) & (values != np.trunc(values))
+                add_errors(errors, fractional, array, feature, "int_from_float",
+                           "Input should be a valid integer, got a number with a fractional part")
+        add_errors(errors, values < feature.minimum, array, feature, "greater_than_equal",
+                   f"Input should be greater than or equal to {feature.minimum}")
+        add_errors(errors, values > feature.maximum, array, feature, "less_than_equal",
+                   f"Input should be less than or equal to {feature.maximum}")
+        columns[feature.column] = values
+    return columns, errors
+
+
+def encode_table(plan, columns: dict, rows: np.ndarray = None) -> np.ndarray:
+    """
+    Encodes validated columns (see `validate_table`) into the plan's
+    (n_rows, n_features) float32 matrix, for the given row indices (None:
+    every row). Categories are mapped once per dictionary value.
+    """
+    n_rows = len(rows) if rows is not None else table_length(columns)
+    out = np.empty((n_rows, len(plan.steps)), dtype=np.float32)
+
+    for j, (kind, source, _) in enumerate(plan.steps):
+        if kind == NUMERIC:
+            values = columns[source]
+            out[:, j] = values if rows is None else values[rows]
+        else:
+            dictionary, indices = columns[source]
+            codes = plan.category_codes(source, dictionary)
+            out[:, j] = codes[indices if rows is None else indices[rows]]
+    return out
+
+
+def table_length(columns: dict) -> int:
+    column = next(iter(columns.values()))
+    return len(column[1]) if isinstance(column, tuple) else len(column)
+
+
+def category_values(columns: dict, column: str, rows: np.ndarray) -> list:
+    """
+    Values of a validated category column at the given row indices.
+    """
+    dictionary, indices = columns[column]
+    return [dictionary[i] for i in indices[rows]]
+
+
+def read_batch(body: bytes, plan) -> tuple:
+    """
+    Parses, validates and encodes an Arrow batch. Returns (n_rows,
+    valid_index, X_enc, errors, columns): the indices of the valid rows,
+    their encoded matrix, the validation errors of the invalid rows and
+    the validated columns (to encode rows for another plan).
+    """
+    start = now()
+    table = read_table(body)
+    observe_stage("parse_batch", start)
+
+    start = now()
+    columns, errors = validate_table(table)
+    observe_stage("validate_batch", start)
+    metrics.batch_rows.observe(table.num_rows, "validate_batch")
+
+    start = now()
+    if errors:
+        valid = np.ones(table.num_rows, dtype=bool)
+        valid[list(errors)] = False
+        valid_index = np.flatnonzero(valid)
+        X_enc = encode_table(plan, columns, valid_index)
+    else:
+        valid_index = np.arange(table.num_rows)
+        X_enc = encode_table(plan, columns)
+    observe_stage("encode_batch", start)
+    return table.num_rows, valid_index, X_enc, errors, columns
+
+
+def write_predictions(n_rows: int, valid_index: np.ndarray, predictions: np.ndarray, lower, upper,
+                      errors: dict, metadata: dict) -> memoryview:
+    """
+    One Arrow IPC stream with a row per input row: index, predicted_price,
+    price_lower / price_upper (when the model has intervals), status and
+    errors (JSON, invalid rows only).
+    """
+    start = now()
+    valid = None
+    if errors:
+        valid = np.zeros(n_rows, dtype=bool)
+        valid[valid_index] = True
+
+    def per_row(values):
+        # NumPy memory reused when every row is valid
+        if valid is None:
+            return pa.array(values)
+        full = np.full(n_rows, np.nan)
+        full[valid_index] = values
+        return pa.array(full, mask=~valid)
+
+    arrays = {"index": pa.array(np.arange(n_rows)), "predicted_price": per_row(predictions)}
+    if lower is not None:
+        arrays["price_lower"] = per_row(lower)
+        arrays["price_upper"] = per_row(upper)
+
+    invalid = np.zeros(n_rows, dtype=np.int8) if valid is None else (~valid).astype(np.int8)
+    arrays["status"] = pa.DictionaryArray.from_arrays(invalid, pa.array(["success", "invalid"]))
+    row_errors = [None] * n_rows
+    for i, error_list in errors.items():
+        row_errors[i] = json.dumps(error_list, default=str)
+    arrays["errors"] = pa.array(row_errors, type=pa.string())
+
+    table = pa.table(arrays).replace_schema_metadata({key: str(value) for key, value in metadata.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    observe_stage("write_batch", start)
+    return memoryview(sink.getvalue())
@@ -0,0 +1,195 @@
+# ---------------------------------------------------------
+# VERSIONED MODEL ARTIFACT BUNDLE
+# ---------------------------------------------------------
+# A bundle is a folder that replaces models/xgb_pipeline.pkl:
+#
+#   manifest.json   format version, encoding plan, log_target,
+#                   conformal intervals (optional), file hashes and
+#                   the bundle content hash
+#   booster.ubj     the XGBoost booster in its native UBJSON format
+#   compiled/*.npy  node arrays of the compiled ensemble (memory-mappable)
+#
+# Nothing in it is unpickled, and the compiled arrays can be served
+# with NumPy alone. Convert an existing pickle from the project root:
+#   python -m api.artifacts models/xgb_pipeline.pkl models/xgb_bundle
+import hashlib
+import json
+import os
+import sys
+import numpy as np
+
+from .compiled_model import CompiledEnsemble, ARRAY_NAMES
+from .encoding import EncodingPlan
+from .intervals import ConformalIntervals
+
+BUNDLE_FORMAT = 1
+MANIFEST_FILE = "manifest.json"
+BOOSTER_FILE = "booster.ubj"
+COMPILED_DIR = "compiled"
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _content_hash(manifest: dict) -> str:
+    # Hash of everything that defines the predictions: plan, target
+    # transform and the bytes of every file (and the intervals, if any)
+    keys = ("format", "log_target", "plan", "files", "intervals")
+    payload = json.dumps(
+        {key: manifest[key] for key in keys if key in manifest},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def save_bundle(pipeline, out_dir: str) -> dict:
+    """
+    Writes a fitted FullXGBPipeline as a bundle and returns its manifest.
+    """
+    os.makedirs(os.path.join(out_dir, COMPILED_DIR), exist_ok=True)
+
+    booster = pipeline.model.get_booster()
+    booster.save_model(os.path.join(out_dir, BOOSTER_FILE))
+
+    compiled = CompiledEnsemble.from_pipeline(pipeline)
+    for name, array in compiled.arrays().items():
+        np.save(os.path.join(out_dir, COMPILED_DIR, name + ".npy"), array)
+
+    files = [BOOSTER_FILE] + [f"{COMPILED_DIR}/{name}.npy" for name in ARRAY_NAMES]
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "log_target": bool(pipeline.log_target),
+        "plan": compiled.plan.to_dict(),
+        "compiled": {"depth": compiled.depth, "base_score": compiled.base_score},
+        "files": {name: _sha256(os.path.join(out_dir, name)) for name in files},
+    }
+    if getattr(pipeline, "intervals", None) is not None:
+        manifest["intervals"] = pipeline.intervals.to_dict()
+    manifest["content_hash"] = _content_hash(manifest)
+
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+
+class BoosterModel:
+    """
+    Native XGBoost Booster plus log-target handling, with the same
+    predict_encoded / predict_booster / predict_contributions methods
+    as FullXGBPipeline.
+    """
+
+    def __init__(self, booster, log_target: bool):
+        self.booster = booster
+        self.log_target = log_target
+        self._nthread = None
+
+    def native_booster(self, nthread=None):
+        if nthread is not None and nthread != self._nthread:
+            self.booster.set_param({"nthread": nthread})
+            self._nthread = nthread
+        return self.booster
+
+    def predict_booster(self, X_enc, nthread=None):
+        X_enc = np.ascontiguousarray(X_enc, dtype=np.float32)
+        y_pred = self.native_booster(nthread).inplace_predict(X_enc)
+        if self.log_target:
+            return np.expm1(y_pred)  # inverse log1p
+        else:
+            return y_pred
+
+    def predict_encoded(self, X_enc):
+        return self.predict_booster(X_enc)
+
+    def predict_contributions(self, X_enc, approx=False, nthread=None):
+        import xgboost as xgb
+
+        booster = self.native_booster(nthread)
+        dmatrix = xgb.DMatrix(np.asarray(X_enc, dtype=np.float32), feature_names=booster.feature_names)
+        return booster.predict(dmatrix, pred_contribs=True, approx_contribs=approx)
+
+
+class ModelBundle:
+    def __init__(self, path: str, manifest: dict, mmap_arrays: bool):
+        self.path = path
+        self.manifest = manifest
+        self.mmap_arrays = mmap_arrays
+        self.plan = EncodingPlan.from_dict(manifest["plan"])
+        self.log_target = manifest["log_target"]
+
+    @property
+    def content_hash(self) -> str:
+        return self.manifest["content_hash"]
+
+    def intervals(self):
+        """
+        Conformal price intervals saved with the model, or None.
+        """
+        data = self.manifest.get("intervals")
+        return ConformalIntervals.from_dict(data) if data else None
+
+    def booster_model(self) -> BoosterModel:
+        """
+        Loads the native booster (imports xgboost only here). XGBoost
+        parses the file into its own memory: only the compiled arrays
+        are served from a memory map.
+        """
+        import xgboost as xgb
+
+        booster = xgb.Booster(model_file=os.path.join(self.path, BOOSTER_FILE))
+        return BoosterModel(booster, self.log_target)
+
+    def compiled(self) -> CompiledEnsemble:
+        """
+        Compiled ensemble over the node arrays, memory-mapped by default
+        so that worker processes share the same pages.
+        """
+        mmap_mode = "r" if self.mmap_arrays else None
+        arrays = {
+            name: np.load(os.path.join(self.path, COMPILED_DIR, name + ".npy"),
+                          mmap_mode=mmap_mode, allow_pickle=False)
+            for name in ARRAY_NAMES
+        }
+        meta = dict(self.manifest["compiled"], log_target=self.log_target,
+                    plan=self.manifest["plan"])
+        return CompiledEnsemble.from_arrays(arrays, meta)
+
+
+def load_bundle(path: str, mmap_arrays: bool = True, verify: bool = True) -> ModelBundle:
+    """
+    Reads the manifest of a bundle and, with `verify`, checks the file
+    hashes and content hash before anything is loaded.
+    """
+    with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported bundle format: {manifest.get('format')!r}")
+
+    if verify:
+        for name, expected in manifest["files"].items():
+            if _sha256(os.path.join(path, name)) != expected:
+                raise ValueError(f"Bundle file {name} does not match its hash")
+        if _content_hash(manifest) != manifest["content_hash"]:
+            raise ValueError("Bundle content hash does not match its manifest")
+
+    return ModelBundle(path, manifest, mmap_arrays)
+
+
+if __name__ == "__main__":
+    import pickle
+
+    # The pickle needs utils.FullXGBPipeline from the Streamlit folder
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "streamlit"))
+
+    pickle_path, out_dir = sys.argv[1], sys.argv[2]
+    with open(pickle_path, "rb") as f:
+        pipeline = pickle.load(f)
+
+    manifest = save_bundle(pipeline, out_dir)
+    print(f"Wrote bundle {manifest['content_hash'][:12]} → {out_dir}")
@@ -0,0 +1,140 @@
+# ---------------------------------------------------------
+# DYNAMIC MICRO-BATCHING
+# ---------------------------------------------------------
+# Concurrent /predict calls each used to run their own one-row
+# XGBoost predict in the threadpool. The batcher queues the
+# encoded rows, collects up to `max_batch_size` of them or waits
+# at most `max_wait_ms`, scores them with one vectorized call in
+# a dedicated executor and resolves every caller's future.
+# Rows carry the model version they were encoded for: a batch
+# that spans a hot-swap is scored in one call per version, and
+# the rows of the previous version in the executor that still
+# holds it (`route`, until `drain` returns).
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+class Overloaded(Exception):
+    """
+    Raised when the queue is full (the API answers 503).
+    """
+
+
+class MicroBatcher:
+    def __init__(self, score_fn, max_batch_size: int = 64, max_wait_ms: float = 2.0,
+                 max_queue: int = 10_000, executor=None):
+        self.score_fn = score_fn            # (encoded matrix, version) → predictions
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="micro-batch")
+        self.routes = {}                    # version → executor, for versions other than the active one
+        self.waiting = {}                   # version → callers waiting for a prediction
+        self.queue = None
+        self.batches = 0
+        self.rows = 0
+        self._task = None
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, X_row: np.ndarray, version=None) -> float:
+        """
+        Queues one encoded row and waits for its prediction by `version`.
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((X_row, version, future))
+        except asyncio.QueueFull:
+            raise Overloaded(f"More than {self.max_queue} rows waiting")
+        self.waiting[version] = self.waiting.get(version, 0) + 1
+        try:
+            return await future
+        finally:
+            self.waiting[version] -= 1
+
+    def route(self, version, executor):
+        """
+        Scores the rows of `version` in `executor` rather than in
+        `self.executor` (the executor still holding a swapped-out version).
+        """
+        self.routes[version] = executor
+
+    async def drain(self, version):
+        """
+        Waits until no caller waits for a row of `version` any more (each
+        has a deadline), then forgets its route.
+        """
+        while self.waiting.get(version):
+            await asyncio.sleep(self.max_wait)
+        self.waiting.pop(version, None)
+        self.routes.pop(version, None)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+        }
+
+    async def _collect(self) -> list:
+        # Block for the first row, then fill the batch until it is full
+        # or max_wait has passed since that first row arrived
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+
+            # Callers that gave up (cancelled) are not scored
+            groups = {}
+            for X_row, version, future in batch:
+                if not future.done():
+                    groups.setdefault(version, []).append((X_row, future))
+
+            for version, group in groups.items():
+                X = np.vstack([X_row for X_row, _ in group])
+                try:
+                    executor = self.routes.get(version, self.executor)
+                    predictions = await loop.run_in_executor(executor, self.score_fn, X, version)
+                except Exception as e:
+                    for _, future in group:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                self.batches += 1
+                self.rows += len(group)
+                for (_, future), prediction in zip(group, predictions):
+                    if not future.done():
+                        future.set_result(float(prediction))
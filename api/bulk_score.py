@@ -0,0 +1,178 @@
+# ---------------------------------------------------------
+# STREAMING BULK SCORER (CSV / PARQUET)
+# ---------------------------------------------------------
+# Re-prices listing dumps of any size: the input is read in
+# fixed-size chunks, each chunk is mapped to the model columns,
+# encoded like FullXGBPipeline.transform and scored, and the
+# predictions are appended to the output file. Only a bounded
+# number of chunks is in memory at any time.
+#
+# Run from the project root:
+#   python -m api.bulk_score listings.parquet prices.parquet --workers 4
+import argparse
+import json
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+import pandas as pd
+
+from .features import FEATURES
+
+# API field names accepted as input columns, next to the model's own names
+API_COLUMNS = {f.name: f.column for f in FEATURES if f.name != f.column}
+
+
+def read_chunks(path: str, chunk_size: int):
+    """
+    Yields DataFrames of at most chunk_size rows from a CSV or Parquet file.
+    """
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def to_model_columns(chunk: pd.DataFrame, column_map: dict) -> pd.DataFrame:
+    """
+    Renames raw columns to the model's names and turns Yes/No flags into 1/0.
+    """
+    chunk = chunk.rename(columns=column_map)
+    for col in API_COLUMNS.values():
+        if col in chunk and not pd.api.types.is_numeric_dtype(chunk[col]):
+            chunk[col] = chunk[col].map({"Yes": 1, "No": 0, "yes": 1, "no": 0, 1: 1, 0: 0})
+    return chunk
+
+
+class ChunkWriter:
+    """
+    Appends scored chunks to a CSV or Parquet output file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.parquet = path.endswith(".parquet")
+        self.writer = None
+        self.first = True
+
+    def write(self, frame: pd.DataFrame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema)
+            self.writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="w" if self.first else "a", header=self.first, index=False)
+        self.first = False
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def score_chunk(chunk: pd.DataFrame, column_map: dict, keep: list) -> pd.DataFrame:
+    from . import predict
+
+    model_chunk = to_model_columns(chunk, column_map)
+    predictions = np.asarray(predict.predict_encoded(predict.plan.encode_columns(model_chunk)),
+                             dtype=np.float64)
+
+    out = chunk[keep].reset_index(drop=True) if keep else pd.DataFrame(index=range(len(chunk)))
+    out["predicted_price"] = predictions
+    if predict.intervals is not None:
+        out["price_lower"], out["price_upper"] = predict.intervals.apply(predictions)
+    return out
+
+
+def _init_worker():
+    # One model thread per process: the pool provides the parallelism
+    os.environ["PREDICT_NTHREAD"] = "1"
+    os.environ["PREDICTION_CACHE_SIZE"] = "0"
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kB on Linux; children covers the pool workers
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024
+
+
+def bulk_score(input_path: str, output_path: str, chunk_size: int = 100_000,
+               workers: int = 1, column_map: dict = None, keep: list = None) -> dict:
+    """
+    Scores the input file chunk by chunk and returns the run summary.
+    With workers > 1, chunks are scored in a process pool with at most
+    2 × workers chunks in flight, and written in input order.
+    """
+    column_map = dict(API_COLUMNS, **(column_map or {}))
+    keep = keep or []
+    writer = ChunkWriter(output_path)
+    rows = 0
+    chunks = 0
+    start = time.perf_counter()
+
+    try:
+        if workers <= 1:
+            for chunk in read_chunks(input_path, chunk_size):
+                writer.write(score_chunk(chunk, column_map, keep))
+                rows += len(chunk)
+                chunks += 1
+        else:
+            pending = []
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                for chunk in read_chunks(input_path, chunk_size):
+                    pending.append(pool.submit(score_chunk, chunk, column_map, keep))
+                    if len(pending) >= 2 * workers:
+                        scored = pending.pop(0).result()
+                        writer.write(scored)
+                        rows += len(scored)
+                        chunks += 1
+                for future in pending:
+                    scored = future.result()
+                    writer.write(scored)
+                    rows += len(scored)
+                    chunks += 1
+    finally:
+        writer.close()
+
+    seconds = time.perf_counter() - start
+    return {
+        "input": input_path,
+        "output": output_path,
+        "rows": rows,
+        "chunks": chunks,
+        "chunk_size": chunk_size,
+        "workers": workers,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file of listings")
+    parser.add_argument("input")
+    parser.add_argument("output", help="output file (.csv or .parquet)")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--columns", type=json.loads, default=None,
+                        help='extra raw → model column names, e.g. \'{"bedrooms": "number_of_bedrooms"}\'')
+    parser.add_argument("--keep", default="", help="comma-separated input columns copied to the output")
+    parser.add_argument("--summary", default=None, help="run summary file (default: <output>.summary.json)")
+    args = parser.parse_args()
+
+    summary = bulk_score(args.input, args.output, args.chunk_size, args.workers,
+                         args.columns, [c for c in args.keep.split(",") if c])
+    with open(args.summary or args.output + ".summary.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print(f"{summary['rows']} rows in {summary['seconds']:.1f} s "
+          f"({summary['rows_per_second']:.0f} rows/s, peak RSS {summary['peak_rss_mb']:.0f} MB)")
@@ -0,0 +1,159 @@
+# ---------------------------------------------------------
+# PREDICTION CACHE
+# ---------------------------------------------------------
+# The input space is small and heavily repeated (agents
+# re-quoting a listing, Streamlit re-running on every widget
+# change), so predictions are cached on the encoded feature
+# row. Keys include the model artifact hash: a new model never
+# serves entries from the old one. Entries of several versions live
+# side by side (A/B split, shadow candidate); a hot-swap drops those
+# of the versions no longer served (`retain`).
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Hex digits of the artifact hash in front of every key
+KEY_PREFIX = 12
+
+
+class LocalBackend:
+    """
+    In-process stand-in for a shared key/value store (same get/set
+    interface as RedisBackend), useful to test the shared code path.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key: str):
+        value, expires = self.data.get(key, (None, 0.0))
+        return value if expires > time.monotonic() else None
+
+    def set(self, key: str, value: float, ttl: float):
+        self.data[key] = (value, time.monotonic() + ttl)
+
+
+class RedisBackend:
+    """
+    Shares entries between uvicorn/gunicorn workers through Redis.
+    The `redis` package is optional and only imported here.
+    """
+
+    def __init__(self, url: str):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key: str):
+        value = self.client.get("prediction:" + key)
+        return None if value is None else float(value)
+
+    def set(self, key: str, value: float, ttl: float):
+        self.client.set("prediction:" + key, value, ex=max(1, int(ttl)))
+
+
+class PredictionCache:
+    def __init__(self, maxsize: int = 10_000, ttl: float = 3600.0, backend=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend     # optional shared store behind the local LRU
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()   # key → (value, expiry time)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def key(self, X_row: np.ndarray, model_hash: str) -> str:
+        """
+        Canonical key of one encoded feature row for one model artifact,
+        prefixed with the artifact's short hash (see `retain`).
+        """
+        digest = hashlib.blake2b(np.ascontiguousarray(X_row, dtype=np.float32).tobytes(),
+                                 key=model_hash.encode("ascii")[:64], digest_size=16)
+        return f"{model_hash[:KEY_PREFIX]}:{digest.hexdigest()}"
+
+    def get(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+
+        value = self.backend.get(key) if self.backend is not None else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._store(key, value, now)
+        return value
+
+    def set(self, key: str, value: float):
+        self._store(key, value, time.monotonic())
+        if self.backend is not None:
+            self.backend.set(key, value, self.ttl)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def retain(self, model_hashes):
+        """
+        Drops the entries of every model artifact but `model_hashes`.
+        """
+        prefixes = {model_hash[:KEY_PREFIX] for model_hash in model_hashes}
+        with self._lock:
+            for key in [key for key in self._entries if key.split(":", 1)[0] not in prefixes]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "models": len({key.split(":", 1)[0] for key in self._entries}),
+                "shared_backend": type(self.backend).__name__ if self.backend else None,
+            }
+
+    def _store(self, key: str, value: float, now: float):
+        with self._lock:
+            self._entries[key] = (value, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)   # evict least recently used
+
+
+def cache_from_env() -> PredictionCache:
+    """
+    PREDICTION_CACHE_SIZE (0 disables), PREDICTION_CACHE_TTL in seconds and
+    PREDICTION_CACHE_URL (redis://… for a cache shared by all workers,
+    local:// for the in-process stand-in).
+    """
+    url = os.getenv("PREDICTION_CACHE_URL", "")
+    backend = None
+    if url.startswith("redis://"):
+        backend = RedisBackend(url)
+    elif url.startswith("local://"):
+        backend = LocalBackend()
+
+    return PredictionCache(
+        maxsize=int(os.getenv("PREDICTION_CACHE_SIZE", "10000")),
+        ttl=float(os.getenv("PREDICTION_CACHE_TTL", "3600")),
+        backend=backend,
+    )
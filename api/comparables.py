@@ -0,0 +1,204 @@
+# ---------------------------------------------------------
+# COMPARABLE-PROPERTIES INDEX
+# ---------------------------------------------------------
+# Finds the k known listings closest to a property. The listings
+# are encoded with the model's EncodingPlan (the feature space of
+# FullXGBPipeline.transform), partitioned by province × type, and
+# each partition holds a KD-tree over the standardized numeric
+# features (living area, bedrooms, state of the building). A query
+# encodes one row, picks its partition and walks one small tree,
+# instead of scanning every listing.
+#
+# A KD-tree pickles by copying its arrays, so the trees themselves are
+# not stored: the standardized points are, sorted by partition, and
+# memory-mapped when the API starts like the listings. Each partition's
+# tree is rebuilt over its slice of the points (a fraction of a second
+# for a few hundred thousand listings): every worker reads the points
+# from the same pages and only holds its own node and index arrays.
+#
+# Build from the project root (uses the API's encoding plan):
+#   python -m api.comparables listings.parquet models/comparables --id-column listing_id
+import argparse
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from .encoding import EncodingPlan, NUMERIC
+
+INDEX_FILE = "index.json"
+POINTS_FILE = "points.npy"
+LISTINGS_FILE = "listings.npy"
+PRICES_FILE = "prices.npy"
+IDS_FILE = "ids.npy"
+
+# A comparable has the same values in these columns
+PARTITION_COLUMNS = ["province", "type"]
+
+# and is near in these ones (standardized, then weighted)
+NEIGHBOUR_COLUMNS = ["living_area (m²)", "number_of_bedrooms", "state_of_building"]
+
+LEAF_SIZE = 40
+
+
+class ComparablesIndex:
+    def __init__(self, meta: dict, trees: dict, listings: np.ndarray, prices=None, ids=None):
+        self.meta = meta
+        self.plan = EncodingPlan.from_dict(meta["plan"])
+        self.trees = trees            # partition key → KDTree over its rows
+        self.listings = listings      # encoded rows (raw numerics), sorted by partition
+        self.prices = prices
+        self.ids = ids
+        self.partitions = {p["key"]: p["start"] for p in meta["partitions"]}
+        self.partition_index = [self.plan.feature_index(col) for col in meta["partition_columns"]]
+        self.neighbour_index = [self.plan.feature_index(col) for col in meta["neighbour_columns"]]
+        self.center = np.asarray(meta["center"], dtype=np.float64)
+        self.scale = np.asarray(meta["scale"], dtype=np.float64)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        mmap_mode = "r" if mmap else None
+        with open(os.path.join(path, INDEX_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        points = np.load(os.path.join(path, POINTS_FILE), mmap_mode=mmap_mode)
+        trees = build_trees(points, meta["partitions"])
+        listings = np.load(os.path.join(path, LISTINGS_FILE), mmap_mode=mmap_mode)
+        prices = ids = None
+        if meta["has_prices"]:
+            prices = np.load(os.path.join(path, PRICES_FILE), mmap_mode=mmap_mode)
+        if meta["has_ids"]:
+            ids = np.load(os.path.join(path, IDS_FILE), mmap_mode=mmap_mode)
+        return cls(meta, trees, listings, prices, ids)
+
+    def query(self, row: dict, k: int = 5) -> list:
+        """
+        The k listings nearest to a model row, nearest first, as
+        (model row, price, id, distance) tuples. Empty when no listing
+        shares the row's partition.
+        """
+        X = self.plan.encode_row(row)[0]
+        key = partition_key(X[self.partition_index])
+        tree = self.trees.get(key)
+        if tree is None:
+            return []
+
+        point = (X[self.neighbour_index] - self.center) / self.scale
+        distances, local = tree.query(point.reshape(1, -1), k=min(k, self.meta["partition_sizes"][key]))
+        start = self.partitions[key]
+
+        results = []
+        for distance, i in zip(distances[0], local[0] + start):
+            results.append((
+                self.plan.decode_row(self.listings[i]),
+                None if self.prices is None else float(self.prices[i]),
+                None if self.ids is None else self.ids[i].item(),
+                float(distance),
+            ))
+        return results
+
+
+def partition_key(codes) -> str:
+    return "|".join(str(int(code)) for code in codes)
+
+
+def build_trees(points: np.ndarray, partitions: list) -> dict:
+    """
+    One KD-tree per partition over its slice of the sorted points (the
+    tree keeps a view of a float64 slice: no copy of a memory-mapped file).
+    """
+    from sklearn.neighbors import KDTree
+
+    return {p["key"]: KDTree(points[p["start"]:p["stop"]], leaf_size=LEAF_SIZE) for p in partitions}
+
+
+# ----------------------------------------
+# BUILD
+# ----------------------------------------
+def build_index(frame: pd.DataFrame, path: str, plan, price_column: str = "price",
+                id_column: str = None, weights: dict = None) -> dict:
+    """
+    Encodes the listings (model column names) with the plan, partitions
+    them and writes their standardized points, sorted by partition.
+    """
+    start_time = time.perf_counter()
+    os.makedirs(path, exist_ok=True)
+
+    X = plan.encode_columns(frame)
+    partition_codes = X[:, [plan.feature_index(col) for col in PARTITION_COLUMNS]]
+    features = X[:, [plan.feature_index(col) for col in NEIGHBOUR_COLUMNS]].astype(np.float64)
+
+    # Standardize, then weight: distance in "standard deviations"
+    weights = weights or {}
+    center = features.mean(axis=0)
+    scale = features.std(axis=0)
+    scale[scale == 0] = 1.0
+    scale /= np.array([weights.get(col, 1.0) for col in NEIGHBOUR_COLUMNS])
+    points = (features - center) / scale
+
+    # Listings are returned as given: raw float64 numerics (NaN when
+    # missing, not imputed) next to the category codes
+    listings = X.astype(np.float64)
+    for j, (kind, source, _) in enumerate(plan.steps):
+        if kind == NUMERIC:
+            listings[:, j] = frame[source].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    # Sort by partition so that each partition is one contiguous slice
+    order = np.lexsort(partition_codes.T[::-1])
+    partition_codes, points, listings = partition_codes[order], points[order], listings[order]
+    boundaries = np.flatnonzero(np.any(np.diff(partition_codes, axis=0) != 0, axis=1)) + 1
+    starts = np.concatenate([[0], boundaries]).astype(int)
+    stops = np.concatenate([boundaries, [len(points)]]).astype(int)
+
+    partitions, sizes = [], {}
+    for start, stop in zip(starts, stops):
+        key = partition_key(partition_codes[start])
+        partitions.append({"key": key, "start": int(start), "stop": int(stop)})
+        sizes[key] = int(stop - start)
+
+    np.save(os.path.join(path, POINTS_FILE), np.ascontiguousarray(points))
+    np.save(os.path.join(path, LISTINGS_FILE), listings)
+    has_prices = price_column in frame
+    if has_prices:
+        np.save(os.path.join(path, PRICES_FILE), frame[price_column].to_numpy(dtype=np.float64)[order])
+    has_ids = bool(id_column) and id_column in frame
+    if has_ids:
+        ids = frame[id_column].to_numpy()[order]
+        np.save(os.path.join(path, IDS_FILE), ids.astype(str) if ids.dtype == object else ids)
+
+    meta = {
+        "n_listings": len(frame),
+        "plan": plan.to_dict(),
+        "partition_columns": PARTITION_COLUMNS,
+        "neighbour_columns": NEIGHBOUR_COLUMNS,
+        "center": center.tolist(),
+        "scale": scale.tolist(),
+        "partitions": partitions,
+        "partition_sizes": sizes,
+        "has_prices": has_prices,
+        "has_ids": has_ids,
+        "build_seconds": time.perf_counter() - start_time,
+    }
+    with open(os.path.join(path, INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return meta
+
+
+if __name__ == "__main__":
+    from . import predict
+    from .bulk_score import API_COLUMNS, to_model_columns
+
+    parser = argparse.ArgumentParser(description="Build the comparable-properties index")
+    parser.add_argument("input", help="listings (.csv or .parquet), API or model column names")
+    parser.add_argument("path", help="output folder")
+    parser.add_argument("--price-column", default="price")
+    parser.add_argument("--id-column", default=None)
+    parser.add_argument("--weights", type=json.loads, default=None,
+                        help='per-column distance weights, e.g. \'{"living_area (m²)": 2}\'')
+    args = parser.parse_args()
+
+    frame = pd.read_parquet(args.input) if args.input.endswith(".parquet") else pd.read_csv(args.input)
+    meta = build_index(to_model_columns(frame, API_COLUMNS), args.path, predict.plan,
+                       args.price_column, args.id_column, args.weights)
+    print(f"{meta['n_listings']} listings in {len(meta['partitions'])} partitions, "
+          f"built in {meta['build_seconds']:.1f} s → {args.path}")
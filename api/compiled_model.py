@@ -0,0 +1,191 @@
+# ---------------------------------------------------------
+# COMPILED TREE ENSEMBLE
+# ---------------------------------------------------------
+# Exports the fitted XGBoost booster into flat node arrays
+# (feature index, threshold, left/right child, leaf value)
+# and scores whole batches with a pure-NumPy traversal, one
+# tree level at a time. Loading it needs neither pickle,
+# sklearn nor xgboost.
+#
+# Export from the project root:
+#   python -m api.compiled_model models/xgb_pipeline.pkl models/xgb_compiled.npz
+import json
+import sys
+import numpy as np
+
+from .encoding import EncodingPlan
+
+# Rows traversed together (bounds the rows × trees index matrix)
+ROWS_PER_BLOCK = 2048
+
+ARRAY_NAMES = ["feature", "threshold", "left", "right", "default_left", "value", "roots"]
+
+
+class CompiledEnsemble:
+    def __init__(self, feature, threshold, left, right, default_left, value,
+                 roots, depth, base_score, log_target, plan):
+        self.feature = feature            # int32, split feature per node
+        self.threshold = threshold        # float32, go left when x < threshold
+        self.left = left                  # int32, leaves point to themselves
+        self.right = right                # int32
+        self.default_left = default_left  # bool, branch taken for missing values
+        self.value = value                # float32, leaf value (0 on split nodes)
+        self.roots = roots                # int32, root node of every tree
+        self.depth = int(depth)           # deepest leaf over all trees
+        self.base_score = float(base_score)
+        self.log_target = bool(log_target)
+        self.plan = plan
+
+    @classmethod
+    def from_booster_json(cls, model_json: dict, log_target: bool, plan: EncodingPlan):
+        """
+        Builds the flat arrays from a booster saved with save_raw("json").
+        """
+        learner = model_json["learner"]
+        if learner["gradient_booster"]["name"] != "gbtree":
+            raise ValueError("Only gbtree boosters can be compiled")
+
+        base_score = learner["learner_model_param"]["base_score"].strip("[]")
+        trees = learner["gradient_booster"]["model"]["trees"]
+
+        feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+        depth = 0
+        offset = 0
+
+        for tree in trees:
+            lefts = tree["left_children"]
+            rights = tree["right_children"]
+            conditions = tree["split_conditions"]
+            n_nodes = len(lefts)
+            roots.append(offset)
+
+            node_depth = [0] * n_nodes
+            for node in range(n_nodes):
+                is_leaf = lefts[node] == -1
+                if is_leaf:
+                    feature.append(0)
+                    threshold.append(0.0)
+                    left.append(offset + node)
+                    right.append(offset + node)
+                    value.append(conditions[node])   # leaves store their value here
+                    depth = max(depth, node_depth[node])
+                else:
+                    feature.append(tree["split_indices"][node])
+                    threshold.append(conditions[node])
+                    left.append(offset + lefts[node])
+                    right.append(offset + rights[node])
+                    value.append(0.0)
+                    node_depth[lefts[node]] = node_depth[node] + 1
+                    node_depth[rights[node]] = node_depth[node] + 1
+                default_left.append(bool(tree["default_left"][node]))
+            offset += n_nodes
+
+        return cls(
+            feature=np.array(feature, dtype=np.int32),
+            threshold=np.array(threshold, dtype=np.float32),
+            left=np.array(left, dtype=np.int32),
+            right=np.array(right, dtype=np.int32),
+            default_left=np.array(default_left, dtype=bool),
+            value=np.array(value, dtype=np.float32),
+            roots=np.array(roots, dtype=np.int32),
+            depth=depth,
+            base_score=float(base_score),
+            log_target=log_target,
+            plan=plan,
+        )
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """
+        Compiles a fitted FullXGBPipeline (booster + encoding plan).
+        """
+        model_json = json.loads(pipeline.model.get_booster().save_raw("json"))
+        return cls.from_booster_json(model_json, pipeline.log_target,
+                                     EncodingPlan.from_pipeline(pipeline))
+
+    def margin(self, X_enc: np.ndarray) -> np.ndarray:
+        """
+        Raw model output (before expm1) for an encoded float32 matrix.
+        """
+        X_enc = np.asarray(X_enc, dtype=np.float32)
+        out = np.empty(len(X_enc), dtype=np.float32)
+
+        for start in range(0, len(X_enc), ROWS_PER_BLOCK):
+            X = X_enc[start:start + ROWS_PER_BLOCK]
+            rows = np.arange(len(X))[:, None]
+
+            # Every row starts at every root and moves down one level per step;
+            # leaves point to themselves so finished trees stay put
+            nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+            for _ in range(self.depth):
+                x = X[rows, self.feature[nodes]]
+                go_left = np.where(np.isnan(x), self.default_left[nodes],
+                                   x < self.threshold[nodes])
+                nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+            # Add the trees one by one in float32 on top of base_score,
+            # the same order and precision XGBoost uses (bit-identical)
+            margin = np.full(len(X), self.base_score, dtype=np.float32)
+            for tree_leaves in self.value[nodes.T]:
+                margin += tree_leaves
+            out[start:start + len(X)] = margin
+        return out
+
+    def predict_encoded(self, X_enc: np.ndarray) -> np.ndarray:
+        # Same contract as FullXGBPipeline.predict_encoded
+        y_pred = self.margin(X_enc)
+        if self.log_target:
+            return np.expm1(y_pred)  # inverse log1p
+        else:
+            return y_pred
+
+    def arrays(self) -> dict:
+        """
+        Node arrays by name (see `from_arrays`).
+        """
+        return {
+            "feature": self.feature, "threshold": self.threshold,
+            "left": self.left, "right": self.right,
+            "default_left": self.default_left, "value": self.value, "roots": self.roots,
+        }
+
+    def meta(self) -> dict:
+        return {
+            "depth": self.depth,
+            "base_score": self.base_score,
+            "log_target": self.log_target,
+            "plan": self.plan.to_dict(),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, meta: dict):
+        return cls(
+            **{name: arrays[name] for name in ARRAY_NAMES},
+            depth=meta["depth"], base_score=meta["base_score"],
+            log_target=meta["log_target"], plan=EncodingPlan.from_dict(meta["plan"]),
+        )
+
+    def save(self, path: str):
+        np.savez(path, meta=np.array(json.dumps(self.meta())), **self.arrays())
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            return cls.from_arrays(data, json.loads(str(data["meta"])))
+
+
+if __name__ == "__main__":
+    import os
+    import pickle
+
+    # The pickle needs utils.FullXGBPipeline from the Streamlit folder
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "streamlit"))
+
+    pickle_path, out_path = sys.argv[1], sys.argv[2]
+    with open(pickle_path, "rb") as f:
+        pipeline = pickle.load(f)
+
+    compiled = CompiledEnsemble.from_pipeline(pipeline)
+    compiled.save(out_path)
+    print(f"Compiled {len(compiled.roots)} trees ({len(compiled.value)} nodes, "
+          f"depth {compiled.depth}) → {out_path}")
@@ -0,0 +1,187 @@
+# ---------------------------------------------------------
+# COMPILED ENCODING PLAN
+# ---------------------------------------------------------
+# FullXGBPipeline.transform goes through a dozen pandas steps
+# (copy, select_dtypes, imputer, ordinal encoder, label maps,
+# drop, reindex) to encode 14 values. The plan below is built
+# once from the fitted pipeline and writes the same values
+# straight into a float32 NumPy matrix in `feature_cols` order.
+import numpy as np
+
+NUMERIC = 0   # imputed with the training mean when missing
+ORDINAL = 1   # 'state_of_building', missing → 'unknown', unknown → error
+LABEL = 2     # 'type', 'subtype', 'province', unknown → -1
+
+
+def _is_missing(value) -> bool:
+    return value is None or value != value   # NaN is not equal to itself
+
+
+class EncodingPlan:
+    def __init__(self, steps: list, feature_cols: list):
+        # One (kind, source column, parameter) step per output feature
+        self.steps = steps
+        self.feature_cols = list(feature_cols)
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """
+        Compiles the plan from a fitted FullXGBPipeline: imputer means,
+        state_of_building categories, label mappings and feature order.
+        """
+        means = dict(zip(pipeline.num_imputer.feature_names_in_,
+                         pipeline.num_imputer.statistics_))
+        state_mapping = {str(cat): idx for idx, cat
+                         in enumerate(pipeline.state_encoder.categories_[0])}
+
+        steps = []
+        for col in pipeline.feature_cols:
+            if col == "state_of_building_oe":
+                steps.append((ORDINAL, "state_of_building", state_mapping))
+            elif col.endswith("_le") and col[:-3] in pipeline.label_encoders:
+                steps.append((LABEL, col[:-3], pipeline.label_encoders[col[:-3]]))
+            else:
+                steps.append((NUMERIC, col, float(means[col])))
+        return cls(steps, pipeline.feature_cols)
+
+    def to_dict(self) -> dict:
+        """
+        JSON-serialisable form, so the plan can ship without the pickle.
+        """
+        return {
+            "feature_cols": self.feature_cols,
+            "steps": [[kind, source, {str(k): v for k, v in param.items()}
+                       if isinstance(param, dict) else param]
+                      for kind, source, param in self.steps],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls([tuple(step) for step in data["steps"]], data["feature_cols"])
+
+    def feature_index(self, source: str) -> int:
+        """
+        Position in `feature_cols` of the feature built from `source`.
+        """
+        for j, (_, step_source, _) in enumerate(self.steps):
+            if step_source == source:
+                return j
+        raise KeyError(source)
+
+    def encode_value(self, source: str, value) -> float:
+        """
+        Encoded value of one raw column value (as in `encode_row`).
+        """
+        kind, _, param = self.steps[self.feature_index(source)]
+        if kind == NUMERIC:
+            return param if _is_missing(value) else float(value)
+        elif kind == ORDINAL:
+            return float(self._state_code(param, value))
+        else:
+            return float(param.get(str(value), -1))
+
+    def categories(self, source: str) -> list:
+        """
+        Categories the pipeline was fitted on for a categorical column.
+        """
+        kind, _, param = self.steps[self.feature_index(source)]
+        if kind == NUMERIC:
+            raise ValueError(f"{source} is not categorical")
+        return [cat for cat in param if cat != "unknown"]
+
+    def encode_row(self, row: dict, out: np.ndarray = None) -> np.ndarray:
+        """
+        Encodes one model row (raw column names) into a (1, n_features)
+        float32 matrix. Pass `out` to reuse a preallocated buffer.
+        """
+        if out is None:
+            out = np.empty((1, len(self.steps)), dtype=np.float32)
+
+        values = out[0]
+        for j, (kind, source, param) in enumerate(self.steps):
+            value = row.get(source)
+            if kind == NUMERIC:
+                values[j] = param if _is_missing(value) else value
+            elif kind == ORDINAL:
+                values[j] = self._state_code(param, value)
+            else:
+                values[j] = param.get(str(value), -1)
+        return out
+
+    def encode_rows(self, rows: list) -> np.ndarray:
+        """
+        Encodes a list of model rows into an (n_rows, n_features) float32
+        matrix, one column at a time.
+        """
+        out = np.empty((len(rows), len(self.steps)), dtype=np.float32)
+
+        for j, (kind, source, param) in enumerate(self.steps):
+            column = [row.get(source) for row in rows]
+            if kind == NUMERIC:
+                values = np.array(column, dtype=np.float64)
+                values[np.isnan(values)] = param
+                out[:, j] = values
+            elif kind == ORDINAL:
+                out[:, j] = [self._state_code(param, value) for value in column]
+            else:
+                out[:, j] = [param.get(str(value), -1) for value in column]
+        return out
+
+    def encode_columns(self, columns) -> np.ndarray:
+        """
+        Encodes column arrays (a DataFrame or a dict of arrays keyed by
+        model column) into an (n_rows, n_features) float32 matrix.
+        Categorical columns are mapped once per distinct value.
+        """
+        n_rows = len(columns[self.steps[0][1]])
+        out = np.empty((n_rows, len(self.steps)), dtype=np.float32)
+
+        for j, (kind, source, param) in enumerate(self.steps):
+            if kind == NUMERIC:
+                values = np.asarray(columns[source], dtype=np.float64)
+                out[:, j] = np.where(np.isnan(values), param, values)
+                continue
+
+            # Same string form as `astype(str)` in FullXGBPipeline.transform
+            uniques, inverse = np.unique(np.asarray(columns[source], dtype=object).astype(str),
+                                         return_inverse=True)
+            out[:, j] = self.category_codes(source, uniques)[inverse.ravel()]
+        return out
+
+    def category_codes(self, source: str, values) -> np.ndarray:
+        """
+        float32 codes of the distinct values of a categorical column (e.g.
+        the dictionary of an Arrow column); "None" and "nan" are missing.
+        """
+        kind, _, param = self.steps[self.feature_index(source)]
+        if kind == ORDINAL:
+            codes = [self._state_code(param, None if v is None or v in ("None", "nan") else v)
+                     for v in values]
+        else:
+            codes = [param.get(str(v), -1) for v in values]
+        return np.asarray(codes, dtype=np.float32)
+
+    def decode_row(self, values) -> dict:
+        """
+        Model row of one encoded row (the inverse of `encode_row`):
+        categories come back from their codes, NaN numerics and
+        unknown / -1 codes as None.
+        """
+        row = {}
+        for (kind, source, param), value in zip(self.steps, values):
+            if kind == NUMERIC:
+                row[source] = None if value != value else float(value)
+            else:
+                category = next((cat for cat, code in param.items() if code == value), None)
+                row[source] = None if category == "unknown" else category
+        return row
+
+    @staticmethod
+    def _state_code(mapping: dict, value) -> int:
+        if _is_missing(value):
+            value = "unknown"
+        try:
+            return mapping[value]
+        except KeyError:
+            # Same behaviour as the fitted OrdinalEncoder
+            raise ValueError(f"Found unknown state_of_building: {value!r}")
@@ -0,0 +1,161 @@
+# ---------------------------------------------------------
+# DEDICATED MODEL EXECUTOR
+# ---------------------------------------------------------
+# Model calls used to run in Starlette's shared threadpool, next
+# to every other sync endpoint, so a burst of predictions could
+# starve the health check. They now run in their own executor:
+#
+#   "thread"  → ThreadPoolExecutor (XGBoost releases the GIL)
+#   "process" → ProcessPoolExecutor (spawn), each process loads
+#               the model itself; nothing is shared but the pages
+#               of memory-mapped artifacts
+#
+# A model hot-swap (see api.py) replaces the process pool: new processes
+# load the new version, calls already sent finish in the old ones. The
+# old pool can be kept (`retire=False`) until the micro-batcher has
+# scored the rows queued for the old version, then retired.
+#
+# Every call has a deadline. A call still queued when its deadline
+# passes (or its request is cancelled) is removed from the queue, so
+# abandoned requests cost no model time. Beyond `max_pending` queued
+# calls, new ones are refused at once (the API answers 503).
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .batching import Overloaded
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when a model call misses its deadline (the API answers 504).
+    """
+
+
+def _init_process(nthread: str, env: dict):
+    # Same thread budget as the parent; the pool provides the parallelism
+    os.environ["PREDICT_NTHREAD"] = nthread
+    os.environ["OMP_NUM_THREADS"] = nthread
+    os.environ.update(env)
+
+    # Load the model now rather than in the first request
+    from . import predict  # noqa: F401
+
+
+class ModelExecutor:
+    def __init__(self, kind: str = "thread", workers: int = 1, max_pending: int = 1000):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown MODEL_EXECUTOR: {kind!r}")
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self.env = {}           # extra environment of the processes (e.g. MODEL_VERSION)
+        self.pool = None
+        self.pending = 0        # calls submitted and not finished (event loop only)
+        self.completed = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    def start(self):
+        if self.pool is None:
+            self.pool = self._new_pool()
+
+    def _new_pool(self):
+        if self.kind == "thread":
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="model")
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_process, initargs=(os.getenv("PREDICT_NTHREAD", "1"), dict(self.env)),
+        )
+
+    async def _wait_loaded(self, pool):
+        # One call per process: returns once every process has loaded the model
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(pool, os.getpid) for _ in range(self.workers)))
+
+    async def warm_up(self):
+        """
+        Starts the pool and, in "process" mode, waits until every process
+        has loaded the model.
+        """
+        self.start()
+        if self.kind == "process":
+            await self._wait_loaded(self.pool)
+
+    async def replace(self, env: dict, retire: bool = True):
+        """
+        "process" mode: starts a pool whose processes load with `env`
+        added to their environment, waits until they are ready and swaps
+        it in. Returns the old pool, retired unless `retire` is False.
+        Threads share the API process's model: nothing to do (None).
+        """
+        if self.kind == "thread":
+            return None
+        self.env = dict(env)
+        pool = self._new_pool()
+        await self._wait_loaded(pool)
+        old, self.pool = self.pool, pool
+        if retire:
+            self.retire(old)
+        return old
+
+    def retire(self, pool):
+        # Calls already sent finish, then the processes exit
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def stop(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    async def run(self, fn, *args, timeout: float = None):
+        """
+        Runs fn(*args) in the pool and waits at most `timeout` seconds.
+        In "process" mode fn and args must be picklable.
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise Overloaded(f"More than {self.max_pending} model calls waiting")
+        if self.pool is None:
+            self.start()
+
+        self.pending += 1
+        try:
+            # Cancelling the awaited future (deadline or cancelled request)
+            # also cancels the pool's future if it has not started yet
+            future = asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+            result = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise DeadlineExceeded(f"No result within {timeout:.3g} s")
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+        }
+
+
+def executor_from_env() -> ModelExecutor:
+    """
+    MODEL_EXECUTOR ("thread" or "process"), MODEL_EXECUTOR_WORKERS
+    (default: CPU cores ÷ PREDICT_NTHREAD) and MODEL_EXECUTOR_MAX_PENDING.
+    """
+    nthread = int(os.getenv("PREDICT_NTHREAD", "1"))
+    default_workers = max(1, (os.cpu_count() or 1) // nthread)
+    return ModelExecutor(
+        kind=os.getenv("MODEL_EXECUTOR", "thread"),
+        workers=int(os.getenv("MODEL_EXECUTOR_WORKERS", default_workers)),
+        max_pending=int(os.getenv("MODEL_EXECUTOR_MAX_PENDING", "1000")),
+    )
@@ -0,0 +1,95 @@
+# ---------------------------------------------------------
+# SHARED FEATURE SPEC
+# ---------------------------------------------------------
+# The 14 input fields, their allowed values and bounds, defined once
+# and used by the API schema (api.py), the Streamlit form (app.py)
+# and the pipeline's encoders (FullXGBPipeline in utils.py).
+# Standard library only, so every side can import it.
+from typing import NamedTuple
+
+PROPERTY_TYPES = ["Apartment", "House"]
+
+PROPERTY_SUBTYPES = [
+    "Apartment", "Residence", "Villa", "Ground floor", "Penthouse",
+    "Duplex", "Mixed building", "Studio", "Chalet", "Bungalow",
+    "Cottage", "Loft", "Triplex", "Mansion", "Masterhouse"
+]
+
+PROVINCES = [
+    "Brussels", "Antwerp", "West-Flanders", "East-Flanders",
+    "Flemish-Brabant", "Limburg", "Liège", "Brabant-Wallon",
+    "Hainaut", "Luxembourg", "Namur"
+]
+
+# From worst to best: the order of the ordinal encoding
+STATE_OF_BUILDING = [
+    "To demolish", "Under construction", "To restore", "To renovate",
+    "To be renovated", "Normal", "Fully renovated", "Excellent", "New"
+]
+
+YES_NO = ["Yes", "No"]
+
+# Categories of the ordinal encoder ('unknown' = missing state)
+STATE_ORDER = ["unknown"] + STATE_OF_BUILDING
+
+# Label-encoded columns and their codes' order
+LABEL_CATEGORIES = {
+    "type": PROPERTY_TYPES,
+    "subtype": PROPERTY_SUBTYPES,
+    "province": PROVINCES,
+}
+
+
+class Feature(NamedTuple):
+    name: str               # API field
+    column: str             # model column
+    kind: str               # "category", "flag" (Yes/No → 1/0), "int" or "float"
+    choices: tuple = ()     # allowed values of a category
+    minimum: float = None
+    maximum: float = None
+    description: str = None  # field description of the API schema
+
+
+# In the order of the form (and of the API schema)
+FEATURES = [
+    Feature("type", "type", "category", tuple(PROPERTY_TYPES), description="Property type"),
+    Feature("subtype", "subtype", "category", tuple(PROPERTY_SUBTYPES), description="Property subtype"),
+    Feature("province", "province", "category", tuple(PROVINCES), description="Province"),
+    Feature("state_of_building", "state_of_building", "category", tuple(STATE_OF_BUILDING),
+            description="State of the building"),
+    Feature("living_area", "living_area (m²)", "float", minimum=18, maximum=2670,
+            description="Living area (m²)"),
+    Feature("number_of_bedrooms", "number_of_bedrooms", "int", minimum=1, maximum=50,
+            description="Number of bedrooms"),
+    Feature("has_equiped_kitchen", "equiped_kitchen (yes:1, no:0)", "flag", description="Equipped kitchen"),
+    Feature("is_furnished", "furnished (yes:1, no:0)", "flag", description="Furnished"),
+    Feature("has_open_fire", "open_fire (yes:1, no:0)", "flag", description="Open fire"),
+    Feature("has_terrace", "terrace (yes:1, no:0)", "flag", description="Terrace"),
+    Feature("terrace_area", "terrace_area (m²)", "float", minimum=0, maximum=150,
+            description="Terrace area (m²)"),
+    Feature("has_garden", "garden (yes:1, no:0)", "flag", description="Garden"),
+    Feature("number_facades", "number_facades", "int", minimum=1, maximum=4,
+            description="Number of facades"),
+    Feature("has_swimming_pool", "swimming_pool (yes:1, no:0)", "flag", description="Swimming pool"),
+]
+
+FEATURES_BY_NAME = {feature.name: feature for feature in FEATURES}
+
+
+def flag_value(value) -> int:
+    """
+    1/0 of a Yes/No flag given as a bool, "Yes"/"No" or 1/0.
+    """
+    return 1 if value is True or value == "Yes" or value == 1 else 0
+
+
+def category_codes(column: str, values) -> dict:
+    """
+    Label mapping of a categorical column: the spec's categories first,
+    then any other value seen in `values` (as str, in order of first
+    appearance), so the codes no longer depend on the training data order.
+    """
+    codes = {cat: idx for idx, cat in enumerate(LABEL_CATEGORIES[column])}
+    for value in values:
+        codes.setdefault(str(value), len(codes))
+    return codes
@@ -0,0 +1,45 @@
+# ---------------------------------------------------------
+# GUNICORN CONFIG: MULTI-WORKER SERVING
+# ---------------------------------------------------------
+# gunicorn -c api/gunicorn.conf.py api.api:app
+#
+# The app (and so the model) is loaded once in the master and the
+# workers are forked from it, sharing the model pages copy-on-write.
+# With the artifact bundle in "compiled" mode the node arrays are
+# memory-mapped, so they stay shared whatever the workers do.
+#
+# Worker count and XGBoost threads are sized together:
+#   WEB_CONCURRENCY × PREDICT_NTHREAD ≤ CPU cores
+import gc
+import os
+
+cores = os.cpu_count() or 1
+
+# Threads per predict call in each worker (see api/predict.py)
+nthread = int(os.getenv("PREDICT_NTHREAD", "1"))
+workers = int(os.getenv("WEB_CONCURRENCY", max(1, cores // nthread)))
+
+# Never oversubscribe: shrink the per-worker thread budget if needed
+nthread = max(1, min(nthread, cores // workers))
+os.environ["PREDICT_NTHREAD"] = str(nthread)
+os.environ["OMP_NUM_THREADS"] = str(nthread)
+
+# Model executor of each worker (see api/executor.py): the cores left
+# per worker, divided by the threads of one predict call
+os.environ.setdefault("MODEL_EXECUTOR_WORKERS", str(max(1, cores // (workers * nthread))))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 60
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far out of the garbage collector's reach,
+    # so collections in the workers do not touch (and copy) shared pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    server.log.info(f"worker {worker.pid}: {server.cfg.workers} workers × "
+                    f"{os.environ['MODEL_EXECUTOR_WORKERS']} executor slots × {nthread} model threads")
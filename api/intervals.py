@@ -0,0 +1,110 @@
+# ---------------------------------------------------------
+# CONFORMAL PRICE INTERVALS
+# ---------------------------------------------------------
+# Split-conformal intervals calibrated on rows the model was not
+# trained on. Residuals log1p(price) - log1p(prediction) are grouped
+# into equal-frequency bins of the predicted price, and every bin
+# keeps the residual quantiles that cover `coverage` of its rows.
+# The interval therefore depends on the point prediction only:
+# it is two array lookups after the model call, works in every
+# INFERENCE_MODE and for cached / lookup-table answers, and costs
+# no extra trees (quantile heads would triple them).
+import bisect
+import math
+import numpy as np
+
+
+class ConformalIntervals:
+    def __init__(self, edges: list, lower: list, upper: list, coverage: float, n_calibration: int):
+        self.edges = list(edges)        # inner bin edges on log1p(prediction)
+        self.lower = list(lower)        # per-bin residual quantile (log space)
+        self.upper = list(upper)
+        self.coverage = coverage
+        self.n_calibration = n_calibration
+        self._edges = np.asarray(self.edges, dtype=np.float64)
+        self._lower = np.asarray(self.lower, dtype=np.float64)
+        self._upper = np.asarray(self.upper, dtype=np.float64)
+
+    @classmethod
+    def fit(cls, y_true, y_pred, coverage: float = 0.8, n_bins: int = 10, min_bin_size: int = 100):
+        """
+        Calibrates on held-out prices and the model's predictions for
+        them. Bins are merged until each has min_bin_size rows.
+        """
+        if not 0 < coverage < 1:
+            raise ValueError("coverage must be between 0 and 1")
+        log_pred = np.log1p(np.asarray(y_pred, dtype=np.float64))
+        residuals = np.log1p(np.asarray(y_true, dtype=np.float64)) - log_pred
+        n = len(residuals)
+        if n == 0:
+            raise ValueError("No calibration rows")
+        n_bins = max(1, min(n_bins, n // max(min_bin_size, 1)))
+
+        # Tied predictions give repeated quantiles: keep distinct edges only
+        edges = np.unique(np.quantile(log_pred, np.linspace(0, 1, n_bins + 1)[1:-1])).tolist()
+        edges = cls._merge_small_bins(edges, log_pred, max(min_bin_size, 1))
+        n_bins = len(edges) + 1
+        bins = np.searchsorted(edges, log_pred, side="right")
+
+        # Each tail gets half the miss rate, with the finite-sample correction
+        alpha = (1 - coverage) / 2
+        lower, upper = [], []
+        for b in range(n_bins):
+            r = np.sort(residuals[bins == b])
+            k = len(r)
+            lo = max(0, math.floor(alpha * (k + 1)) - 1)
+            hi = min(k - 1, math.ceil((1 - alpha) * (k + 1)) - 1)
+            # Widened if needed so that the interval contains the prediction
+            lower.append(min(float(r[lo]), 0.0))
+            upper.append(max(float(r[hi]), 0.0))
+        return cls(edges, lower, upper, coverage, n)
+
+    @staticmethod
+    def _merge_small_bins(edges: list, log_pred: np.ndarray, min_bin_size: int) -> list:
+        # Removes the edge between the smallest bin and its smaller
+        # neighbour until every bin has min_bin_size rows (or one is left)
+        edges = list(edges)
+        while edges:
+            counts = np.bincount(np.searchsorted(edges, log_pred, side="right"), minlength=len(edges) + 1)
+            if counts.min() >= min_bin_size:
+                break
+            b = int(np.argmin(counts))
+            if b == 0:
+                del edges[0]
+            elif b == len(edges) or counts[b - 1] <= counts[b + 1]:
+                del edges[b - 1]
+            else:
+                del edges[b]
+        return edges
+
+    def apply(self, predictions: np.ndarray) -> tuple:
+        """
+        (lower, upper) price arrays for an array of point predictions.
+        """
+        predictions = np.asarray(predictions, dtype=np.float64)
+        bins = np.searchsorted(self._edges, np.log1p(predictions), side="right")
+        # expm1(log1p(p) + r), written so that r = 0 gives back p exactly
+        scale = 1.0 + predictions
+        return predictions + scale * np.expm1(self._lower[bins]), predictions + scale * np.expm1(self._upper[bins])
+
+    def interval(self, prediction: float) -> tuple:
+        """
+        (lower, upper) for one prediction, without NumPy overhead.
+        """
+        b = bisect.bisect_right(self.edges, math.log1p(prediction))
+        scale = 1.0 + prediction
+        return prediction + scale * math.expm1(self.lower[b]), prediction + scale * math.expm1(self.upper[b])
+
+    def to_dict(self) -> dict:
+        return {
+            "method": "conformal",
+            "coverage": self.coverage,
+            "n_calibration": self.n_calibration,
+            "edges": self.edges,
+            "lower": self.lower,
+            "upper": self.upper,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data["edges"], data["lower"], data["upper"], data["coverage"], data["n_calibration"])
@@ -0,0 +1,263 @@
+# ---------------------------------------------------------
+# PRECOMPUTED PRICE LOOKUP TABLE
+# ---------------------------------------------------------
+# type × subtype × province × state_of_building × six Yes/No
+# flags × number_facades is a finite grid (760 320 cells).
+# "materialize" scores every cell on a lattice of living_area,
+# number_of_bedrooms and terrace_area and writes one memory-
+# mapped float32 table. Serving answers exactly on lattice
+# points, interpolates living_area / terrace_area in between
+# (with the error measured against the live model at build
+# time) and returns None off-grid so the model is used instead.
+#
+# Build from the project root (uses the API's model and INFERENCE_MODE):
+#   python -m api.lookup_table models/price_table --workers 8
+import argparse
+import bisect
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+
+TABLE_FILE = "table.npy"
+META_FILE = "table.json"
+
+FLAG_COLUMNS = [
+    'equiped_kitchen (yes:1, no:0)', 'furnished (yes:1, no:0)', 'open_fire (yes:1, no:0)',
+    'terrace (yes:1, no:0)', 'garden (yes:1, no:0)', 'swimming_pool (yes:1, no:0)'
+]
+
+LATTICE_COLUMNS = ['living_area (m²)', 'number_of_bedrooms', 'terrace_area (m²)']
+
+# Default lattice: 150 points per grid cell, ≈ 114 M float32 values
+# (456 MB on disk, memory-mapped by every worker)
+DEFAULT_LIVING_AREA = [18, 40, 60, 80, 100, 130, 160, 200, 300, 500]
+DEFAULT_BEDROOMS = [1, 2, 3, 4, 5]
+DEFAULT_TERRACE_AREA = [0, 20, 50]
+
+# Cells scored by one worker task
+CELLS_PER_TASK = 2000
+
+
+def grid_axes(plan) -> list:
+    """
+    Categorical axes of the grid as (model column, values), taken from
+    the categories the pipeline was fitted on.
+    """
+    return (
+        [(col, plan.categories(col)) for col in ["type", "subtype", "province", "state_of_building"]]
+        + [(col, [0, 1]) for col in FLAG_COLUMNS]
+        + [("number_facades", [1, 2, 3, 4])]
+    )
+
+
+def encode_cells(plan, axes: list, lattice: list, cells: np.ndarray) -> np.ndarray:
+    """
+    Encoded matrix for the given grid cells, with every lattice point of
+    each cell on consecutive rows.
+    """
+    points = np.array(np.meshgrid(*lattice, indexing="ij")).reshape(len(lattice), -1)
+    n_points = points.shape[1]
+    digits = np.unravel_index(cells, [len(values) for _, values in axes])
+
+    X = np.empty((len(cells) * n_points, len(plan.feature_cols)), dtype=np.float32)
+    for (col, values), digit in zip(axes, digits):
+        codes = np.array([plan.encode_value(col, value) for value in values], dtype=np.float32)
+        X[:, plan.feature_index(col)] = np.repeat(codes[digit], n_points)
+    for col, values in zip(LATTICE_COLUMNS, points):
+        X[:, plan.feature_index(col)] = np.tile(values, len(cells))
+    return X
+
+
+class LookupTable:
+    def __init__(self, table: np.ndarray, meta: dict):
+        self.table = table      # (n_cells, n_living_area, n_bedrooms, n_terrace_area)
+        self.meta = meta
+        self.model_hash = meta["model_hash"]
+        self.axes = [(col, values) for col, values in meta["axes"]]
+        self.axis_index = [{value: i for i, value in enumerate(values)} for _, values in self.axes]
+        self.strides = np.cumprod([1] + [len(v) for _, v in self.axes[::-1]])[::-1][1:].tolist()
+        self.living_area, self.bedrooms, self.terrace_area = meta["lattice"]
+        self.bedroom_index = {b: i for i, b in enumerate(self.bedrooms)}
+        self.interpolate = True
+
+    @classmethod
+    def load(cls, path: str, max_error: float = None):
+        """
+        Memory-maps a materialized table. With `max_error`, interpolation
+        is on only if the p99 relative error measured at build time is
+        within it (lattice points are always answered).
+        """
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        table = cls(np.load(os.path.join(path, TABLE_FILE), mmap_mode="r"), meta)
+        if max_error is not None:
+            table.interpolate = meta["error"]["p99_rel_error"] <= max_error
+        return table
+
+    def cell(self, row: dict):
+        """
+        Flat cell index of a model row, or None when it is off-grid.
+        """
+        index = 0
+        for (col, _), values, stride in zip(self.axes, self.axis_index, self.strides):
+            i = values.get(row.get(col))
+            if i is None:
+                return None
+            index += i * stride
+        return index
+
+    def lookup(self, row: dict):
+        """
+        Price for a model row: exact on lattice points, bilinear in
+        living_area and terrace_area between them, None off-grid.
+        """
+        index = self.cell(row)
+        b = self.bedroom_index.get(row.get("number_of_bedrooms"))
+        if index is None or b is None:
+            return None
+
+        i, wi = _bracket(self.living_area, row.get("living_area (m²)"))
+        k, wk = _bracket(self.terrace_area, row.get("terrace_area (m²)"))
+        if i is None or k is None:
+            return None
+        if (wi or wk) and not self.interpolate:
+            return None
+
+        values = self.table[index, i:i + 2, b, k:k + 2]
+        if wi == 0 and wk == 0:
+            return float(values[0, 0])
+        v = np.pad(values, ((0, 2 - values.shape[0]), (0, 2 - values.shape[1])), mode="edge")
+        return float((1 - wi) * ((1 - wk) * v[0, 0] + wk * v[0, 1])
+                     + wi * ((1 - wk) * v[1, 0] + wk * v[1, 1]))
+
+
+def _bracket(points: list, x):
+    # Lower lattice index and interpolation weight, (None, 0) outside the lattice
+    if x is None or x != x or x < points[0] or x > points[-1]:
+        return None, 0.0
+    i = bisect.bisect_right(points, x) - 1
+    if points[i] == x or i == len(points) - 1:
+        return i, 0.0
+    return i, (x - points[i]) / (points[i + 1] - points[i])
+
+
+# ----------------------------------------
+# MATERIALIZE
+# ----------------------------------------
+def _init_worker():
+    # One model thread per process: the pool provides the parallelism
+    os.environ["PREDICT_NTHREAD"] = "1"
+    os.environ["PREDICTION_CACHE_SIZE"] = "0"
+
+
+def _score_cells(path: str, lattice: list, start: int, stop: int) -> int:
+    from . import predict
+
+    axes = grid_axes(predict.plan)
+    cells = np.arange(start, stop)
+    X = encode_cells(predict.plan, axes, lattice, cells)
+
+    table = np.load(os.path.join(path, TABLE_FILE), mmap_mode="r+")
+    table[start:stop] = predict.predict_encoded(X).reshape((len(cells),) + table.shape[1:])
+    table.flush()
+    return len(cells)
+
+
+def measure_error(table: LookupTable, plan, predict_encoded, n_samples: int = 5000, seed: int = 0) -> dict:
+    """
+    Relative error of interpolated lookups against the live model on
+    random in-range points (bedrooms on the lattice).
+    """
+    rng = np.random.default_rng(seed)
+    sizes = [len(values) for _, values in table.axes]
+    cells = rng.integers(0, int(np.prod(sizes)), n_samples)
+    digits = np.unravel_index(cells, sizes)
+
+    rows = []
+    for n in range(n_samples):
+        row = {col: values[digit[n]] for (col, values), digit in zip(table.axes, digits)}
+        row["living_area (m²)"] = float(rng.uniform(table.living_area[0], table.living_area[-1]))
+        row["number_of_bedrooms"] = int(rng.choice(table.bedrooms))
+        row["terrace_area (m²)"] = float(rng.uniform(table.terrace_area[0], table.terrace_area[-1]))
+        rows.append(row)
+
+    live = predict_encoded(plan.encode_rows(rows))
+    looked_up = np.array([table.lookup(row) for row in rows])
+    rel_error = np.abs(looked_up - live) / live
+    return {
+        "n_samples": n_samples,
+        "mean_rel_error": float(rel_error.mean()),
+        "p99_rel_error": float(np.quantile(rel_error, 0.99)),
+        "max_rel_error": float(rel_error.max()),
+    }
+
+
+def materialize(path: str, living_area: list, bedrooms: list, terrace_area: list, workers: int) -> dict:
+    from . import predict
+
+    os.makedirs(path, exist_ok=True)
+    lattice = [sorted(living_area), sorted(bedrooms), sorted(terrace_area)]
+    axes = grid_axes(predict.plan)
+    n_cells = int(np.prod([len(values) for _, values in axes]))
+
+    # Allocate the file, then let every worker fill its own slice of cells
+    np.lib.format.open_memmap(os.path.join(path, TABLE_FILE), mode="w+", dtype=np.float32,
+                              shape=(n_cells,) + tuple(len(points) for points in lattice))
+
+    start_time = time.perf_counter()
+    tasks = [(start, min(start + CELLS_PER_TASK, n_cells)) for start in range(0, n_cells, CELLS_PER_TASK)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(_score_cells, path, lattice, start, stop) for start, stop in tasks]
+        for future in futures:
+            future.result()
+    build_seconds = time.perf_counter() - start_time
+
+    meta = {
+        "model_hash": predict.MODEL_HASH,
+        "axes": [[col, values] for col, values in axes],
+        "lattice": lattice,
+        "n_cells": n_cells,
+        "build_seconds": build_seconds,
+        "workers": workers,
+    }
+    table = LookupTable(np.load(os.path.join(path, TABLE_FILE), mmap_mode="r"), meta)
+    meta["error"] = measure_error(table, predict.plan, predict.predict_encoded)
+
+    with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    return meta
+
+
+def _number_list(text: str) -> list:
+    return [float(x) if "." in x else int(x) for x in text.split(",")]
+
+
+def table_bytes(n_cells: int, lattice: list) -> int:
+    return n_cells * int(np.prod([len(points) for points in lattice])) * np.dtype(np.float32).itemsize
+
+
+if __name__ == "__main__":
+    default_lattice = [DEFAULT_LIVING_AREA, DEFAULT_BEDROOMS, DEFAULT_TERRACE_AREA]
+    parser = argparse.ArgumentParser(
+        description="Materialize the price lookup table",
+        epilog=f"The table holds one float32 per grid cell (760 320 for the spec's categories) and "
+               f"lattice point: the default lattice takes {table_bytes(760_320, default_lattice) / 1e6:.0f} MB. "
+               f"Fewer living areas or bedrooms shrink it proportionally.")
+    parser.add_argument("path", help="output folder")
+    parser.add_argument("--living-area", type=_number_list, default=DEFAULT_LIVING_AREA)
+    parser.add_argument("--bedrooms", type=_number_list, default=DEFAULT_BEDROOMS)
+    parser.add_argument("--terrace-area", type=_number_list, default=DEFAULT_TERRACE_AREA)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    meta = materialize(args.path, args.living_area, args.bedrooms, args.terrace_area, args.workers)
+    error = meta["error"]
+    print(f"{meta['n_cells']} cells × {np.prod([len(p) for p in meta['lattice']])} lattice points "
+          f"({table_bytes(meta['n_cells'], meta['lattice']) / 1e6:.0f} MB) "
+          f"in {meta['build_seconds']:.1f} s with {meta['workers']} workers")
+    print(f"interpolation error vs. live model: mean {error['mean_rel_error']:.2%}, "
+          f"p99 {error['p99_rel_error']:.2%}, max {error['max_rel_error']:.2%}")
@@ -0,0 +1,238 @@
+# ---------------------------------------------------------
+# PROMETHEUS METRICS AND SAMPLING PROFILER
+# ---------------------------------------------------------
+# Latency of every stage of the prediction path (validation, encoding,
+# model call, intervals, ...), rows per model call, and request, error,
+# cache and model-version counters, exposed in the Prometheus text
+# format on GET /metrics. No client library: a histogram is a list of
+# bucket counts per label set, updated under a lock, and a stage is
+# timed with two perf_counter() calls around it.
+#
+# Metrics are per process: with several Gunicorn workers each one
+# answers /metrics with its own numbers (the `pid` label tells them
+# apart), and with MODEL_EXECUTOR=process the model stages are counted
+# in the executor processes, not in the API process. So are the hits
+# and misses of their prediction caches, which the API process then
+# leaves out (see CACHE_IN_EXECUTOR in api.py).
+#
+# METRICS=0 turns every observation into a no-op.
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as Tally
+from time import perf_counter as now  # noqa: F401  (stage timer used by the instrumented modules)
+
+enabled = os.getenv("METRICS", "1") == "1"
+
+# Seconds: 10 µs … 10 s
+LATENCY_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                   1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Rows per model call: 1 … 1M
+ROW_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+REGISTRY = []
+
+
+def label_text(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *labels, amount: float = 1):
+        if not enabled:
+            return
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            values = sorted(self.values.items())
+        for labels, value in values:
+            yield f"{self.name}{label_text(self.labelnames, labels)} {value}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.values = {}   # labels → [count per bucket (+Inf last), sum]
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *labels):
+        if not enabled:
+            return
+        i = bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.values.get(labels)
+            if counts is None:
+                counts = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[i] += 1
+            counts[-1] += value
+
+    def samples(self):
+        with self.lock:
+            values = sorted((labels, list(counts)) for labels, counts in self.values.items())
+        bounds = [repr(float(b)) for b in self.buckets] + ["+Inf"]
+        for labels, counts in values:
+            cumulative = 0
+            for bound, n in zip(bounds, counts):
+                cumulative += n
+                le = 'le="' + bound + '"'
+                yield f"{self.name}_bucket{label_text(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{label_text(self.labelnames, labels)} {counts[-1]}"
+            yield f"{self.name}_count{label_text(self.labelnames, labels)} {cumulative}"
+
+
+class Collected:
+    """
+    Values read when /metrics is scraped: `collect` returns
+    {label values: value} (e.g. the prediction cache's own counters).
+    """
+
+    def __init__(self, name: str, help: str, kind: str, labelnames: tuple, collect):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        REGISTRY.append(self)
+
+    def samples(self):
+        for labels, value in sorted(self.collect().items()):
+            yield f"{self.name}{label_text(self.labelnames, labels)} {value}"
+
+
+def render() -> str:
+    """
+    All metrics in the Prometheus text exposition format (0.0.4).
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+# ----------------------------------------
+# METRICS OF THE PREDICTION PATH
+# ----------------------------------------
+stage_seconds = Histogram(
+    "immo_stage_seconds", "Latency of one stage of the prediction path", ["stage"])
+
+batch_rows = Histogram(
+    "immo_batch_rows", "Rows per model call or per validated batch", ["stage"], ROW_BUCKETS)
+
+rows_scored = Counter(
+    "immo_rows_scored_total", "Rows scored by the model, per model version", ["model_version"])
+
+table_hits = Counter(
+    "immo_lookup_table_hits_total", "Rows answered from the precomputed price table")
+
+requests_total = Counter(
+    "immo_requests_total", "HTTP requests by route and status code", ["route", "status"])
+
+request_seconds = Histogram(
+    "immo_request_seconds", "HTTP request latency by route", ["route"])
+
+model_errors = Counter(
+    "immo_model_errors_total", "Failed model calls (overloaded, swapped, deadline, error)", ["call", "reason"])
+
+model_swaps = Counter(
+    "immo_model_swaps_total", "Model hot-swaps (swapped, failed)", ["result"])
+
+
+def observe_stage(stage: str, start: float):
+    """
+    Records the time since `start` (a `now()` value) for a stage.
+    """
+    stage_seconds.observe(now() - start, stage)
+
+
+# ----------------------------------------
+# REQUEST MIDDLEWARE
+# ----------------------------------------
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware: counts requests by route template and status
+    and records their latency (routes FastAPI did not match are "other").
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not enabled:
+            return await self.app(scope, receive, send)
+
+        start = now()
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "other")
+            request_seconds.observe(now() - start, route)
+            requests_total.inc(route, str(status))
+
+
+# ----------------------------------------
+# SAMPLING PROFILER
+# ----------------------------------------
+def profile(seconds: float, interval: float = 0.005) -> str:
+    """
+    Samples the stacks of every thread of this process for `seconds` and
+    returns them in the folded format of flame graph tools (one line per
+    distinct stack, root first, then its sample count), e.g. for
+    flamegraph.pl or speedscope.
+    """
+    me = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    stacks = Tally()
+    deadline = time.monotonic() + seconds
+
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            stacks[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
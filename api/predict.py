@@ -1,27 +1,482 @@
 import os
-import pickle
-import pandas as pd
+import numpy as np
+from .registry import ModelRegistry, ModelVersion, UnloadedVersion, load_version
+from .encoding import NUMERIC
+from .cache import cache_from_env, PredictionCache
+from .lookup_table import LookupTable
+from .features import FEATURES, flag_value
+from . import metrics
+from .metrics import now, observe_stage
 
 # PatH to model (Render-safe)
 CURRENT_DIR = os.path.dirname(__file__)
 PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
 MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "xgb_pipeline.pkl")
+COMPILED_MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "xgb_compiled.npz")
 
-# Load the model once at import time 
-with open(MODEL_PATH, "rb") as f:
-    model = pickle.load(f)
+# Versioned artifact bundle (see api/artifacts.py), used instead of the
+# pickle when the folder exists
+MODEL_BUNDLE_PATH = os.getenv("MODEL_BUNDLE_PATH", os.path.join(PROJECT_ROOT, "models", "xgb_bundle"))
+
+# How encoded rows are scored:
+#   "booster"  → native XGBoost Booster.inplace_predict (default)
+#   "pipeline" → the sklearn XGBRegressor wrapper (needs the pickle)
+#   "compiled" → NumPy tree traversal (no pickle, no xgboost)
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "booster")
+
+# Threads used by one predict call in "booster" mode
+PREDICT_NTHREAD = int(os.getenv("PREDICT_NTHREAD", "1"))
+
+if INFERENCE_MODE not in ("booster", "pipeline", "compiled"):
+    raise ValueError(f"Unknown INFERENCE_MODE: {INFERENCE_MODE!r}")
+
+
+# Optional model registry (see registry.py): when the folder exists, the
+# version named in its CURRENT file (or in MODEL_VERSION) is served and
+# can be hot-swapped; otherwise the single model of models/ is served
+MODEL_REGISTRY_PATH = os.getenv("MODEL_REGISTRY_PATH", os.path.join(PROJECT_ROOT, "models", "registry"))
+registry = ModelRegistry(MODEL_REGISTRY_PATH) if os.path.isdir(MODEL_REGISTRY_PATH) else None
+
+# Rows scored by a new version before it is swapped in
+MODEL_WARM_UP_ROWS = int(os.getenv("MODEL_WARM_UP_ROWS", "256"))
+
+
+def load_model(version: str = None) -> ModelVersion:
+    """
+    Loads a registry version (default: the current one), or the model
+    of models/ when there is no registry.
+    """
+    if registry is None:
+        if version is not None:
+            raise KeyError(f"No model registry at {MODEL_REGISTRY_PATH}")
+        return load_version(MODEL_BUNDLE_PATH, MODEL_PATH, COMPILED_MODEL_PATH, INFERENCE_MODE, PREDICT_NTHREAD)
+    return registry.load(version or registry.current(), INFERENCE_MODE, PREDICT_NTHREAD)
+
+
+# The version new requests are scored with (see activate)
+current = None
+
+
+def activate(version: ModelVersion) -> ModelVersion:
+    """
+    Makes `version` the one new requests are scored with and returns the
+    previous one. Requests already running keep the version they read.
+    """
+    global current, model, plan, intervals, MODEL_HASH, bundle
+    previous = current
+    current = version
+    # Module-level names kept for the offline tools (bulk scoring, lookup table builds)
+    model, plan, intervals = version.model, version.plan, version.intervals
+    MODEL_HASH, bundle = version.content_hash, version.bundle
+    return previous
+
+
+def active_model() -> ModelVersion:
+    return current
+
+
+def loaded_version(name: str) -> ModelVersion:
+    """
+    The version a model executor process scores a call with: calls carry
+    the version name only (see ModelVersion.__reduce__), and a process
+    holds the active version and the candidate. A call sent for another
+    version (read before a swap, sent after it) is never scored by this
+    process's model: it fails with VersionNotLoaded.
+    """
+    if name == current.name:
+        return current
+    if candidate is not None and name == candidate.name:
+        return candidate
+    return UnloadedVersion(name)
+
+
+# Load the model once at import time
+activate(load_model(os.getenv("MODEL_VERSION") or None))
+
+# Candidate model for shadow scoring and the A/B split (see shadow.py): a
+# registry version, loaded next to the active one (in executor processes too)
+CANDIDATE_MODEL_VERSION = os.getenv("CANDIDATE_MODEL_VERSION", "")
+candidate = load_model(CANDIDATE_MODEL_VERSION) if CANDIDATE_MODEL_VERSION else None
+
+# Column order the trained pipeline expects
+MODEL_ORDER = [
+    'number_of_bedrooms', 'living_area (m²)', 'equiped_kitchen (yes:1, no:0)',
+    'furnished (yes:1, no:0)', 'open_fire (yes:1, no:0)', 'terrace (yes:1, no:0)',
+    'terrace_area (m²)', 'garden (yes:1, no:0)', 'number_facades',
+    'swimming_pool (yes:1, no:0)', 'state_of_building', 'type', 'subtype', 'province'
+]
+
+# Number of rows sent to the model in one predict call
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "50000"))
+
+# LRU/TTL cache of single-row predictions, keyed on the encoded row
+prediction_cache = cache_from_env()
+
+# Per-feature contributions for /explain: "approx" (path attribution, a few
+# times the cost of a prediction) or "exact" (TreeSHAP, far slower on deep trees)
+EXPLAIN_METHODS = ("approx", "exact")
+EXPLAIN_METHOD = os.getenv("EXPLAIN_METHOD", "approx")
+if EXPLAIN_METHOD not in EXPLAIN_METHODS:
+    raise ValueError(f"Unknown EXPLAIN_METHOD: {EXPLAIN_METHOD!r}")
+
+# Single-row explanations are cached on the encoded row, one cache per method
+explanation_caches = {
+    method: PredictionCache(maxsize=int(os.getenv("EXPLANATION_CACHE_SIZE", "10000")),
+                            ttl=float(os.getenv("PREDICTION_CACHE_TTL", "3600")))
+    for method in EXPLAIN_METHODS
+}
+
+
+def retain_cached(*versions):
+    """
+    Keeps the cached predictions and explanations of `versions` only
+    (None entries skipped), e.g. the active version and the candidate
+    after a hot-swap.
+    """
+    model_hashes = [version.content_hash for version in versions if version is not None]
+    for cache in (prediction_cache, *explanation_caches.values()):
+        cache.retain(model_hashes)
+
+
+# Scrape-time metric: model version (the cache counters are registered by api.py)
+metrics.Collected("immo_model_info", "Active model (version, content hash) of this process", "gauge",
+                  ["model_version", "content_hash", "inference_mode", "pid"],
+                  lambda: {(current.name, current.content_hash[:12], INFERENCE_MODE, str(os.getpid())): 1})
+
+# Optional precomputed price table (see api/lookup_table.py). Lattice points
+# are always served from it; interpolated values only when the p99 error
+# measured at build time is within LOOKUP_TABLE_MAX_ERROR. It is only used
+# while the model version it was built from is active
+LOOKUP_TABLE_PATH = os.getenv("LOOKUP_TABLE_PATH", "")
+LOOKUP_TABLE_MAX_ERROR = float(os.getenv("LOOKUP_TABLE_MAX_ERROR", "0.02"))
+
+price_table = None
+if LOOKUP_TABLE_PATH:
+    price_table = LookupTable.load(LOOKUP_TABLE_PATH, LOOKUP_TABLE_MAX_ERROR)
+    if price_table.model_hash != MODEL_HASH:
+        raise ValueError("The lookup table was built for another model artifact")
+
+
+def to_model_row(data: dict) -> dict:
+    """
+    Maps the API field names (with Yes/No or boolean flags) to the raw
+    column names and 1/0 flags the trained pipeline was fitted on.
+    """
+    return {
+        column: flag_value(data[name]) if is_flag else data[name]
+        for name, column, is_flag in MODEL_COLUMNS
+    }
+
+
+# (API field, model column, is a flag) of every feature, in the spec's order
+MODEL_COLUMNS = [(f.name, f.column, f.kind == "flag") for f in FEATURES]
+
+# API field of every model column (to_model_row in reverse)
+API_FIELDS = {f.column: f.name for f in FEATURES}
+
+
+def to_api_row(row: dict) -> dict:
+    """
+    Maps a model row back to the API field names, with Yes/No flags.
+    """
+    def yn(x):
+        return None if x is None else ("Yes" if x == 1 else "No")
+
+    return {
+        API_FIELDS[col]: yn(value) if "(yes:1, no:0)" in col else value
+        for col, value in row.items() if col in API_FIELDS
+    }
 
 
 def make_prediction(input_data: dict):
     """
-    Takes a dictionary from the API endpoint, converts it to a DataFrame,
-    applies the model pipeline, and returns the prediction.
+    Takes a dictionary of model columns, encodes it with the compiled
+    plan, applies the model, and returns the prediction.
+    """
+
+    # Encode and predict with the loaded model (works in every INFERENCE_MODE)
+    prediction = predict_row(input_data)
+
+    return {"prediction": prediction}
+
+
+def score_encoded(X_enc: np.ndarray, version: ModelVersion) -> np.ndarray:
+    # The model call of the selected INFERENCE_MODE (with the inverse log transform)
+    if INFERENCE_MODE == "booster":
+        return version.model.predict_booster(X_enc, nthread=PREDICT_NTHREAD)
+    return version.model.predict_encoded(X_enc)
+
+
+def predict_encoded(X_enc: np.ndarray, version: ModelVersion = None) -> np.ndarray:
+    """
+    Scores a matrix encoded by the plan with the selected INFERENCE_MODE
+    and a model version (default: the active one).
+    """
+    version = version or current
+    start = now()
+    predictions = score_encoded(X_enc, version)
+    observe_stage("model", start)
+    metrics.batch_rows.observe(len(X_enc), "model")
+    metrics.rows_scored.inc(version.name, amount=len(X_enc))
+    return predictions
+
+
+def lookup_prediction(row: dict, version: ModelVersion = None) -> tuple:
+    """
+    Answers a model row from the lookup table or the prediction cache.
+    Returns (prediction, X_row, cache_key); prediction is None when the
+    encoded X_row still has to be scored by the model.
     """
+    version = version or current
+    if price_table is not None and price_table.model_hash == version.content_hash:
+        prediction = price_table.lookup(row)
+        if prediction is not None:
+            metrics.table_hits.inc()
+            return prediction, None, None
 
-    # Convert incoming JSON to DataFrame
-    df = pd.DataFrame([input_data])
+    start = now()
+    X_row = version.plan.encode_row(row)
+    observe_stage("encode", start)
+    if not prediction_cache.enabled:
+        return None, X_row, None
 
-    # Predict using the loaded pipeline
-    prediction = model.predict(df)[0]
+    start = now()
+    key = prediction_cache.key(X_row, version.content_hash)
+    prediction = prediction_cache.get(key)
+    observe_stage("cache", start)
+    return prediction, X_row, key
 
-    return {"prediction": float(prediction)}
+
+def remember_prediction(key, prediction: float):
+    if key is not None:
+        prediction_cache.set(key, prediction)
+
+
+def score_shadow(X_enc: np.ndarray, version: ModelVersion) -> np.ndarray:
+    """
+    Candidate prices of queued shadow rows (encoded by the version's
+    plan): timed as the "shadow" stage, not counted as rows served by
+    the version.
+    """
+    start = now()
+    predictions = score_encoded(X_enc, version)
+    observe_stage("shadow", start)
+    metrics.batch_rows.observe(len(X_enc), "shadow")
+    return predictions
+
+
+def interval_response(lower: float, upper: float, version: ModelVersion = None) -> dict:
+    version = version or current
+    return {"lower": float(lower), "upper": float(upper), "coverage": version.intervals.coverage}
+
+
+def price_interval(prediction: float, version: ModelVersion = None):
+    """
+    Price bounds of one prediction from the conformal intervals saved
+    with the model (see `interval_response`), or None when it has none.
+    """
+    version = version or current
+    if version.intervals is None:
+        return None
+    start = now()
+    interval = interval_response(*version.intervals.interval(prediction), version)
+    observe_stage("interval", start)
+    return interval
+
+
+def predict_row(row: dict, version: ModelVersion = None) -> float:
+    """
+    Scores one model row through the compiled encoding plan
+    (same result as `model.predict` on a one-row DataFrame).
+    Grid rows are answered from the lookup table, repeated feature rows
+    from the prediction cache.
+    """
+    version = version or current
+    prediction, X_row, key = lookup_prediction(row, version)
+    if prediction is None:
+        prediction = float(predict_encoded(X_row, version)[0])
+        remember_prediction(key, prediction)
+    return prediction
+
+
+def make_batch_prediction(rows: list, with_interval: bool = False, version: ModelVersion = None):
+    """
+    Scores a list of model rows (see `to_model_row`) with one vectorized
+    model call per chunk of BATCH_CHUNK_SIZE rows. Bulk rows bypass the
+    prediction cache so that a nightly run does not evict live traffic.
+    With `with_interval`, returns (predictions, lower, upper); the bounds
+    are None when the model has no intervals.
+    """
+    version = version or current
+    predictions = np.empty(len(rows), dtype=np.float64)
+
+    for first in range(0, len(rows), BATCH_CHUNK_SIZE):
+        chunk = rows[first:first + BATCH_CHUNK_SIZE]
+        start = now()
+        X_enc = version.plan.encode_rows(chunk)
+        observe_stage("encode_batch", start)
+        predictions[first:first + len(chunk)] = predict_encoded(X_enc, version)
+
+    return with_intervals(predictions, version) if with_interval else predictions
+
+
+def predict_matrix(X_enc: np.ndarray, with_interval: bool = False, version: ModelVersion = None):
+    """
+    `make_batch_prediction` for rows already encoded by the version's plan
+    (e.g. straight from the columns of an Arrow batch, see arrow_io.py).
+    """
+    version = version or current
+    predictions = np.empty(len(X_enc), dtype=np.float64)
+    for first in range(0, len(X_enc), BATCH_CHUNK_SIZE):
+        predictions[first:first + BATCH_CHUNK_SIZE] = predict_encoded(X_enc[first:first + BATCH_CHUNK_SIZE], version)
+
+    return with_intervals(predictions, version) if with_interval else predictions
+
+
+def with_intervals(predictions: np.ndarray, version: ModelVersion) -> tuple:
+    # (predictions, lower, upper); the bounds are None when the model has no intervals
+    if version.intervals is None:
+        return predictions, None, None
+    start = now()
+    bounds = version.intervals.apply(predictions)
+    observe_stage("interval_batch", start)
+    return (predictions,) + bounds
+
+
+def whatif_matrix(row: dict, sweeps: list, version: ModelVersion = None) -> np.ndarray:
+    """
+    The grid of a what-if sweep as one encoded matrix: the base model row
+    repeated once per grid point, with the swept columns ((model column,
+    values) pairs) set to every combination of their values – the first
+    column varies slowest – and the base row itself last.
+    """
+    version = version or current
+    plan = version.plan
+    shape = [len(values) for _, values in sweeps]
+    n_points = int(np.prod(shape))
+
+    X_enc = np.repeat(plan.encode_row(row), n_points + 1, axis=0)
+    positions = np.meshgrid(*[np.arange(n) for n in shape], indexing="ij")
+    for (column, values), position in zip(sweeps, positions):
+        j = plan.feature_index(column)
+        if plan.steps[j][0] == NUMERIC:
+            codes = np.asarray(values, dtype=np.float32)
+        else:
+            codes = plan.category_codes(column, values)
+        X_enc[:n_points, j] = codes[position.ravel()]
+    return X_enc
+
+
+def make_whatif(row: dict, sweeps: list, version: ModelVersion = None) -> tuple:
+    """
+    (predictions, lower, upper) of a what-if grid (see `whatif_matrix`),
+    scored with one model call; the last prediction is the base row's.
+    """
+    version = version or current
+    start = now()
+    X_enc = whatif_matrix(row, sweeps, version)
+    observe_stage("encode_whatif", start)
+    return predict_matrix(X_enc, True, version)
+
+
+def explain_encoded(X_enc: np.ndarray, method: str = EXPLAIN_METHOD, version: ModelVersion = None) -> tuple:
+    """
+    Predictions and (n_rows, n_features + 1) contributions of an encoded
+    matrix; the last column is the bias (base value).
+    """
+    version = version or current
+    start = now()
+    contributions = version.explainer().predict_contributions(X_enc, approx=method == "approx",
+                                                              nthread=PREDICT_NTHREAD)
+    observe_stage(f"contributions_{method}", start)
+    return predict_encoded(X_enc, version), contributions
+
+
+def explanation_response(prediction: float, contributions: np.ndarray, method: str,
+                         version: ModelVersion = None) -> dict:
+    """
+    Contributions of one row mapped back to the 14 API fields. They are in
+    log1p(price) units when the model predicts log prices: base_value plus
+    all contributions is log1p(predicted_price).
+    """
+    version = version or current
+    return {
+        "predicted_price": float(prediction),
+        "base_value": float(contributions[-1]),
+        "contributions": {API_FIELDS[source]: float(value)
+                          for (_, source, _), value in zip(version.plan.steps, contributions[:-1])},
+        "space": "log1p(price)" if version.model.log_target else "price",
+        "method": method,
+        "model_version": version.name,
+    }
+
+
+def explain_row(row: dict, method: str = EXPLAIN_METHOD, version: ModelVersion = None) -> dict:
+    """
+    Explains one model row, cached on its encoded feature vector.
+    """
+    version = version or current
+    X_row = version.plan.encode_row(row)
+    cache = explanation_caches[method]
+    key = cache.key(X_row, version.content_hash) if cache.enabled else None
+    cached = cache.get(key) if key is not None else None
+    if cached is not None:
+        return cached
+
+    predictions, contributions = explain_encoded(X_row, method, version)
+    response = explanation_response(predictions[0], contributions[0], method, version)
+    if key is not None:
+        cache.set(key, response)
+    return response
+
+
+def make_batch_explanation(rows: list, method: str = EXPLAIN_METHOD, version: ModelVersion = None) -> list:
+    """
+    Explains a list of model rows with one contributions call per chunk
+    of BATCH_CHUNK_SIZE rows (bypassing the cache, like batch predictions).
+    """
+    version = version or current
+    responses = []
+    for start in range(0, len(rows), BATCH_CHUNK_SIZE):
+        X_enc = version.plan.encode_rows(rows[start:start + BATCH_CHUNK_SIZE])
+        predictions, contributions = explain_encoded(X_enc, method, version)
+        responses.extend(explanation_response(p, c, method, version) for p, c in zip(predictions, contributions))
+    return responses
+
+
+# ----------------------------------------
+# HOT-SWAP WARM-UP
+# ----------------------------------------
+def warm_up_rows(n: int) -> list:
+    """
+    Model rows cycling through every category of the feature spec, with
+    the numbers spread over their bounds.
+    """
+    rows = []
+    for i in range(n):
+        step = i / max(n - 1, 1)
+        payload = {}
+        for f in FEATURES:
+            if f.kind == "category":
+                payload[f.name] = f.choices[i % len(f.choices)]
+            elif f.kind == "flag":
+                payload[f.name] = i % 2 == 0
+            else:
+                value = f.minimum + (f.maximum - f.minimum) * step
+                payload[f.name] = round(value) if f.kind == "int" else value
+        rows.append(to_model_row(payload))
+    return rows
+
+
+def warm_up(version: ModelVersion, n_rows: int = MODEL_WARM_UP_ROWS):
+    """
+    Scores single rows and a batch with a version before it serves, so
+    that its first requests do not pay for lazy initialisation, and
+    refuses a version whose predictions are not finite positive prices.
+    """
+    rows = warm_up_rows(n_rows)
+    for row in rows[:8]:
+        score_encoded(version.plan.encode_row(row), version)
+    predictions = score_encoded(version.plan.encode_rows(rows), version)
+    if not np.all(np.isfinite(predictions)) or np.any(predictions <= 0):
+        raise ValueError(f"Model version {version.name} gives invalid prices on the warm-up rows")
@@ -0,0 +1,250 @@
+# ---------------------------------------------------------
+# MODEL REGISTRY: VERSIONED ARTIFACTS AND LOADED VERSIONS
+# ---------------------------------------------------------
+# A registry is a local folder with one subfolder per model version:
+#
+#   models/registry/
+#       CURRENT            name of the version to serve (optional,
+#                          default: the last version in name order)
+#       2025-06-01/        an artifact bundle (manifest.json, see
+#       2025-07-14/        artifacts.py), or a folder holding
+#       ...                xgb_pipeline.pkl and/or xgb_compiled.npz
+#
+# Name versions so that they sort in release order (dates, v0001, ...).
+# A version folder is never modified once published: a retrained model
+# is a new folder, and serving it means pointing CURRENT at it (the API
+# picks it up with POST /admin/model or its file watch, see api.py).
+#
+#   python -m api.registry models/registry list
+#   python -m api.registry models/registry publish models/xgb_bundle 2025-07-14
+#   python -m api.registry models/registry set-current 2025-07-14
+import os
+import shutil
+import sys
+import hashlib
+import pickle
+import time
+
+from .artifacts import MANIFEST_FILE, load_bundle
+from .compiled_model import CompiledEnsemble
+from .encoding import EncodingPlan
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+CURRENT_FILE = "CURRENT"
+PICKLE_FILE = "xgb_pipeline.pkl"
+COMPILED_FILE = "xgb_compiled.npz"
+BUNDLE_DIR = "xgb_bundle"
+
+
+def file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def artifact_paths(folder: str) -> tuple:
+    """
+    (bundle folder, pickle, compiled ensemble) of a version folder; the
+    bundle is the folder itself when it holds a manifest.
+    """
+    bundle_path = folder if os.path.exists(os.path.join(folder, MANIFEST_FILE)) else os.path.join(folder, BUNDLE_DIR)
+    return bundle_path, os.path.join(folder, PICKLE_FILE), os.path.join(folder, COMPILED_FILE)
+
+
+class ModelVersion:
+    """
+    One loaded model with everything scored together with it: encoding
+    plan, conformal intervals and content hash (the key of the caches).
+    A request reads the active version once and uses it to the end, so
+    a swap never mixes two models in one response.
+    """
+
+    def __init__(self, name: str, model, plan, intervals, content_hash: str, bundle=None):
+        self.name = name
+        self.model = model
+        self.plan = plan
+        self.intervals = intervals
+        self.content_hash = content_hash
+        self.bundle = bundle
+        self.loaded_at = time.time()
+        self._explainer = None
+
+    def explainer(self):
+        """
+        Model that computes contributions: the loaded one, or in "compiled"
+        mode the bundle's native booster (xgboost is imported only then).
+        """
+        if self._explainer is None:
+            if hasattr(self.model, "predict_contributions"):
+                self._explainer = self.model
+            elif self.bundle is not None:
+                self._explainer = self.bundle.booster_model()
+            else:
+                raise RuntimeError("Explanations need the XGBoost booster (artifact bundle or pickle)")
+        return self._explainer
+
+    def __reduce__(self):
+        # Sent to a model executor process by name, never with the model
+        return (_loaded_version, (self.name,))
+
+    def info(self) -> dict:
+        return {
+            "version": self.name,
+            "content_hash": self.content_hash,
+            "loaded_at": self.loaded_at,
+            "has_intervals": self.intervals is not None,
+        }
+
+
+class VersionNotLoaded(Exception):
+    """
+    Raised when a call reaches a process that no longer holds its model
+    version (the API answers 503: the client retries on the new one).
+    """
+
+
+class UnloadedVersion:
+    """
+    Stands for a version name a model executor process does not hold.
+    Unpickling must not fail (the pool would break), so the error is
+    raised on first use instead.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attribute):
+        raise VersionNotLoaded(f"Model version {self.name!r} is no longer loaded")
+
+
+def _loaded_version(name: str) -> ModelVersion:
+    from . import predict
+    return predict.loaded_version(name)
+
+
+def load_version(bundle_path: str, pickle_path: str, compiled_path: str, mode: str,
+                 nthread: int = 1, name: str = None) -> ModelVersion:
+    """
+    Loads a model for an INFERENCE_MODE: from the bundle when it exists
+    (except in "pipeline" mode), else from the compiled ensemble or the
+    pickle. Without a name, the version is named after its content hash.
+    """
+    bundle = None
+    if mode != "pipeline" and os.path.isdir(bundle_path):
+        bundle = load_bundle(bundle_path)
+        plan = bundle.plan
+        intervals = bundle.intervals()
+        content_hash = bundle.content_hash
+        if mode == "compiled":
+            model = bundle.compiled()
+        else:
+            model = bundle.booster_model()
+            model.native_booster(nthread=nthread)
+
+    elif mode == "compiled":
+        model = CompiledEnsemble.load(compiled_path)
+        plan = model.plan
+        intervals = None
+        content_hash = file_hash(compiled_path)
+
+    else:
+        # The pickle references `utils.FullXGBPipeline` (it was saved from the
+        # Streamlit folder), so that folder has to be importable before loading
+        streamlit_dir = os.path.join(PROJECT_ROOT, "streamlit")
+        if streamlit_dir not in sys.path:
+            sys.path.insert(0, streamlit_dir)
+
+        with open(pickle_path, "rb") as f:
+            model = pickle.load(f)
+        content_hash = file_hash(pickle_path)
+
+        # Compiled once: encodes rows without going through pandas
+        plan = EncodingPlan.from_pipeline(model)
+        intervals = getattr(model, "intervals", None)
+
+        if mode == "booster":
+            model.native_booster(nthread=nthread)   # extract once at load time
+
+    return ModelVersion(name or content_hash[:12], model, plan, intervals, content_hash, bundle)
+
+
+class ModelRegistry:
+    def __init__(self, root: str):
+        self.root = root
+
+    def versions(self) -> list:
+        """
+        Names of the published versions, in release (name) order.
+        """
+        names = []
+        for name in sorted(os.listdir(self.root)):
+            folder = os.path.join(self.root, name)
+            if not name.startswith(".") and os.path.isdir(folder) and any(os.path.exists(p) for p in artifact_paths(folder)):
+                names.append(name)
+        return names
+
+    def folder(self, version: str) -> str:
+        if version not in self.versions():
+            raise KeyError(f"Unknown model version: {version!r}")
+        return os.path.join(self.root, version)
+
+    def current(self) -> str:
+        """
+        The version named in CURRENT, or the last one published.
+        """
+        path = os.path.join(self.root, CURRENT_FILE)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return f.read().strip()
+        versions = self.versions()
+        if not versions:
+            raise ValueError(f"No model version in {self.root}")
+        return versions[-1]
+
+    def set_current(self, version: str):
+        # Written aside and renamed: a watcher never reads half a name
+        self.folder(version)
+        tmp = os.path.join(self.root, f".{CURRENT_FILE}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(version + "\n")
+        os.replace(tmp, os.path.join(self.root, CURRENT_FILE))
+
+    def publish(self, source: str, version: str) -> str:
+        """
+        Copies a bundle folder, a pickle or a compiled ensemble into a new
+        version folder (copied aside first, so it appears complete).
+        """
+        folder = os.path.join(self.root, version)
+        if os.path.exists(folder):
+            raise ValueError(f"Model version {version!r} already exists")
+
+        tmp = os.path.join(self.root, f".{version}.tmp")
+        if os.path.isdir(source):
+            shutil.copytree(source, tmp)
+        else:
+            os.makedirs(tmp)
+            target = PICKLE_FILE if source.endswith(".pkl") else COMPILED_FILE
+            shutil.copy2(source, os.path.join(tmp, target))
+        os.replace(tmp, folder)
+        return folder
+
+    def load(self, version: str, mode: str, nthread: int = 1) -> ModelVersion:
+        return load_version(*artifact_paths(self.folder(version)), mode, nthread, name=version)
+
+
+if __name__ == "__main__":
+    root, command, *args = sys.argv[1:]
+    os.makedirs(root, exist_ok=True)
+    registry = ModelRegistry(root)
+
+    if command == "list":
+        current = registry.current() if registry.versions() else None
+        for version in registry.versions():
+            print(("* " if version == current else "  ") + version)
+    elif command == "publish":
+        print(f"Published {registry.publish(args[0], args[1])}")
+    elif command == "set-current":
+        registry.set_current(args[0])
+        print(f"Current version: {args[0]}")
+    else:
+        sys.exit(f"Unknown command: {command} (list, publish, set-current)")
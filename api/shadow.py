@@ -0,0 +1,208 @@
+# ---------------------------------------------------------
+# SHADOW SCORING AND A/B SPLIT OF A CANDIDATE MODEL
+# ---------------------------------------------------------
+# Before a retrained model is promoted, a fraction of the live requests
+# is scored by it too, off the response path: /predict only draws a
+# random number and puts (row encoded by the candidate's plan, live
+# price, breakdown values) into a bounded queue. A background thread
+# collects the queued rows in batches and sends them to the model
+# executor (`executor`, as the micro-batcher does), so the candidate's
+# model runs where the live one does: in MODEL_EXECUTOR=process mode
+# nothing but the comparison holds the API process's GIL. A full queue
+# drops rows instead of slowing requests down.
+#
+# The comparison is kept as running sums (mean absolute and relative
+# delta, mean signed delta), overall and per province and subtype, and
+# served on GET /shadow.
+#
+# The A/B split instead serves a weighted share of requests with the
+# candidate; a request with an X-AB-Key header (a user or session id)
+# always lands on the same side.
+import hashlib
+import queue
+import random
+import threading
+import time
+import numpy as np
+
+# Row fields the deltas are broken down by
+BREAKDOWNS = ("province", "subtype")
+
+
+def breakdown(row: dict) -> tuple:
+    """
+    BREAKDOWNS values of a model row, queued with it.
+    """
+    return tuple(row[field] for field in BREAKDOWNS)
+
+
+def ab_draw(key: str = None) -> float:
+    """
+    A number in [0, 1): random, or fixed by the key (sticky assignment).
+    """
+    if not key:
+        return random.random()
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64
+
+
+class DeltaStats:
+    """
+    Running sums of candidate − live price deltas for one group of rows.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.abs_delta = 0.0
+        self.rel_delta = 0.0
+        self.delta = 0.0
+
+    def add(self, live: np.ndarray, shadow: np.ndarray):
+        delta = shadow - live
+        self.n += len(delta)
+        self.abs_delta += float(np.abs(delta).sum())
+        self.rel_delta += float((np.abs(delta) / live).sum())
+        self.delta += float(delta.sum())
+
+    def summary(self) -> dict:
+        n = max(self.n, 1)
+        return {
+            "n": self.n,
+            "mean_abs_delta": self.abs_delta / n,
+            "mean_rel_delta": self.rel_delta / n,
+            "mean_delta": self.delta / n,
+        }
+
+
+class ShadowScorer:
+    def __init__(self, score_fn, fraction: float, max_queue: int = 10_000,
+                 max_batch_size: int = 256, max_wait_ms: float = 100, executor=None):
+        self.score_fn = score_fn          # encoded matrix → candidate prices (picklable for processes)
+        self.executor = executor          # where score_fn runs (None: in the shadow thread)
+        self.fraction = fraction
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.lock = threading.Lock()
+        self.scored = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self._thread = None
+        self.reset()
+
+    def reset(self):
+        # E.g. after a hot-swap: the live side of the comparison changed
+        with self.lock:
+            self.overall = DeltaStats()
+            self.groups = {field: {} for field in BREAKDOWNS}
+
+    # ----------------------------------------
+    # RESPONSE PATH
+    # ----------------------------------------
+    def sampled(self) -> bool:
+        return self.fraction > 0 and random.random() < self.fraction
+
+    def submit(self, X_row: np.ndarray, live_prediction: float, groups: tuple):
+        """
+        Queues one row encoded by the candidate's plan, its live price and
+        its `breakdown`; never blocks.
+        """
+        try:
+            self.queue.put_nowait((X_row, live_prediction, groups))
+        except queue.Full:
+            self.dropped += 1
+
+    def sample(self, n_rows: int) -> np.ndarray:
+        """
+        Indices of the sampled rows of a batch.
+        """
+        if self.fraction <= 0 or not n_rows:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(np.random.random(n_rows) < self.fraction)
+
+    def submit_batch(self, X: np.ndarray, live_predictions, groups: list):
+        """
+        Queues sampled rows of a batch (see `sample`), encoded as a matrix.
+        """
+        for k in range(len(X)):
+            self.submit(X[k], float(live_predictions[k]), groups[k])
+
+    # ----------------------------------------
+    # BACKGROUND WORKER
+    # ----------------------------------------
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="shadow", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _collect(self) -> list:
+        # Block for the first row, then fill the batch until it is full
+        # or max_wait has passed since that first row arrived
+        first = self.queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                self.queue.put(None)    # stop once this batch is scored
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            X = np.vstack([X_row for X_row, _, _ in batch])
+            live = np.array([prediction for _, prediction, _ in batch], dtype=np.float64)
+            try:
+                if self.executor is None:
+                    shadow = self.score_fn(X)
+                else:
+                    # This thread only waits; the model runs in the executor
+                    shadow = self.executor.submit(self.score_fn, X).result()
+            except Exception:
+                self.failed += len(batch)
+                continue
+            self._record([keys for _, _, keys in batch], live, np.asarray(shadow, dtype=np.float64))
+
+    def _record(self, breakdowns: list, live: np.ndarray, shadow: np.ndarray):
+        with self.lock:
+            self.batches += 1
+            self.scored += len(breakdowns)
+            self.overall.add(live, shadow)
+            for j, (field, groups) in enumerate(self.groups.items()):
+                values = np.array([keys[j] for keys in breakdowns], dtype=object)
+                for value in set(values):
+                    mask = values == value
+                    groups.setdefault(value, DeltaStats()).add(live[mask], shadow[mask])
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "fraction": self.fraction,
+                "queued": self.queue.qsize(),
+                "scored": self.scored,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "batches": self.batches,
+                "overall": self.overall.summary(),
+                **{f"by_{field}": {value: s.summary() for value, s in sorted(groups.items())}
+                   for field, groups in self.groups.items()},
+            }
@@ -0,0 +1,103 @@
+# ---------------------------------------------------------
+# BENCHMARK: /predict/batch with an Arrow IPC stream vs. JSON
+# Run from the project root: python -m benchmarks.bench_arrow [rows ...]
+# ---------------------------------------------------------
+# The same rows (10 000 and 1 000 000 by default) are posted as a JSON
+# array and as an Arrow IPC stream. Timed: the request (parse, validate,
+# encode, score, answer) and decoding the answer into prices on the
+# client. Both paths spend the same time in the model, so the time
+# around it (request − model) is printed too. Both paths must give the
+# same prices, and the same errors for a few invalid rows.
+import gc
+import json
+import os
+import sys
+import numpy as np
+import pyarrow as pa
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("REQUEST_TIMEOUT", "600")     # a million JSON rows take longer than 10 s
+
+from api import arrow_io, predict  # noqa: E402
+from api.api import app, ARROW_STREAM  # noqa: E402
+from benchmarks.common import random_columns, timed  # noqa: E402
+
+client = TestClient(app)
+
+
+def arrow_body(columns: dict) -> bytes:
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table, max_chunksize=100_000)
+    return sink.getvalue().to_pybytes()
+
+
+def json_body(columns: dict) -> bytes:
+    return json.dumps([dict(zip(columns, values)) for values in zip(*columns.values())]).encode("utf-8")
+
+
+def post_json(body: bytes) -> np.ndarray:
+    response = client.post("/predict/batch", content=body, headers={"content-type": "application/json"})
+    assert response.status_code == 200, response.text[:500]
+    return np.array([result.get("predicted_price", np.nan) for result in response.json()["results"]])
+
+
+def post_arrow(body: bytes) -> np.ndarray:
+    response = client.post("/predict/batch", content=body, headers={"content-type": ARROW_STREAM})
+    assert response.status_code == 200, response.text[:500]
+    table = pa.ipc.open_stream(response.content).read_all()
+    return table.column("predicted_price").to_numpy(zero_copy_only=False)
+
+
+def check_errors():
+    # Invalid rows get the same errors on both paths
+    columns = random_columns(20, seed=2)
+    columns["province"][3] = "Paris"
+    columns["number_of_bedrooms"][5] = 0
+    columns["has_garden"][7] = "Maybe"
+    columns["terrace_area"][9] = 200.0
+    json_results = client.post("/predict/batch", content=json_body(columns),
+                               headers={"content-type": "application/json"}).json()["results"]
+    table = pa.ipc.open_stream(client.post("/predict/batch", content=arrow_body(columns),
+                                           headers={"content-type": ARROW_STREAM}).content).read_all()
+    arrow_errors = table.column("errors").to_pylist()
+    for i, result in enumerate(json_results):
+        if result["status"] == "success":
+            assert arrow_errors[i] is None, (i, arrow_errors[i])
+        else:
+            expected = [(e["type"], list(e["loc"])) for e in result["errors"]]
+            assert [(e["type"], e["loc"]) for e in json.loads(arrow_errors[i])] == expected, (i, arrow_errors[i])
+    print(f"errors of {sum(e is not None for e in arrow_errors)} invalid rows match the JSON path: OK")
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [10_000, 1_000_000]
+    check_errors()
+
+    print(f"{'rows':>9} {'format':<6} {'body MB':>8} {'request s':>10} {'rows/s':>11} {'speed-up':>9} "
+          f"{'− model s':>10} {'speed-up':>9}")
+    for n_rows in sizes:
+        columns = random_columns(n_rows, seed=24)
+        repeat = 3 if n_rows <= 100_000 else 1
+        bodies = {"json": json_body(columns), "arrow": arrow_body(columns)}
+        del columns
+        gc.collect()
+
+        prices = {"json": post_json(bodies["json"]), "arrow": post_arrow(bodies["arrow"])}
+        assert np.allclose(prices["json"], prices["arrow"], rtol=1e-6), "JSON and Arrow prices differ"
+
+        # The model call alone, on the same encoded rows
+        X_enc = arrow_io.read_batch(bodies["arrow"], predict.active_model().plan)[2]
+        model_s = timed(predict.predict_matrix, X_enc, True, repeat=repeat)
+
+        seconds, overhead = {}, {}
+        for name, post in [("json", post_json), ("arrow", post_arrow)]:
+            seconds[name] = timed(post, bodies[name], repeat=repeat)
+            overhead[name] = seconds[name] - model_s
+            speed_ups = (f"{seconds['json'] / seconds[name]:>8.1f}x", f"{overhead['json'] / overhead[name]:>8.1f}x")
+            print(f"{n_rows:>9} {name:<6} {len(bodies[name]) / 1e6:>8.1f} {seconds[name]:>10.3f} "
+                  f"{n_rows / seconds[name]:>11.0f} {speed_ups[0] if name == 'arrow' else '':>9} "
+                  f"{overhead[name]:>10.3f} {speed_ups[1] if name == 'arrow' else '':>9}")
+        del bodies, prices, X_enc
+        gc.collect()
@@ -0,0 +1,68 @@
+# ---------------------------------------------------------
+# BENCHMARK: cold start and RSS, pickle vs. artifact bundle
+# Run from the project root (after converting the pickle):
+#   python -m api.artifacts models/xgb_pipeline.pkl models/xgb_bundle
+#   python -m benchmarks.bench_artifacts
+# ---------------------------------------------------------
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+
+LOADERS = {
+    "pickle.load": (
+        "import sys, pickle; sys.path.insert(0, 'streamlit'); "
+        "m = pickle.load(open('models/xgb_pipeline.pkl', 'rb'))"
+    ),
+    "bundle booster": (
+        "from api.artifacts import load_bundle; "
+        "m = load_bundle('models/xgb_bundle').booster_model()"
+    ),
+    "bundle compiled (mmap)": (
+        "from api.artifacts import load_bundle; "
+        "m = load_bundle('models/xgb_bundle').compiled()"
+    ),
+}
+
+
+def measure(statement: str) -> dict:
+    """
+    Load time and peak RSS of a fresh interpreter running `statement`.
+    """
+    # VmHWM (unlike ru_maxrss) is not inherited from the parent across exec
+    code = (
+        "import time, json; t = time.perf_counter(); "
+        f"{statement}; "
+        "seconds = time.perf_counter() - t; "
+        "status = dict(line.split(':', 1) for line in open('/proc/self/status')); "
+        "print(json.dumps({'seconds': seconds, "
+        "'max_rss_mb': int(status['VmHWM'].split()[0]) / 1024}))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def check_parity():
+    # Reference predictions come from the pickled FullXGBPipeline
+    os.environ.setdefault("INFERENCE_MODE", "pipeline")
+
+    from api.artifacts import load_bundle
+    from api.predict import model, plan, to_model_row
+    from benchmarks.common import random_payloads
+
+    X = plan.encode_rows([to_model_row(p) for p in random_payloads(2000)])
+    bundle = load_bundle("models/xgb_bundle")
+    expected = model.predict_encoded(X)
+    assert np.array_equal(expected, bundle.booster_model().predict_encoded(X))
+    assert np.array_equal(expected, bundle.compiled().predict_encoded(X))
+
+
+if __name__ == "__main__":
+    check_parity()
+    print("parity: OK (bundle booster and compiled match the pickle)")
+
+    print(f"{'loader':<24} {'cold start (s)':>15} {'peak RSS (MB)':>15}")
+    for name, statement in LOADERS.items():
+        result = measure(statement)
+        print(f"{name:<24} {result['seconds']:>15.3f} {result['max_rss_mb']:>15.1f}")
@@ -0,0 +1,40 @@
+# ---------------------------------------------------------
+# BENCHMARK: /predict/batch vs. repeated /predict calls
+# Run from the project root: python -m benchmarks.bench_batch
+# ---------------------------------------------------------
+import json
+import sys
+from fastapi.testclient import TestClient
+
+from api.api import app
+from benchmarks.common import random_payloads, timed
+
+client = TestClient(app)
+
+
+def single_calls(payloads):
+    for payload in payloads:
+        client.post("/predict", json=payload)
+
+
+def one_batch(payloads):
+    client.post("/predict/batch", content=json.dumps(payloads),
+                headers={"content-type": "application/json"})
+
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    payloads = random_payloads(n_rows)
+
+    # Both paths must agree before we compare their speed
+    singles = [client.post("/predict", json=p).json()["predicted_price"] for p in payloads[:50]]
+    batch = client.post("/predict/batch", json=payloads[:50]).json()["results"]
+    assert all(abs(a - b["predicted_price"]) < 1e-6 for a, b in zip(singles, batch))
+
+    t_single = timed(single_calls, payloads, repeat=1)
+    t_batch = timed(one_batch, payloads)
+
+    print(f"rows: {n_rows}")
+    print(f"single /predict : {t_single:8.3f} s  ({n_rows / t_single:10.0f} rows/s)")
+    print(f"/predict/batch  : {t_batch:8.3f} s  ({n_rows / t_batch:10.0f} rows/s)")
+    print(f"speed-up        : {t_single / t_batch:8.1f}x")
@@ -0,0 +1,37 @@
+# ---------------------------------------------------------
+# BENCHMARK: native Booster.inplace_predict vs. sklearn wrapper
+# Run from the project root: python -m benchmarks.bench_booster
+# ---------------------------------------------------------
+import os
+import numpy as np
+import pandas as pd
+
+# These comparisons need the pickled FullXGBPipeline (DataFrame path)
+os.environ.setdefault("INFERENCE_MODE", "pipeline")
+
+from api.predict import model, plan, to_model_row, MODEL_ORDER
+from benchmarks.common import random_payloads, timed
+
+BATCH_SIZES = [1, 32, 1_000, 100_000]
+
+
+if __name__ == "__main__":
+    rows = [to_model_row(p) for p in random_payloads(max(BATCH_SIZES))]
+    X_all = plan.encode_rows(rows)
+    n_cores = os.cpu_count()
+
+    # Parity first: the native path must match the wrapper exactly
+    assert np.array_equal(model.predict_encoded(X_all[:1000]),
+                          model.predict_booster(X_all[:1000], nthread=1))
+
+    print(f"{'rows':>8} {'DataFrame':>12} {'wrapper':>12} {'booster/1':>12} {'booster/' + str(n_cores):>12}   (ms per call)")
+    for size in BATCH_SIZES:
+        X = X_all[:size]
+        df = pd.DataFrame.from_records(rows[:size], columns=MODEL_ORDER)
+        repeat = 3 if size >= 1000 else 20
+
+        t_df = timed(model.predict, df, repeat=repeat)
+        t_wrapper = timed(model.predict_encoded, X, repeat=repeat)
+        t_one = timed(model.predict_booster, X, nthread=1, repeat=repeat)
+        t_all = timed(model.predict_booster, X, nthread=n_cores, repeat=repeat)
+        print(f"{size:>8} {t_df * 1e3:>12.3f} {t_wrapper * 1e3:>12.3f} {t_one * 1e3:>12.3f} {t_all * 1e3:>12.3f}")
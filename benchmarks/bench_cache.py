@@ -0,0 +1,58 @@
+# ---------------------------------------------------------
+# BENCHMARK: prediction cache hit vs. miss latency
+# Run from the project root: python -m benchmarks.bench_cache
+# ---------------------------------------------------------
+import numpy as np
+
+from api.cache import PredictionCache, LocalBackend
+from api.predict import predict_row, predict_encoded, plan, prediction_cache, to_model_row, MODEL_HASH
+from benchmarks.common import random_payloads, timed
+
+
+def check_cache():
+    """
+    Cached answers equal the model, two model hashes keep their own
+    entries until one is no longer retained, and the shared backend fills
+    a second (worker) cache.
+    """
+    rows = [to_model_row(p) for p in random_payloads(200)]
+    for row in rows + rows:
+        assert predict_row(row) == float(predict_encoded(plan.encode_row(row))[0])
+
+    cache = PredictionCache(maxsize=2, ttl=60, backend=LocalBackend())
+    X = plan.encode_rows(rows[:3])
+    keys = [cache.key(x, MODEL_HASH) for x in X]
+    for key in keys:
+        cache.set(key, 1.0)
+    assert cache.stats()["size"] == 2                  # LRU eviction
+
+    other_worker = PredictionCache(maxsize=2, ttl=60, backend=cache.backend)
+    other_worker.key(X[0], MODEL_HASH)
+    assert other_worker.get(keys[0]) == 1.0            # served by the shared backend
+
+    new_key = cache.key(X[0], "another-model")
+    cache.set(new_key, 2.0)
+    assert new_key != keys[0] and cache.get(keys[2]) == 1.0 and cache.get(new_key) == 2.0
+    assert cache.stats()["models"] == 2
+    cache.retain(["another-model"])
+    assert cache.stats()["size"] == 1 and cache.get(new_key) == 2.0
+
+
+if __name__ == "__main__":
+    check_cache()
+    print("cache checks: OK")
+
+    # Traffic with heavy repetition: 500 distinct listings, 20k requests
+    rng = np.random.default_rng(1)
+    distinct = [to_model_row(p) for p in random_payloads(500, seed=1)]
+    traffic = [distinct[i] for i in rng.zipf(1.3, 20_000) % len(distinct)]
+
+    prediction_cache.clear()
+    hits_before = prediction_cache.hits
+    t_cached = timed(lambda: [predict_row(row) for row in traffic], repeat=1)
+    t_uncached = timed(lambda: [float(predict_encoded(plan.encode_row(row))[0]) for row in traffic], repeat=1)
+
+    hit_rate = (prediction_cache.hits - hits_before) / len(traffic)
+    print(f"requests: {len(traffic)}, hit rate: {hit_rate:.1%}")
+    print(f"without cache : {t_uncached / len(traffic) * 1e6:8.1f} µs per request")
+    print(f"with cache    : {t_cached / len(traffic) * 1e6:8.1f} µs per request")
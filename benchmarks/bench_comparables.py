@@ -0,0 +1,64 @@
+# ---------------------------------------------------------
+# BENCHMARK: comparables index build time and query latency
+# Run from the project root: python -m benchmarks.bench_comparables [n_listings]
+# ---------------------------------------------------------
+import sys
+import tempfile
+import time
+import numpy as np
+
+from api.comparables import ComparablesIndex, build_index
+from api.predict import plan, to_model_row
+from benchmarks.common import random_payloads, synthetic_training_data
+
+
+def linear_scan(index: ComparablesIndex, points: np.ndarray, codes: np.ndarray, row: dict, k: int):
+    # What a request would do without the index: filter and sort every listing
+    X = index.plan.encode_row(row)[0]
+    point = (X[index.neighbour_index] - index.center) / index.scale
+    candidates = np.flatnonzero(np.all(codes == X[index.partition_index], axis=1))
+    distances = np.sqrt(((points[candidates] - point) ** 2).sum(axis=1))
+    nearest = np.argsort(distances, kind="stable")[:k]
+    return distances[nearest]
+
+
+def latencies(fn, rows: list) -> np.ndarray:
+    times = []
+    for row in rows:
+        start = time.perf_counter()
+        fn(row)
+        times.append(time.perf_counter() - start)
+    return np.array(times) * 1000
+
+
+if __name__ == "__main__":
+    n_listings = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    k = 10
+
+    frame, prices = synthetic_training_data(n_listings, seed=21)
+    frame["price"] = prices
+
+    with tempfile.TemporaryDirectory() as path:
+        meta = build_index(frame, path, plan)
+        start = time.perf_counter()
+        index = ComparablesIndex.load(path)
+        load_ms = (time.perf_counter() - start) * 1000
+        print(f"{n_listings} listings, {len(meta['partitions'])} partitions: "
+              f"build {meta['build_seconds']:.2f} s, load (trees rebuilt) {load_ms:.1f} ms")
+
+        # Unindexed copy of the same points for the linear scan
+        X = plan.encode_columns(frame)
+        points = (X[:, index.neighbour_index] - index.center) / index.scale
+        codes = X[:, index.partition_index]
+
+        rows = [to_model_row(p) for p in random_payloads(2000, seed=22)]
+        for row in rows[:200]:
+            found = [distance for *_, distance in index.query(row, k)]
+            assert np.allclose(found, linear_scan(index, points, codes, row, k))
+        print("index matches the linear scan: OK")
+
+        print(f"{'query':<14} {'p50 ms':>8} {'p99 ms':>8}")
+        for name, fn in [("KD-tree index", lambda row: index.query(row, k)),
+                         ("linear scan", lambda row: linear_scan(index, points, codes, row, k))]:
+            ms = latencies(fn, rows)
+            print(f"{name:<14} {np.percentile(ms, 50):>8.3f} {np.percentile(ms, 99):>8.3f}")
@@ -0,0 +1,64 @@
+# ---------------------------------------------------------
+# BENCHMARK + PARITY: compiled NumPy ensemble vs. XGBoost
+# Run from the project root (after exporting the model):
+#   python -m api.compiled_model models/xgb_pipeline.pkl models/xgb_compiled.npz
+#   python -m benchmarks.bench_compiled
+# ---------------------------------------------------------
+import subprocess
+import sys
+import numpy as np
+
+from api.compiled_model import CompiledEnsemble
+from api.predict import model, plan, to_model_row, COMPILED_MODEL_PATH
+from benchmarks.common import random_payloads, timed
+
+BATCH_SIZES = [1, 32, 1_000, 100_000]
+
+
+def check_parity(compiled, X):
+    """
+    Raw margins must be bit-identical to XGBoost, including rows with
+    missing values that follow the default branch.
+    """
+    expected = model.native_booster().inplace_predict(X, predict_type="margin")
+    got = compiled.margin(X)
+    assert np.array_equal(expected, got), \
+        f"margin mismatch: {np.max(np.abs(expected - got))}"
+
+
+def cold_start(statement: str) -> float:
+    """
+    Wall time of a fresh interpreter that only runs `statement`.
+    """
+    code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip())
+
+
+if __name__ == "__main__":
+    compiled = CompiledEnsemble.load(COMPILED_MODEL_PATH)
+
+    rows = [to_model_row(p) for p in random_payloads(max(BATCH_SIZES))]
+    X_all = plan.encode_rows(rows)
+    X_missing = X_all[:2000].copy()
+    X_missing[::3, 1] = np.nan     # living_area
+    X_missing[::5, 6] = np.nan     # terrace_area
+
+    check_parity(compiled, X_all[:20_000])
+    check_parity(compiled, X_missing)
+    print("parity: OK (bit-identical margins)")
+
+    t_pickle = cold_start("import sys, pickle; sys.path.insert(0, 'streamlit'); "
+                          "pickle.load(open('models/xgb_pipeline.pkl', 'rb'))")
+    t_npz = cold_start("from api.compiled_model import CompiledEnsemble; "
+                       "CompiledEnsemble.load('models/xgb_compiled.npz')")
+    print(f"cold start pickle (sklearn + xgboost) : {t_pickle:6.2f} s")
+    print(f"cold start compiled (numpy only)      : {t_npz:6.2f} s")
+
+    print(f"{'rows':>8} {'booster':>12} {'compiled':>12}   (ms per call)")
+    for size in BATCH_SIZES:
+        X = X_all[:size]
+        repeat = 3 if size >= 1000 else 20
+        t_booster = timed(model.predict_booster, X, nthread=1, repeat=repeat)
+        t_compiled = timed(compiled.predict_encoded, X, repeat=repeat)
+        print(f"{size:>8} {t_booster * 1e3:>12.3f} {t_compiled * 1e3:>12.3f}")
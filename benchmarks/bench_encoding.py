@@ -0,0 +1,59 @@
+# ---------------------------------------------------------
+# BENCHMARK: compiled EncodingPlan vs. FullXGBPipeline.transform
+# Run from the project root: python -m benchmarks.bench_encoding
+# ---------------------------------------------------------
+import os
+import numpy as np
+import pandas as pd
+
+# These comparisons need the pickled FullXGBPipeline (DataFrame path)
+os.environ.setdefault("INFERENCE_MODE", "pipeline")
+
+from api.predict import model, plan, to_model_row, MODEL_ORDER
+from benchmarks.common import random_payloads, timed
+
+
+def check_parity(rows):
+    """
+    The plan must produce the same matrix and bit-identical predictions
+    as the pandas path, including rows with missing values.
+    """
+    df = pd.DataFrame.from_records(rows, columns=MODEL_ORDER)
+    expected_X = model.transform(df).to_numpy(dtype=np.float32)
+    expected_y = model.predict(df)
+
+    X_batch = plan.encode_rows(rows)
+    X_single = np.vstack([plan.encode_row(row) for row in rows])
+
+    assert np.array_equal(expected_X, X_batch)
+    assert np.array_equal(expected_X, X_single)
+    assert np.array_equal(expected_y, model.predict_encoded(X_batch))
+
+
+if __name__ == "__main__":
+    rows = [to_model_row(p) for p in random_payloads(5000)]
+    for i in range(0, len(rows), 7):
+        rows[i] = dict(rows[i], **{"living_area (m²)": None, "state_of_building": None})
+    check_parity(rows)
+    print("parity: OK (5000 rows, bit-identical predictions)")
+
+    row = rows[1]
+    one_row_df = pd.DataFrame([row])[MODEL_ORDER]
+    buffer = np.empty((1, len(plan.feature_cols)), dtype=np.float32)
+    n = 2000
+
+    t_transform = timed(lambda: [model.transform(one_row_df) for _ in range(n)]) / n
+    t_plan = timed(lambda: [plan.encode_row(row, out=buffer) for _ in range(n)]) / n
+    print(f"single row transform   : {t_transform * 1e6:10.1f} µs")
+    print(f"single row encode_row  : {t_plan * 1e6:10.1f} µs  ({t_transform / t_plan:.0f}x)")
+
+    t_predict = timed(lambda: [model.predict(one_row_df) for _ in range(200)]) / 200
+    t_fast = timed(lambda: [model.predict_encoded(plan.encode_row(row, out=buffer)) for _ in range(200)]) / 200
+    print(f"single row predict     : {t_predict * 1e6:10.1f} µs")
+    print(f"single row fast path   : {t_fast * 1e6:10.1f} µs  ({t_predict / t_fast:.1f}x)")
+
+    df = pd.DataFrame.from_records(rows, columns=MODEL_ORDER)
+    t_transform = timed(model.transform, df)
+    t_plan = timed(plan.encode_rows, rows)
+    print(f"{len(rows)} rows transform   : {t_transform * 1e3:8.2f} ms")
+    print(f"{len(rows)} rows encode_rows : {t_plan * 1e3:8.2f} ms")
@@ -0,0 +1,73 @@
+# ---------------------------------------------------------
+# BENCHMARK: /explain vs. /predict throughput
+# Run from the project root: python -m benchmarks.bench_explain [n_rows]
+# ---------------------------------------------------------
+import sys
+import time
+import numpy as np
+from fastapi.testclient import TestClient
+
+from api import predict
+from api.api import app
+from benchmarks.common import random_payloads, timed
+
+
+def check_explanations(payloads: list):
+    """
+    Contributions map to the 14 API fields and add up to the prediction,
+    for both methods, single and batch.
+    """
+    rows = [predict.to_model_row(p) for p in payloads]
+    for method in predict.EXPLAIN_METHODS:
+        for row, batch in zip(rows, predict.make_batch_explanation(rows, method)):
+            single = predict.explain_row(row, method)
+            assert set(single["contributions"]) == set(payloads[0])
+            margin = single["base_value"] + sum(single["contributions"].values())
+            assert np.isclose(np.expm1(margin) if predict.model.log_target else margin,
+                              single["predicted_price"], rtol=1e-4)
+            assert np.allclose(list(single["contributions"].values()), list(batch["contributions"].values()),
+                               atol=1e-5)
+
+
+def per_row(client, path: str, payloads: list) -> float:
+    start = time.perf_counter()
+    for payload in payloads:
+        assert client.post(path, json=payload).status_code == 200
+    return len(payloads) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    payloads = random_payloads(n_rows, seed=5)
+
+    check_explanations(payloads[:20])
+    print("explanation checks: OK")
+
+    # Time the model: no prediction or explanation cache
+    predict.prediction_cache.maxsize = 0
+    for cache in predict.explanation_caches.values():
+        cache.maxsize = 0
+
+    # Exact TreeSHAP is orders of magnitude slower: time it on fewer rows
+    exact_rows = payloads[:max(1, n_rows // 20)]
+    print(f"{'endpoint':<30} {'rows':>7} {'rows/s':>10} {'vs /predict':>12}")
+    with TestClient(app) as client:
+        base = per_row(client, "/predict", payloads)
+        print(f"{'/predict':<30} {n_rows:>7} {base:>10.0f} {1:>12.2f}")
+        for path, rows in [("/explain", payloads), ("/explain?method=exact", exact_rows)]:
+            rate = per_row(client, path, rows)
+            print(f"{path:<30} {len(rows):>7} {rate:>10.0f} {rate / base:>12.2f}")
+
+        base = len(payloads) / timed(client.post, "/predict/batch", json=payloads, repeat=1)
+        print(f"{'/predict/batch':<30} {n_rows:>7} {base:>10.0f} {1:>12.2f}")
+        for path, rows in [("/explain/batch", payloads), ("/explain/batch?method=exact", exact_rows)]:
+            rate = len(rows) / timed(client.post, path, json=rows, repeat=1)
+            print(f"{path:<30} {len(rows):>7} {rate:>10.0f} {rate / base:>12.2f}")
+
+    # Repeated listings are answered from the explanation cache
+    for cache in predict.explanation_caches.values():
+        cache.maxsize = 10_000
+    rows = [predict.to_model_row(p) for p in payloads[:200]]
+    [predict.explain_row(row) for row in rows]
+    t_hit = timed(lambda: [predict.explain_row(row) for row in rows])
+    print(f"cached /explain rows: {len(rows) / t_hit:.0f} rows/s")
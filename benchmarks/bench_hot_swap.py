@@ -0,0 +1,160 @@
+# ---------------------------------------------------------
+# BENCHMARK: model hot-swap latency and requests during swaps
+# Run from the project root: python -m benchmarks.bench_hot_swap [seconds] [concurrency]
+# ---------------------------------------------------------
+# A temporary registry holds two versions: v1 is the model of models/
+# and v2 a model retrained on synthetic data (different prices). The API
+# then serves /predict under load while POST /admin/model swaps the two
+# back and forth. Every request must succeed, and its price must be the
+# one of the version its response names (no request mixes two models).
+# The registry is built in a child process: importing the API (which the
+# benchmark helpers do) loads the model of MODEL_REGISTRY_PATH.
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import httpx
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN_TOKEN = "bench"
+SWAP_EVERY = 0.5    # seconds between two swaps under load
+
+
+def build_registry(root: str):
+    """
+    v1: the current bundle (or pickle); v2: a smaller model retrained on
+    synthetic data, written as a bundle.
+    """
+    sys.path.insert(0, os.path.join(PROJECT_ROOT, "streamlit"))
+    from utils import FullXGBPipeline
+    from api.artifacts import save_bundle
+    from api.registry import ModelRegistry
+    from benchmarks.common import synthetic_training_data
+
+    registry = ModelRegistry(root)
+    bundle = os.path.join(PROJECT_ROOT, "models", "xgb_bundle")
+    registry.publish(bundle if os.path.isdir(bundle) else os.path.join(PROJECT_ROOT, "models", "xgb_pipeline.pkl"),
+                     "v1")
+
+    X, y = synthetic_training_data(20_000, seed=21)
+    pipeline = FullXGBPipeline(xgb_params={"n_estimators": 200, "max_depth": 6}).fit(X, y)
+    with tempfile.TemporaryDirectory() as tmp:
+        save_bundle(pipeline, os.path.join(tmp, "bundle"))
+        registry.publish(os.path.join(tmp, "bundle"), "v2")
+    registry.set_current("v1")
+
+
+async def swap_latencies(client, n: int = 4) -> list:
+    """
+    Swaps back and forth without load; returns the swap responses.
+    """
+    swaps = []
+    for i in range(n):
+        response = await client.post("/admin/model", params={"version": "v2" if i % 2 == 0 else "v1"},
+                                     headers={"x-admin-token": ADMIN_TOKEN})
+        assert response.status_code == 200, response.text
+        swaps.append(response.json())
+    return swaps
+
+
+async def load(client, payloads: list, concurrency: int, duration: float, swap: bool) -> tuple:
+    """
+    `concurrency` clients post payloads for `duration` seconds, with a
+    swap every SWAP_EVERY seconds when `swap`. Returns (latencies in ms,
+    responses as (payload index, status, json), number of swaps).
+    """
+    latencies, responses = [], []
+    stop_at = time.perf_counter() + duration
+    n_swaps = 0
+
+    async def client_loop(offset):
+        i = offset
+        while time.perf_counter() < stop_at:
+            k = i % len(payloads)
+            start = time.perf_counter()
+            try:
+                response = await client.post("/predict", json=payloads[k])
+                responses.append((k, response.status_code, response.json()))
+            except Exception as e:      # a dropped request
+                responses.append((k, None, str(e)))
+            latencies.append((time.perf_counter() - start) * 1000)
+            i += concurrency
+
+    async def swap_loop():
+        nonlocal n_swaps
+        while time.perf_counter() < stop_at - SWAP_EVERY:
+            await asyncio.sleep(SWAP_EVERY)
+            target = "v2" if n_swaps % 2 == 0 else "v1"
+            response = await client.post("/admin/model", params={"version": target},
+                                         headers={"x-admin-token": ADMIN_TOKEN})
+            assert response.status_code == 200, response.text
+            n_swaps += 1
+
+    loops = [client_loop(k) for k in range(concurrency)]
+    if swap:
+        loops.append(swap_loop())
+    await asyncio.gather(*loops)
+    return np.array(latencies), responses, n_swaps
+
+
+async def main(duration: float, concurrency: int):
+    from api import predict
+    from api.api import app
+    from benchmarks.common import random_payloads
+
+    payloads = random_payloads(2000, seed=22)
+    rows = [predict.to_model_row(p) for p in payloads]
+    expected = {name: predict.make_batch_prediction(rows, version=predict.load_model(name))
+                for name in ("v1", "v2")}
+    assert not np.allclose(expected["v1"], expected["v2"]), "the two versions predict the same prices"
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+            # executor s: starting the processes of the new version (MODEL_EXECUTOR=process)
+            print(f"{'swap':<10} {'load s':>8} {'warm-up s':>10} {'executor s':>11} {'swap ms':>9}")
+            for s in await swap_latencies(client):
+                print(f"{s['previous'] + '→' + s['version']:<10} {s['load_s']:>8.3f} "
+                      f"{s['warm_up_s']:>10.3f} {s['executor_s']:>11.3f} {s['swap_ms']:>9.4f}")
+
+            print(f"{'load (' + str(concurrency) + ' clients)':<22} {'requests':>9} {'swaps':>6} "
+                  f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+            for swap in (False, True):
+                latencies, responses, n_swaps = await load(client, payloads, concurrency, duration, swap)
+                name = "with swaps" if swap else "no swap"
+                print(f"{name:<22} {len(responses):>9} {n_swaps:>6} {np.percentile(latencies, 50):>8.2f} "
+                      f"{np.percentile(latencies, 99):>8.2f} {latencies.max():>8.2f}")
+
+                failed = [r for r in responses if r[1] != 200]
+                assert not failed, f"{len(failed)} failed requests, e.g. {failed[0]}"
+                for k, _, body in responses:
+                    assert np.isclose(body["predicted_price"], expected[body["model_version"]][k], rtol=1e-5), body
+                # Both versions served between two completed swaps
+                versions = {body["model_version"] for _, _, body in responses}
+                if n_swaps >= 2:
+                    assert versions == {"v1", "v2"}, versions
+
+    print("no failed request, every price matches the version of its response: OK")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--build"]:
+        build_registry(sys.argv[2])
+        sys.exit()
+
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+    root = tempfile.mkdtemp(prefix="registry-")
+    try:
+        subprocess.run([sys.executable, "-m", "benchmarks.bench_hot_swap", "--build", root], check=True)
+        os.environ["MODEL_REGISTRY_PATH"] = root
+        os.environ["ADMIN_TOKEN"] = ADMIN_TOKEN
+        os.environ.setdefault("PREDICTION_CACHE_SIZE", "0")   # every request reaches the model
+        asyncio.run(main(duration, concurrency))
+    finally:
+        shutil.rmtree(root)
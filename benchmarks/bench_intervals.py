@@ -0,0 +1,73 @@
+# ---------------------------------------------------------
+# BENCHMARK: conformal intervals — coverage and latency cost
+# Run from the project root: python -m benchmarks.bench_intervals
+# ---------------------------------------------------------
+import numpy as np
+
+from api import predict
+from api.intervals import ConformalIntervals
+from benchmarks.common import random_payloads, synthetic_training_data, timed
+
+# Intervals may cost at most this much of the point-prediction latency
+MAX_COST_RATIO = 1.5
+
+
+def calibrate(n: int = 20_000, coverage: float = 0.8) -> ConformalIntervals:
+    # Rows the model was not trained on, scored by the serving path
+    X_cal, y_cal = synthetic_training_data(n, seed=11)
+    return ConformalIntervals.fit(y_cal, predict.predict_encoded(predict.plan.encode_columns(X_cal)),
+                                  coverage)
+
+
+def check_intervals():
+    """
+    Bounds bracket the prediction, the scalar and vectorized paths
+    agree, and the serialized intervals round-trip.
+    """
+    intervals = predict.intervals
+    predictions = predict.make_batch_prediction([predict.to_model_row(p) for p in random_payloads(500)])
+    lower, upper = intervals.apply(predictions)
+    assert np.all(lower <= predictions) and np.all(predictions <= upper)
+    for p, lo, hi in zip(predictions, lower, upper):
+        assert np.allclose(intervals.interval(float(p)), (lo, hi))
+    copy = ConformalIntervals.from_dict(intervals.to_dict())
+    assert np.array_equal(copy.apply(predictions)[1], upper)
+
+
+if __name__ == "__main__":
+    predict.intervals = calibrate()
+    predict.prediction_cache.maxsize = 0     # time the model, not the cache
+    check_intervals()
+    print("interval checks: OK")
+
+    X_test, y_test = synthetic_training_data(20_000, seed=12)
+    test_pred = predict.predict_encoded(predict.plan.encode_columns(X_test))
+    lower, upper = predict.intervals.apply(test_pred)
+    covered = np.mean((y_test >= lower) & (y_test <= upper))
+    width = np.median((upper - lower) / test_pred)
+    print(f"target coverage {predict.intervals.coverage:.0%}: observed {covered:.1%} "
+          f"on {len(y_test)} new rows, median width {width:.1%} of the prediction")
+
+    payloads = random_payloads(2000, seed=3)
+    rows = [predict.to_model_row(p) for p in payloads]
+
+    def single(rows):
+        return [predict.predict_row(row) for row in rows]
+
+    def single_with_interval(rows):
+        return [predict.price_interval(predict.predict_row(row)) for row in rows]
+
+    print(f"{'path':<18} {'rows':>7} {'point ms':>10} {'+interval ms':>13} {'ratio':>6}")
+    t_point = timed(single, rows)
+    t_interval = timed(single_with_interval, rows)
+    ratio = t_interval / t_point
+    print(f"{'/predict rows':<18} {len(rows):>7} {t_point * 1000:>10.1f} {t_interval * 1000:>13.1f} {ratio:>6.2f}")
+    assert ratio <= MAX_COST_RATIO
+
+    for n in [1000, 100_000]:
+        batch = (rows * (n // len(rows) + 1))[:n]
+        t_point = timed(predict.make_batch_prediction, batch)
+        t_interval = timed(predict.make_batch_prediction, batch, True)
+        ratio = t_interval / t_point
+        print(f"{'batch':<18} {n:>7} {t_point * 1000:>10.1f} {t_interval * 1000:>13.1f} {ratio:>6.2f}")
+        assert ratio <= MAX_COST_RATIO
@@ -0,0 +1,47 @@
+# ---------------------------------------------------------
+# BENCHMARK: precomputed lookup table vs. live model
+# Run from the project root (after materializing the table):
+#   python -m api.lookup_table models/price_table --workers 8
+#   python -m benchmarks.bench_lookup models/price_table
+# ---------------------------------------------------------
+import sys
+import numpy as np
+
+from api.lookup_table import LookupTable
+from api.predict import plan, predict_encoded, to_model_row
+from benchmarks.common import random_payloads, timed
+
+
+def lattice_rows(table, n: int, seed: int = 0) -> list:
+    """
+    Random rows that fall exactly on lattice points.
+    """
+    rng = np.random.default_rng(seed)
+    rows = [to_model_row(p) for p in random_payloads(n, seed=seed)]
+    for row in rows:
+        row["living_area (m²)"] = float(rng.choice(table.living_area))
+        row["number_of_bedrooms"] = int(rng.choice(table.bedrooms))
+        row["terrace_area (m²)"] = float(rng.choice(table.terrace_area))
+    return rows
+
+
+if __name__ == "__main__":
+    table = LookupTable.load(sys.argv[1] if len(sys.argv) > 1 else "models/price_table")
+
+    rows = lattice_rows(table, 2000)
+    expected = predict_encoded(plan.encode_rows(rows))
+    assert np.array_equal(expected, np.array([table.lookup(row) for row in rows], dtype=np.float32))
+    print("lattice points: OK (identical to the live model)")
+
+    error = table.meta["error"]
+    print(f"stated interpolation error: mean {error['mean_rel_error']:.2%}, "
+          f"p99 {error['p99_rel_error']:.2%}, max {error['max_rel_error']:.2%} "
+          f"({error['n_samples']} samples)")
+
+    row = rows[0]
+    X_row = plan.encode_row(row)
+    n = 2000
+    t_model = timed(lambda: [predict_encoded(plan.encode_row(row, out=X_row)) for _ in range(n)]) / n
+    t_table = timed(lambda: [table.lookup(row) for _ in range(n)]) / n
+    print(f"live model   : {t_model * 1e6:8.1f} µs per row")
+    print(f"lookup table : {t_table * 1e6:8.1f} µs per row")
@@ -0,0 +1,76 @@
+# ---------------------------------------------------------
+# BENCHMARK: overhead of the stage timings and request metrics
+# Run from the project root: python -m benchmarks.bench_metrics [n_rows]
+# ---------------------------------------------------------
+# The same calls run with metrics on and off, alternating in small
+# blocks so that both see the same machine noise; the p50 overhead
+# must stay under 5%.
+import sys
+import threading
+import time
+import numpy as np
+from fastapi.testclient import TestClient
+
+from api import metrics, predict
+from api.api import app
+from benchmarks.common import random_payloads
+
+MAX_OVERHEAD = 0.05
+
+
+def alternating(fn, items: list, block: int = 50) -> dict:
+    """
+    Per-call seconds of fn(item) with metrics on and off, by mode.
+    """
+    times = {True: [], False: []}
+    for first in range(0, len(items), block):
+        for mode in (True, False):
+            metrics.enabled = mode
+            for item in items[first:first + block]:
+                start = time.perf_counter()
+                fn(item)
+                times[mode].append(time.perf_counter() - start)
+    metrics.enabled = True
+    return times
+
+
+def report(name: str, times: dict) -> float:
+    on, off = np.median(times[True]) * 1e6, np.median(times[False]) * 1e6
+    overhead = on / off - 1
+    print(f"{name:<28} {off:>10.1f} {on:>10.1f} {overhead:>+9.1%}")
+    return overhead
+
+
+def observation_ns(n: int = 200_000) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        metrics.observe_stage("bench", metrics.now())
+    return (time.perf_counter() - start) / n * 1e9
+
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    payloads = random_payloads(n_rows, seed=9)
+    rows = [predict.to_model_row(p) for p in payloads]
+
+    # Every call goes to the model
+    predict.prediction_cache.maxsize = 0
+
+    print(f"one stage observation: {observation_ns():.0f} ns")
+    print(f"{'p50 µs':<28} {'metrics off':>10} {'on':>10} {'overhead':>9}")
+    overheads = [report("predict_row (hot path)", alternating(predict.predict_row, rows))]
+    with TestClient(app) as client:
+        overheads.append(report("POST /predict", alternating(lambda p: client.post("/predict", json=p), payloads)))
+        batches = [payloads[i:i + 500] for i in range(0, len(payloads), 500)] * 5
+        overheads.append(report("POST /predict/batch (500)",
+                                alternating(lambda b: client.post("/predict/batch", json=b), batches, block=1)))
+    assert max(overheads) < MAX_OVERHEAD, f"metrics overhead above {MAX_OVERHEAD:.0%} at p50"
+    print(f"p50 overhead under {MAX_OVERHEAD:.0%}: OK")
+
+    # The profiler sees the model stage of a busy thread
+    worker = threading.Thread(target=lambda: [predict.predict_row(row) for row in rows[:500]])
+    worker.start()
+    stacks = metrics.profile(0.5, 0.002)
+    worker.join()
+    assert "predict_row" in stacks, stacks[:1000]
+    print(f"profiler: {len(stacks.splitlines())} distinct stacks in 0.5 s: OK")
@@ -0,0 +1,130 @@
+# ---------------------------------------------------------
+# BENCHMARK: shadow scoring cost on the live path, A/B split
+# Run from the project root: python -m benchmarks.bench_shadow [seconds] [concurrency]
+# ---------------------------------------------------------
+# The registry of bench_hot_swap (v1 live, v2 candidate). Under load,
+# shadow scoring is switched between off and every request (fraction 1)
+# in short alternating blocks, so that both see the same machine noise.
+# The median over blocks of the p99 of /predict with shadow scoring must
+# stay within the run-to-run noise of the blocks without it: the spread
+# (interquartile range) of their p99s. Then the shadow deltas are checked
+# against v2 − v1 computed offline, and the A/B split against its weight
+# and stickiness. Set MODEL_EXECUTOR=process to score both models out of
+# the API process.
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import httpx
+
+BLOCK_SECONDS = 0.5
+
+
+async def alternating_load(client, api, payloads: list, concurrency: int, duration: float) -> dict:
+    """
+    Latencies (ms) of /predict per block, by shadow fraction.
+    """
+    blocks = []     # (fraction, latencies)
+    stop_at = time.perf_counter() + duration
+
+    async def client_loop(offset):
+        i = offset
+        while time.perf_counter() < stop_at:
+            block = len(blocks) - 1
+            start = time.perf_counter()
+            response = await client.post("/predict", json=payloads[i % len(payloads)])
+            assert response.status_code == 200, response.text
+            if len(blocks) - 1 == block:     # not across a switch
+                blocks[block][1].append((time.perf_counter() - start) * 1000)
+            i += concurrency
+
+    async def switch_loop():
+        while time.perf_counter() < stop_at:
+            api.shadow.fraction = 1.0 - api.shadow.fraction
+            blocks.append((api.shadow.fraction, []))
+            await asyncio.sleep(BLOCK_SECONDS)
+        api.shadow.fraction = 0.0
+
+    blocks.append((api.shadow.fraction, []))
+    await asyncio.gather(switch_loop(), *(client_loop(k) for k in range(concurrency)))
+    return {fraction: [np.array(values) for f, values in blocks[1:] if f == fraction and values]
+            for fraction in (0.0, 1.0)}
+
+
+async def drained(api):
+    while api.shadow.queue.qsize():
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(api.shadow.max_wait + 0.1)
+
+
+async def main(duration: float, concurrency: int):
+    from api import api, predict
+    from benchmarks.common import random_payloads
+
+    payloads = random_payloads(2000, seed=23)
+    transport = httpx.ASGITransport(app=api.app)
+    async with api.app.router.lifespan_context(api.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+            # Cost on the live path
+            blocks = await alternating_load(client, api, payloads, concurrency, duration)
+            block_p99 = {fraction: [np.percentile(block, 99) for block in blocks[fraction]] for fraction in blocks}
+            p99 = {fraction: np.median(values) for fraction, values in block_p99.items()}
+            print(f"{'shadow':<10} {'blocks':>7} {'requests':>9} {'p50 ms':>8} {'p99 ms':>8}")
+            for name, fraction in [("off", 0.0), ("fraction 1", 1.0)]:
+                values = np.concatenate(blocks[fraction])
+                print(f"{name:<10} {len(blocks[fraction]):>7} {len(values):>9} "
+                      f"{np.percentile(values, 50):>8.2f} {p99[fraction]:>8.2f}")
+            stats = (await client.get("/shadow")).json()
+            print(f"shadow rows scored {stats['scored']} in {stats['batches']} batches, dropped {stats['dropped']}")
+            q1, q3 = np.percentile(block_p99[0.0], [25, 75])
+            difference, noise = p99[1.0] - p99[0.0], q3 - q1
+            print(f"p99 difference: {difference:+.2f} ms, noise of the blocks without shadow: {noise:.2f} ms")
+            assert difference <= noise, "shadow scoring moves the p99 beyond the noise of the blocks without it"
+
+            # Deltas match the two models scored offline
+            await drained(api)
+            api.shadow.reset()
+            api.shadow.fraction = 1.0
+            for payload in payloads[:500]:
+                await client.post("/predict", json=payload)
+            await drained(api)
+            api.shadow.fraction = 0.0
+            stats = (await client.get("/shadow")).json()
+            rows = [predict.to_model_row(p) for p in payloads[:500]]
+            live = predict.make_batch_prediction(rows, version=predict.active_model())
+            shadow = predict.make_batch_prediction(rows, version=predict.candidate)
+            assert stats["overall"]["n"] == 500, stats["overall"]
+            assert np.isclose(stats["overall"]["mean_abs_delta"], np.mean(np.abs(shadow - live)), rtol=1e-4)
+            assert sum(s["n"] for s in stats["by_province"].values()) == 500
+            worst = max(stats["by_province"].items(), key=lambda item: item[1]["mean_rel_delta"])
+            print(f"v2 vs v1: mean |Δ| {stats['overall']['mean_abs_delta']:.0f} EUR, "
+                  f"mean relative {stats['overall']['mean_rel_delta']:.1%}, "
+                  f"largest in {worst[0]} ({worst[1]['mean_rel_delta']:.1%}): OK")
+
+            # A/B split: weight and stickiness
+            api.AB_CANDIDATE_WEIGHT = 0.3
+            served = [(await client.post("/predict", json=payloads[0])).json()["model_version"] for _ in range(1000)]
+            share = served.count("v2") / len(served)
+            sticky = {(await client.post("/predict", json=payloads[0], headers={"x-ab-key": "user-42"})).json()
+                      ["model_version"] for _ in range(50)}
+            assert abs(share - 0.3) < 0.05 and len(sticky) == 1, (share, sticky)
+            print(f"A/B weight 0.3: candidate served {share:.1%}, one side per X-AB-Key: OK")
+
+
+if __name__ == "__main__":
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 20.0
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    root = tempfile.mkdtemp(prefix="registry-")
+    try:
+        subprocess.run([sys.executable, "-m", "benchmarks.bench_hot_swap", "--build", root], check=True)
+        os.environ["MODEL_REGISTRY_PATH"] = root
+        os.environ["CANDIDATE_MODEL_VERSION"] = "v2"
+        os.environ.setdefault("PREDICTION_CACHE_SIZE", "0")   # every request reaches the model
+        asyncio.run(main(duration, concurrency))
+    finally:
+        shutil.rmtree(root)
@@ -0,0 +1,123 @@
+# ---------------------------------------------------------
+# BENCHMARK: Streamlit app reruns and per-session memory
+# Run from the project root:
+#   python -m benchmarks.bench_streamlit_app [--baseline REV] [--sessions N]
+# ---------------------------------------------------------
+# Fills in the three steps of app.py and predicts, with Streamlit's
+# AppTest (local model, no API_URL). A widget outside a form reruns
+# the script when it changes; a widget in an st.form waits for the
+# submit. --baseline runs the app.py of another git revision too.
+import argparse
+import gc
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+from benchmarks.common import random_payloads
+
+STREAMLIT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit")
+
+# Widgets of each step, in page order, and the button that ends the step
+STEPS = [
+    ([("selectbox", ["type", "subtype", "province", "state_of_building"])], "Next"),
+    ([("number_input", ["living_area", "number_of_bedrooms"]),
+      ("radio", ["has_equiped_kitchen", "is_furnished", "has_open_fire"])], "Next"),
+    ([("radio", ["has_terrace", "has_garden", "has_swimming_pool"]),
+      ("number_input", ["terrace_area", "number_facades"])], "Predict"),
+]
+
+
+def timed_run(at, times: list):
+    start = time.perf_counter()
+    at.run()
+    times.append((time.perf_counter() - start) * 1000)
+    assert not at.exception, at.exception
+
+
+def fill_in(app_path: str, payload: dict):
+    """
+    Opens the app, fills in every step and predicts. Returns the AppTest
+    and the milliseconds of every script run it took.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app_path, default_timeout=60)
+    times = []
+    timed_run(at, times)
+    for widgets, button in STEPS:
+        for kind, fields in widgets:
+            for i, field in enumerate(fields):
+                widget = getattr(at, kind)[i]
+                widget.set_value(payload[field])
+                if not widget.proto.form_id:   # outside a form: every change reruns
+                    timed_run(at, times)
+        next(b for b in at.button if button in b.label).click()
+        timed_run(at, times)
+    assert any("€" in md.value for md in at.markdown), "no price shown"
+    return at, times
+
+
+def per_session_kib(app_path: str, payloads: list) -> float:
+    """
+    Memory allocated and still held per completed session, after a first
+    session has filled the process-wide caches (model, image).
+    """
+    fill_in(app_path, payloads[0])
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    sessions = [fill_in(app_path, payload)[0] for payload in payloads[1:]]
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del sessions
+    return held / (len(payloads) - 1) / 1024
+
+
+def baseline_app(rev: str, folder: str) -> str:
+    source = subprocess.run(["git", "show", f"{rev}:streamlit/app.py"], check=True,
+                            capture_output=True, text=True).stdout
+    path = os.path.join(folder, "app_baseline.py")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(source)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--baseline", default=None, help="git revision of the app.py to compare with")
+    parser.add_argument("--sessions", type=int, default=10)
+    args = parser.parse_args()
+
+    try:
+        import streamlit as st
+    except ImportError:
+        sys.exit("streamlit is not installed")
+    logging.disable(logging.WARNING)   # "missing ScriptRunContext" warnings of bare-mode runs
+
+    # app.py opens its files relative to the streamlit folder and imports
+    # its modules from it; the local model only
+    os.environ.pop("API_URL", None)
+    sys.path.insert(0, STREAMLIT_DIR)
+    payloads = random_payloads(args.sessions + 1, seed=41)
+
+    with tempfile.TemporaryDirectory() as folder:
+        apps = [("current", os.path.join(STREAMLIT_DIR, "app.py"))]
+        if args.baseline:
+            apps.insert(0, (f"baseline {args.baseline}", baseline_app(args.baseline, folder)))
+
+        os.chdir(STREAMLIT_DIR)
+        print(f"{'app.py':<22} {'runs':>5} {'total ms':>9} {'run p50 ms':>11} {'KiB/session':>12}")
+        for name, path in apps:
+            st.cache_data.clear()
+            st.cache_resource.clear()
+            fill_in(path, payloads[0])     # process caches, imports
+            times = np.concatenate([fill_in(path, payload)[1] for payload in payloads[1:4]])
+            runs = len(times) // 3
+            kib = per_session_kib(path, payloads)
+            print(f"{name:<22} {runs:>5} {times.sum() / 3:>9.0f} {np.median(times):>11.1f} {kib:>12.0f}")
@@ -0,0 +1,168 @@
+# ---------------------------------------------------------
+# BENCHMARK: Streamlit rerun latency, local model vs. API client
+# Run from the project root: python -m benchmarks.bench_streamlit_client [n_calls]
+# ---------------------------------------------------------
+# The API is a local stub server answering /predict with a fixed
+# price (and /whatif with a flat grid), so only the client side is measured: connection reuse,
+# memoization and the fallback to the local model.
+import importlib.util
+import json
+import logging
+import os
+import pickle
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import requests
+
+from api.features import STATE_OF_BUILDING
+from benchmarks.common import random_payloads
+
+STREAMLIT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit")
+sys.path.insert(0, STREAMLIT_DIR)
+from api_client import ApiUnavailable, PriceClient  # noqa: E402
+
+STUB_ANSWER = {
+    "predicted_price": 350000.0,
+    "price_interval": {"lower": 300000.0, "upper": 410000.0, "coverage": 0.8},
+    "status": "success",
+}
+
+STUB_WHATIF = {
+    "fields": ["living_area", "state_of_building"],
+    "values": {"living_area": np.linspace(50, 200, 41).tolist(), "state_of_building": STATE_OF_BUILDING},
+    "predicted_price": [[350000.0] * len(STATE_OF_BUILDING)] * 41,
+    "status": "success",
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"     # keep-alive
+    disable_nagle_algorithm = True    # headers and body go out in separate writes
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        StubHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("content-length", 0)))
+        body = json.dumps(STUB_WHATIF if self.path == "/whatif" else STUB_ANSWER).encode()
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def per_call_ms(fn, payloads: list) -> float:
+    start = time.perf_counter()
+    for payload in payloads:
+        fn(payload)
+    return (time.perf_counter() - start) * 1000 / len(payloads)
+
+
+def client_calls(url: str, payloads: list):
+    print(f"{'client call':<30} {'ms/call':>8} {'connections':>12}")
+    for name, fn in [
+        ("new connection per call", lambda p: requests.post(f"{url}/predict", json=p, timeout=(2, 10)).json()),
+        ("pooled session", PriceClient(url).predict),
+    ]:
+        StubHandler.connections = 0
+        ms = per_call_ms(fn, payloads)
+        print(f"{name:<30} {ms:>8.3f} {StubHandler.connections:>12}")
+
+    # Reruns of a session repeat a few input sets (within the memo size)
+    repeated = payloads[:100] * 5
+    client = PriceClient(url)
+    per_call_ms(client.predict, repeated)
+    StubHandler.connections = 0
+    ms = per_call_ms(client.predict, repeated)
+    print(f"{'memoized (same inputs)':<30} {ms:>8.3f} {StubHandler.connections:>12}")
+
+
+def rerun_latencies(payload: dict, api_url: str, reruns: int = 5) -> tuple:
+    """
+    Milliseconds of the first "Predict" rerun of app.py, of `reruns`
+    further ones with the same inputs and of `reruns` reruns without a
+    click (AppTest, same process).
+    """
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    logging.disable(logging.WARNING)   # "missing ScriptRunContext" warnings of bare-mode runs
+    os.environ["API_URL"] = api_url
+    st.cache_resource.clear()
+
+    at = AppTest.from_file(os.path.join(STREAMLIT_DIR, "app.py"), default_timeout=60)
+    # Fields of steps 1-2 through the session state, step 3 through its widgets
+    at.session_state["step"] = 3
+    for field, value in payload.items():
+        at.session_state[field] = value
+    at.run()
+    for radio, field in zip(at.radio, ["has_terrace", "has_garden", "has_swimming_pool"]):
+        radio.set_value(payload[field])
+    for number, field in zip(at.number_input, ["terrace_area", "number_facades"]):
+        number.set_value(payload[field])
+
+    times = []
+    for _ in range(1 + reruns):
+        start = time.perf_counter()
+        next(b for b in at.button if "Predict" in b.label).click().run()
+        times.append((time.perf_counter() - start) * 1000)
+        assert not at.exception, at.exception
+        assert any("€" in md.value for md in at.markdown)
+
+    plain = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        plain.append((time.perf_counter() - start) * 1000)
+    return times[0], times[1:], plain
+
+
+if __name__ == "__main__":
+    n_calls = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    payloads = random_payloads(n_calls, seed=31)
+    server, url = start_stub()
+
+    client_calls(url, payloads)
+
+    # An unreachable API: one failed call (with retries), then the cooldown
+    # skips the API and the app goes straight to its local model
+    down = PriceClient("http://127.0.0.1:9", retries=2, backoff=0.05)
+    for label in ["first failure", "during cooldown"]:
+        start = time.perf_counter()
+        try:
+            down.predict(payloads[0])
+        except ApiUnavailable:
+            pass
+        print(f"unreachable API, {label}: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # What every rerun used to pay before the model was cached
+    os.chdir(STREAMLIT_DIR)
+    start = time.perf_counter()
+    with open("../models/xgb_pipeline.pkl", "rb") as file:
+        pickle.load(file)
+    print(f"model unpickle (paid by every rerun before): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    if importlib.util.find_spec("streamlit") is None:
+        sys.exit("streamlit is not installed: no rerun measurements")
+
+    print(f"{'app.py rerun (ms)':<30} {'1st predict':>12} {'next predict':>13} {'no click':>9}")
+    for name, api_url in [("local model", ""), ("API client", url), ("API down → local model", "http://127.0.0.1:9")]:
+        first, again, plain = rerun_latencies(payloads[0], api_url)
+        print(f"{name:<30} {first:>12.1f} {np.median(again):>13.1f} {np.median(plain):>9.1f}")
+
+    server.shutdown()
@@ -0,0 +1,49 @@
+# ---------------------------------------------------------
+# BENCHMARK: FullXGBPipeline.fit vs. fit_hist (float32 + hist)
+# Run from the project root: python -m benchmarks.bench_training [n_rows]
+# ---------------------------------------------------------
+import json
+import subprocess
+import sys
+
+# Each training run happens in a fresh interpreter so that its peak
+# memory (VmHWM) is measured on its own
+RUN = """
+import json, sys, time
+sys.path.insert(0, "streamlit")
+from utils import FullXGBPipeline
+from benchmarks.common import synthetic_training_data
+
+X, y = synthetic_training_data({n_rows}, seed=1)
+X_test, y_test = synthetic_training_data(20000, seed=2)
+open("/proc/self/clear_refs", "w").write("5")   # reset VmHWM to the current RSS
+start = time.perf_counter()
+model = FullXGBPipeline().{call}
+seconds = time.perf_counter() - start
+status = dict(line.split(":", 1) for line in open("/proc/self/status"))
+print(json.dumps({{
+    "seconds": seconds,
+    "peak_rss_mb": int(status["VmHWM"].split()[0]) / 1024,
+    "trees": model.model.get_booster().num_boosted_rounds(),
+    **{{k: float(v) for k, v in model.evaluate(X_test, y_test).items()}},
+}}))
+"""
+
+CALLS = {
+    "fit": "fit(X, y)",
+    "fit_hist": "fit_hist(X, y)",
+    "fit_hist + early stop": "fit_hist(X, y, early_stopping_rounds=30)",
+}
+
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    print(f"{n_rows} training rows")
+    print(f"{'method':<22} {'wall s':>8} {'peak MB':>9} {'trees':>6} {'MAE':>10} {'RMSE':>10} {'R2':>7}")
+    for name, call in CALLS.items():
+        code = RUN.format(n_rows=n_rows, call=call)
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{name:<22} {r['seconds']:>8.1f} {r['peak_rss_mb']:>9.0f} {r['trees']:>6} "
+              f"{r['MAE']:>10.0f} {r['RMSE']:>10.0f} {r['R2']:>7.4f}")
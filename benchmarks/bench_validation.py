@@ -0,0 +1,100 @@
+# ---------------------------------------------------------
+# BENCHMARK: request validation, regex patterns vs. the spec schema
+# Run from the project root: python -m benchmarks.bench_validation [n_rows]
+# ---------------------------------------------------------
+import sys
+import numpy as np
+from pydantic import BaseModel, Field, ValidationError
+
+from api.api import PropertyInput, validate_rows, PROPERTY_SUBTYPES, PROVINCES, STATE_OF_BUILDING, YES_NO
+from api.predict import to_model_row
+from benchmarks.common import random_payloads, timed
+
+
+# The schema before the shared feature spec: unanchored regex alternations
+class RegexPropertyInput(BaseModel):
+    type: str = Field(..., pattern="Apartment|House")
+    subtype: str = Field(..., pattern="|".join(PROPERTY_SUBTYPES))
+    province: str = Field(..., pattern="|".join(PROVINCES))
+    state_of_building: str = Field(..., pattern="|".join(STATE_OF_BUILDING))
+    living_area: float = Field(..., ge=18, le=2670)
+    number_of_bedrooms: int = Field(..., ge=1, le=50)
+    has_equiped_kitchen: str = Field(..., pattern="|".join(YES_NO))
+    is_furnished: str = Field(..., pattern="|".join(YES_NO))
+    has_open_fire: str = Field(..., pattern="|".join(YES_NO))
+    has_terrace: str = Field(..., pattern="|".join(YES_NO))
+    terrace_area: float = Field(..., ge=0, le=150)
+    has_garden: str = Field(..., pattern="|".join(YES_NO))
+    number_facades: int = Field(..., ge=1, le=4)
+    has_swimming_pool: str = Field(..., pattern="|".join(YES_NO))
+
+
+def per_row(model, rows: list) -> list:
+    # The old /predict/batch loop: one model object per row
+    valid = []
+    for row in rows:
+        try:
+            valid.append(to_model_row(model.model_validate(row).model_dump()))
+        except ValidationError:
+            pass
+    return valid
+
+
+def spec_batch(rows: list) -> list:
+    _, valid_rows, _ = validate_rows(rows)
+    return [to_model_row(row) for row in valid_rows]
+
+
+def with_invalid(payloads: list, share: float, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    rows = [dict(p) for p in payloads]
+    for i in np.flatnonzero(rng.random(len(rows)) < share):
+        rows[i]["number_of_bedrooms"] = 0
+    return rows
+
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    payloads = random_payloads(n_rows, seed=17)
+
+    # Near-miss values passed the regexes and were label-encoded to -1
+    for field, value in [("subtype", "Villager"), ("province", "Namurville"), ("has_garden", "Yesterday")]:
+        bad = dict(payloads[0], **{field: value})
+        RegexPropertyInput.model_validate(bad)
+        try:
+            PropertyInput.model_validate(bad)
+            raise AssertionError(f"{field}={value!r} was accepted")
+        except ValidationError:
+            pass
+    print("near-miss values rejected: OK")
+
+    # Same model rows from both schemas, and per-row errors by index
+    rows = with_invalid(payloads[:2000], 0.05)
+    assert per_row(RegexPropertyInput, rows) == spec_batch(rows)
+    valid_index, _, errors = validate_rows(rows)
+    assert sorted(valid_index + list(errors)) == list(range(len(rows)))
+    assert all(e[0]["loc"] == ("number_of_bedrooms",) for e in errors.values())
+    print("same model rows as the regex schema: OK")
+
+    single = payloads[:2000]
+    print(f"{'validation':<44} {'rows':>7} {'rows/s':>11} {'speed-up':>9}")
+    for name, cases in [
+        ("single payload", [
+            ("regex model", lambda: [RegexPropertyInput.model_validate(p) for p in single], single),
+            ("spec model", lambda: [PropertyInput.model_validate(p) for p in single], single),
+        ]),
+        ("batch", [
+            ("regex model per row", lambda: per_row(RegexPropertyInput, payloads), payloads),
+            ("spec model per row", lambda: per_row(PropertyInput, payloads), payloads),
+            ("spec TypeAdapter batch", lambda: spec_batch(payloads), payloads),
+        ]),
+        ("batch, 5% invalid", [
+            ("regex model per row", lambda: per_row(RegexPropertyInput, rows), rows),
+            ("spec TypeAdapter batch", lambda: spec_batch(rows), rows),
+        ]),
+    ]:
+        base = None
+        for label, fn, data in cases:
+            rate = len(data) / timed(fn)
+            base = base or rate
+            print(f"{name + ': ' + label:<44} {len(data):>7} {rate:>11.0f} {rate / base:>8.2f}x")
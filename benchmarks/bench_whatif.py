@@ -0,0 +1,72 @@
+# ---------------------------------------------------------
+# BENCHMARK: one /whatif sweep vs. one /predict call per point
+# Run from the project root: python -m benchmarks.bench_whatif [points]
+# ---------------------------------------------------------
+# A 100-point living area sweep of one property, asked as one /whatif
+# call and as 100 /predict calls (the prediction cache is off, so every
+# call reaches the model), and the same for the local model of the
+# Streamlit app: one predict call on the grid vs. one per point. Both
+# must give the same prices; a two-field sweep (living area × every
+# state of the building) is timed too.
+import os
+import pickle
+import sys
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("PREDICTION_CACHE_SIZE", "0")
+
+from api import predict  # noqa: E402
+from api.api import app  # noqa: E402
+from api.features import STATE_OF_BUILDING  # noqa: E402
+from benchmarks.common import random_payloads, timed  # noqa: E402
+
+client = TestClient(app)
+
+
+def single_calls(base: dict, areas: list) -> list:
+    return [client.post("/predict", json={**base, "living_area": area}).json()["predicted_price"]
+            for area in areas]
+
+
+def one_sweep(base: dict, sweep: list) -> dict:
+    response = client.post("/whatif", json={"base": base, "sweep": sweep})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+if __name__ == "__main__":
+    n_points = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    base = random_payloads(1, seed=25)[0]
+    sweep = [{"field": "living_area", "start": 40, "stop": 400, "points": n_points}]
+    areas = one_sweep(base, sweep)["values"]["living_area"]
+
+    # Same prices both ways
+    curve = one_sweep(base, sweep)["predicted_price"]
+    assert np.allclose(curve, single_calls(base, areas), rtol=1e-6), "/whatif and /predict prices differ"
+
+    t_single = timed(single_calls, base, areas, repeat=1)
+    t_sweep = timed(one_sweep, base, sweep)
+    grid_sweep = sweep + [{"field": "state_of_building"}]
+    t_grid = timed(one_sweep, base, grid_sweep)
+
+    print(f"points: {n_points}")
+    print(f"{n_points} x /predict        : {t_single * 1000:9.1f} ms")
+    print(f"1 x /whatif             : {t_sweep * 1000:9.1f} ms  ({t_single / t_sweep:5.1f}x faster)")
+    print(f"1 x /whatif, x {len(STATE_OF_BUILDING)} states : {t_grid * 1000:9.1f} ms")
+
+    # The Streamlit app without API: FullXGBPipeline.predict on the grid at once
+    if os.path.exists(predict.MODEL_PATH):
+        sys.path.insert(0, os.path.join(predict.PROJECT_ROOT, "streamlit"))
+        with open(predict.MODEL_PATH, "rb") as file:
+            model = pickle.load(file)
+        # The input frame of the Streamlit app, one row per point
+        grid = pd.DataFrame([predict.to_model_row({**base, "living_area": area}) for area in areas],
+                            columns=predict.MODEL_ORDER)
+        rows = [grid.iloc[[i]] for i in range(len(grid))]
+        assert np.allclose(model.predict(grid), [model.predict(row)[0] for row in rows], rtol=1e-6)
+        t_rows = timed(lambda: [model.predict(row) for row in rows], repeat=1)
+        t_once = timed(model.predict, grid)
+        print(f"{n_points} x model.predict  : {t_rows * 1000:9.1f} ms")
+        print(f"1 x model.predict       : {t_once * 1000:9.1f} ms  ({t_rows / t_once:5.1f}x faster)")
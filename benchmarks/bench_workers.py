@@ -0,0 +1,101 @@
+# ---------------------------------------------------------
+# BENCHMARK: gunicorn workers, per-worker memory and throughput
+# Run from the project root (Linux, needs gunicorn):
+#   python -m benchmarks.bench_workers            # 1, 2, 4 and 8 workers
+# ---------------------------------------------------------
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import httpx
+import numpy as np
+
+from benchmarks.common import random_payloads
+
+PORT = 8799
+WORKER_COUNTS = [1, 2, 4, 8]
+
+
+def memory_mb(pid: int) -> dict:
+    """
+    RSS counts shared pages in full, PSS splits them between the processes
+    sharing them (so PSS shows what copy-on-write saves).
+    """
+    rollup = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                rollup[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {"rss": rollup["Rss"], "pss": rollup["Pss"]}
+
+
+def worker_pids(master_pid: int) -> list:
+    with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+async def load(payloads: list, concurrency: int, duration: float) -> float:
+    done = 0
+    stop_at = time.perf_counter() + duration
+
+    async def client_loop(client, offset):
+        nonlocal done
+        i = offset
+        while time.perf_counter() < stop_at:
+            await client.post("/predict", json=payloads[i % len(payloads)])
+            done += 1
+            i += concurrency
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client, k) for k in range(concurrency)))
+        return done / (time.perf_counter() - started)
+
+
+def wait_until_up(timeout: float = 60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{PORT}/", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    raise RuntimeError("gunicorn did not start")
+
+
+def run(workers: int, payloads: list, duration: float) -> dict:
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(PORT),
+               PREDICTION_CACHE_SIZE="0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "api/gunicorn.conf.py", "api.api:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_up()
+        throughput = asyncio.run(load(payloads, concurrency=8 * workers, duration=duration))
+        memory = [memory_mb(pid) for pid in worker_pids(server.pid)]
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        "workers": workers,
+        "throughput_rps": throughput,
+        "worker_rss_mb": float(np.mean([m["rss"] for m in memory])),
+        "worker_pss_mb": float(np.mean([m["pss"] for m in memory])),
+    }
+
+
+if __name__ == "__main__":
+    counts = [int(c) for c in sys.argv[1].split(",")] if len(sys.argv) > 1 else WORKER_COUNTS
+    payloads = random_payloads(5000)
+
+    print(f"INFERENCE_MODE={os.getenv('INFERENCE_MODE', 'booster')}, {os.cpu_count()} cores")
+    print(f"{'workers':>8} {'req/s':>10} {'RSS/worker MB':>15} {'PSS/worker MB':>15}")
+    for workers in counts:
+        r = run(workers, payloads, duration=5.0)
+        print(f"{r['workers']:>8} {r['throughput_rps']:>10.0f} "
+              f"{r['worker_rss_mb']:>15.1f} {r['worker_pss_mb']:>15.1f}")
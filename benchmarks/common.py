@@ -0,0 +1,79 @@
+# ---------------------------------------------------------
+# SHARED HELPERS FOR THE BENCHMARK SCRIPTS
+# ---------------------------------------------------------
+import time
+import numpy as np
+
+from api.api import (
+    PROPERTY_TYPES, PROPERTY_SUBTYPES, PROVINCES, STATE_OF_BUILDING, YES_NO
+)
+
+
+def random_payloads(n: int, seed: int = 0) -> list:
+    """
+    Draws n synthetic PropertyInput payloads from the allowed value lists.
+    """
+    columns = random_columns(n, seed)
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def random_columns(n: int, seed: int = 0) -> dict:
+    """
+    The payloads of `random_payloads` as one list per field.
+    """
+    rng = np.random.default_rng(seed)
+
+    def pick(options):
+        return [options[i] for i in rng.integers(0, len(options), n)]
+
+    return {
+        "type": pick(PROPERTY_TYPES),
+        "subtype": pick(PROPERTY_SUBTYPES),
+        "province": pick(PROVINCES),
+        "state_of_building": pick(STATE_OF_BUILDING),
+        "living_area": np.round(rng.uniform(18, 400, n), 1).tolist(),
+        "number_of_bedrooms": rng.integers(1, 7, n).tolist(),
+        "has_equiped_kitchen": pick(YES_NO),
+        "is_furnished": pick(YES_NO),
+        "has_open_fire": pick(YES_NO),
+        "has_terrace": pick(YES_NO),
+        "terrace_area": np.round(rng.uniform(0, 60, n), 1).tolist(),
+        "has_garden": pick(YES_NO),
+        "number_facades": rng.integers(1, 5, n).tolist(),
+        "has_swimming_pool": pick(YES_NO),
+    }
+
+
+def synthetic_training_data(n: int, seed: int = 0):
+    """
+    Training-style frame (model column names, some missing values) and
+    prices with a plausible structure, for training benchmarks.
+    """
+    import pandas as pd
+    from api.predict import to_model_row, MODEL_ORDER
+
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame.from_records([to_model_row(p) for p in random_payloads(n, seed)],
+                                  columns=MODEL_ORDER)
+    X.loc[rng.random(n) < 0.05, "living_area (m²)"] = np.nan
+    X.loc[rng.random(n) < 0.10, "state_of_building"] = None
+
+    area = X["living_area (m²)"].fillna(120).to_numpy()
+    province_factor = X["province"].map({"Brussels": 1.3, "Brabant-Wallon": 1.25,
+                                         "Flemish-Brabant": 1.2, "Antwerp": 1.1}).fillna(0.9)
+    y = (2500 * area + 15000 * X["number_of_bedrooms"] + 40000 * X["swimming_pool (yes:1, no:0)"]
+         + 20000 * X["garden (yes:1, no:0)"]) * province_factor
+    y = (y * np.exp(rng.normal(0, 0.15, n))).clip(lower=30000)
+    return X, y
+
+
+def timed(fn, *args, repeat: int = 3, **kwargs) -> float:
+    """
+    Returns the best wall time in seconds over `repeat` calls of fn.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
@@ -0,0 +1,127 @@
+# ---------------------------------------------------------
+# LOAD TEST: in-process ASGI load generator for /predict
+# Run from the project root:
+#   python -m benchmarks.load_test                 # current env settings
+#   python -m benchmarks.load_test --compare       # thread / process executor vs. micro-batching
+# While the load runs, a probe client calls the health check `/` every
+# 10 ms: its latency should stay flat up to and past saturation.
+# ---------------------------------------------------------
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+import httpx
+
+from benchmarks.common import random_payloads
+
+CONFIGS = {
+    "thread pool": {"MICRO_BATCHING": "0", "MODEL_EXECUTOR": "thread"},
+    "process pool": {"MICRO_BATCHING": "0", "MODEL_EXECUTOR": "process"},
+    "micro-batch": {"MICRO_BATCHING": "1", "MODEL_EXECUTOR": "thread"},
+}
+
+# Seconds between two health-check probes
+PROBE_INTERVAL = 0.01
+
+
+async def run_load(app, payloads: list, concurrency: int, duration: float,
+                   path: str = "/predict", probe: str = "/") -> dict:
+    """
+    `concurrency` clients post payloads back to back for `duration`
+    seconds; returns latency percentiles (ms), throughput and errors,
+    and the latency of the `probe` GETs sent meanwhile.
+    """
+    latencies = []
+    probe_latencies = []
+    statuses = {}
+    stop_at = None
+
+    async def client_loop(client, offset):
+        i = offset
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            response = await client.post(path, json=payloads[i % len(payloads)])
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            i += concurrency
+
+    async def probe_loop(client):
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            await client.get(probe)
+            probe_latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(PROBE_INTERVAL)
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # The clock starts once the app (and its executor) is up
+            started = time.perf_counter()
+            stop_at = started + duration
+            loops = [client_loop(client, k) for k in range(concurrency)]
+            if probe:
+                loops.append(probe_loop(client))
+            await asyncio.gather(*loops)
+            elapsed = time.perf_counter() - started
+
+    latencies = np.array(latencies) * 1000
+    probe_latencies = np.array(probe_latencies or [np.nan]) * 1000
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "probe_p50_ms": float(np.percentile(probe_latencies, 50)),
+        "probe_p99_ms": float(np.percentile(probe_latencies, 99)),
+        "statuses": statuses,
+    }
+
+
+def run_config(name: str, concurrency: list, duration: float) -> list:
+    # Each config runs in a fresh interpreter so the API reads its env
+    env = dict(os.environ, PREDICTION_CACHE_SIZE="0", **CONFIGS[name])
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.load_test", "--json",
+         "--concurrency", ",".join(map(str, concurrency)), "--duration", str(duration)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def print_results(name: str, results: list):
+    for r in results:
+        print(f"{name:<14} {r['concurrency']:>6} {r['throughput_rps']:>10.0f} "
+              f"{r['p50_ms']:>10.2f} {r['p99_ms']:>10.2f} {r['probe_p50_ms']:>10.2f} "
+              f"{r['probe_p99_ms']:>10.2f}   {r['statuses']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", default="1,8,32,128")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    header = (f"{'config':<14} {'conc.':>6} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} "
+              f"{'/ p50 ms':>10} {'/ p99 ms':>10}")
+    if args.compare:
+        print(header)
+        for name in CONFIGS:
+            print_results(name, run_config(name, levels, args.duration))
+    else:
+        from api.api import app
+
+        payloads = random_payloads(5000)
+        results = [asyncio.run(run_load(app, payloads, c, args.duration)) for c in levels]
+        if args.json:
+            print(json.dumps(results))
+        else:
+            print(header)
+            print_results("current", results)
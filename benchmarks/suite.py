@@ -0,0 +1,237 @@
+# ---------------------------------------------------------
+# BENCHMARK SUITE: micro, artifact and service levels, with baseline
+# Run from the project root (with the model in models/):
+#   python -m benchmarks.suite                          # → benchmarks/results/latest.json
+#   python -m benchmarks.suite --save-baseline          # also store it as the baseline
+#   python -m benchmarks.suite --levels micro --quick   # subset, fewer sizes / shorter load
+# ---------------------------------------------------------
+# micro    → FullXGBPipeline.transform / predict (pandas path) and the
+#            serving path (EncodingPlan.encode_rows + predict_encoded)
+#            at batch sizes 1 … 100k
+# artifact → cold start and peak RSS of loading the pickle (and the
+#            bundle, when models/xgb_bundle exists)
+# service  → in-process ASGI load on /predict at fixed concurrency
+#
+# Every input is a synthetic PropertyInput payload drawn with a fixed
+# seed from the allowed value lists of api/api.py; nothing needs the
+# network. Each run is compared with the stored baseline: a metric
+# worse by more than --tolerance is a regression (exit code 1).
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_artifacts import LOADERS, measure
+from benchmarks.common import random_payloads
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+LATEST_PATH = os.path.join(RESULTS_DIR, "latest.json")
+BASELINE_PATH = os.path.join(RESULTS_DIR, "baseline.json")
+
+BATCH_SIZES = [1, 10, 100, 1_000, 10_000, 100_000]
+QUICK_BATCH_SIZES = [1, 100, 10_000]
+CONCURRENCY = [1, 8, 32]
+SEED = 2024
+
+# Repeat a timed call until this much time is spent (at most MAX_REPEATS)
+MIN_SECONDS = 0.5
+MIN_REPEATS = 3
+MAX_REPEATS = 200
+
+# Changes smaller than this are timer noise, whatever their ratio
+NOISE_FLOOR_MS = 0.1
+
+
+def median_ms(fn, *args) -> float:
+    times = []
+    spent = 0.0
+    while len(times) < MIN_REPEATS or (spent < MIN_SECONDS and len(times) < MAX_REPEATS):
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+        spent += times[-1]
+    return float(np.median(times) * 1000)
+
+
+# ----------------------------------------
+# LEVELS
+# ----------------------------------------
+def micro(batch_sizes: list) -> dict:
+    import pickle
+    from api.predict import MODEL_PATH, plan, predict_encoded, to_model_row, MODEL_ORDER
+
+    sys.path.insert(0, os.path.join(os.path.dirname(MODEL_PATH), "..", "streamlit"))
+    with open(MODEL_PATH, "rb") as f:
+        pipeline = pickle.load(f)
+
+    rows = [to_model_row(p) for p in random_payloads(max(batch_sizes), seed=SEED)]
+    frame = pd.DataFrame.from_records(rows, columns=MODEL_ORDER)
+
+    results = {}
+    for n in batch_sizes:
+        df, chunk = frame.iloc[:n], rows[:n]
+        X = plan.encode_rows(chunk)
+        results[f"micro.pipeline_transform.{n}.ms"] = median_ms(pipeline.transform, df)
+        results[f"micro.pipeline_predict.{n}.ms"] = median_ms(pipeline.predict, df)
+        results[f"micro.encode_rows.{n}.ms"] = median_ms(plan.encode_rows, chunk)
+        results[f"micro.predict_encoded.{n}.ms"] = median_ms(predict_encoded, X)
+        print(f"  micro {n:>7} rows: transform {results[f'micro.pipeline_transform.{n}.ms']:.3f} ms, "
+              f"predict {results[f'micro.pipeline_predict.{n}.ms']:.3f} ms, "
+              f"serving {results[f'micro.encode_rows.{n}.ms'] + results[f'micro.predict_encoded.{n}.ms']:.3f} ms")
+    return results
+
+
+def artifact() -> dict:
+    results = {}
+    for name, statement in LOADERS.items():
+        if name.startswith("bundle") and not os.path.isdir("models/xgb_bundle"):
+            continue
+        # Median of 3 fresh interpreters
+        runs = [measure(statement) for _ in range(3)]
+        key = name.replace(" ", "_").replace("(", "").replace(")", "").replace(".", "_")
+        results[f"artifact.{key}.load_s"] = float(np.median([r["seconds"] for r in runs]))
+        results[f"artifact.{key}.peak_rss_mb"] = float(np.median([r["max_rss_mb"] for r in runs]))
+        print(f"  artifact {name}: {results[f'artifact.{key}.load_s']:.3f} s, "
+              f"{results[f'artifact.{key}.peak_rss_mb']:.0f} MB")
+    return results
+
+
+def service(concurrency: list, duration: float) -> dict:
+    from api import predict
+    from api.api import app
+    from benchmarks.load_test import run_load
+
+    # Every request reaches the model
+    predict.prediction_cache.maxsize = 0
+
+    payloads = random_payloads(5000, seed=SEED)
+    results = {}
+    for c in concurrency:
+        r = asyncio.run(run_load(app, payloads, c, duration, probe=None))
+        assert set(r["statuses"]) == {200}, r["statuses"]
+        results[f"service.predict.c{c}.p50_ms"] = r["p50_ms"]
+        results[f"service.predict.c{c}.p99_ms"] = r["p99_ms"]
+        results[f"service.predict.c{c}.throughput_rps"] = r["throughput_rps"]
+        print(f"  service c={c}: {r['throughput_rps']:.0f} req/s, p50 {r['p50_ms']:.2f} ms, p99 {r['p99_ms']:.2f} ms")
+    return results
+
+
+# ----------------------------------------
+# RESULTS AND BASELINE
+# ----------------------------------------
+def machine() -> dict:
+    """
+    CPU model, cores and memory of the machine the results come from.
+    """
+    cpu, memory_gb = platform.processor() or platform.machine(), None
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+        with open("/proc/meminfo", encoding="utf-8") as f:
+            memory_gb = round(int(next(line for line in f if line.startswith("MemTotal")).split()[1]) / 2 ** 20, 1)
+    except (OSError, StopIteration):
+        pass
+    return {"cpu": cpu, "cpu_count": os.cpu_count(), "memory_gb": memory_gb}
+
+
+def environment() -> dict:
+    import sklearn
+    import xgboost
+
+    def git_commit():
+        try:
+            return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": machine(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scikit-learn": sklearn.__version__,
+        "xgboost": xgboost.__version__,
+        "env": {k: v for k, v in os.environ.items()
+                if k in ("INFERENCE_MODE", "PREDICT_NTHREAD", "MODEL_EXECUTOR", "MICRO_BATCHING")},
+    }
+
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith("_rps")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Prints every metric next to its baseline; returns the regressions
+    (worse than the baseline by more than `tolerance`, relative, and for
+    latencies by more than NOISE_FLOOR_MS).
+    """
+    regressions = []
+    print(f"{'metric':<48} {'baseline':>11} {'now':>11} {'change':>8}")
+    for metric, value in results.items():
+        base = baseline.get(metric)
+        if base is None or base == 0:
+            print(f"{metric:<48} {'-':>11} {value:>11.4g} {'new':>8}")
+            continue
+        change = value / base - 1
+        worse = -change if higher_is_better(metric) else change
+        regressed = worse > tolerance and not (metric.endswith("ms") and value - base < NOISE_FLOOR_MS)
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{metric:<48} {base:>11.4g} {value:>11.4g} {change:>+8.1%}{flag}")
+        if regressed:
+            regressions.append(metric)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark suite")
+    parser.add_argument("--levels", default="micro,artifact,service")
+    parser.add_argument("--quick", action="store_true", help="fewer batch sizes, 2 s load per level")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of load per concurrency level")
+    parser.add_argument("--output", default=LATEST_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+    levels = args.levels.split(",")
+
+    results = {}
+    if "micro" in levels:
+        results.update(micro(QUICK_BATCH_SIZES if args.quick else BATCH_SIZES))
+    if "artifact" in levels:
+        results.update(artifact())
+    if "service" in levels:
+        results.update(service(CONCURRENCY, 2.0 if args.quick else args.duration))
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"results → {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+        print(f"baseline → {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["environment"].get("machine") != machine():
+            print(f"baseline from another machine ({baseline['environment'].get('machine')}): "
+                  f"store one here with --save-baseline for a meaningful comparison")
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            sys.exit(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        print(f"no regression beyond {args.tolerance:.0%} (baseline from {baseline['environment']['commit']})")
+    else:
+        print(f"no baseline at {args.baseline} (store one with --save-baseline)")
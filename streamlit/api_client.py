@@ -0,0 +1,148 @@
+# ---------------------------------------------------------
+# PRICE API CLIENT (Streamlit → FastAPI)
+# ---------------------------------------------------------
+# Streamlit re-runs app.py on every widget interaction, so the
+# client is created once per process (st.cache_resource in app.py)
+# and keeps one pooled keep-alive session to the API:
+#
+#   * connect / read timeouts on every call
+#   * retries with backoff on connection errors and 502/503/504
+#     (honouring the API's Retry-After)
+#   * an LRU memo of the answers per input set, so reruns with the
+#     same fields don't call the API again. The client is shared by
+#     every session thread, so the memo is guarded by a lock. Entries
+#     expire after API_MEMO_TTL seconds, so a model hot-swap on the
+#     server is picked up within that time (the answers of an A/B
+#     split name alternating versions, so they can't key the memo)
+#   * after a failure the API is skipped for API_COOLDOWN seconds,
+#     so the app falls back to its local model without waiting on
+#     retries at every rerun
+import os
+import threading
+import time
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class ApiUnavailable(Exception):
+    """
+    Raised when the API can't answer (unreachable, timed out, 5xx).
+    """
+
+
+class PriceClient:
+    def __init__(self, base_url: str, connect_timeout: float = 2.0, read_timeout: float = 10.0,
+                 retries: int = 2, backoff: float = 0.2, cooldown: float = 30.0,
+                 pool_size: int = 4, memo_size: int = 256, memo_ttl: float = 60.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.cooldown = cooldown
+        self.memo_size = memo_size
+        self.memo_ttl = memo_ttl
+        self.memo = OrderedDict()       # input set → (API answer, expiry time)
+        self.lock = threading.Lock()    # one client for every session thread
+        self.down_until = 0.0
+        self.calls = 0
+        self.memo_hits = 0
+        self.failures = 0
+
+        retry = Retry(
+            total=retries, connect=retries, read=retries, status=retries,
+            backoff_factor=backoff, status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST"}), raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def predict(self, payload: dict) -> dict:
+        """
+        The API's /predict answer for one property (API field names,
+        Yes/No flags). Raises ApiUnavailable when the API can't answer
+        and ValueError when it rejects the payload.
+        """
+        return self.post("/predict", payload, tuple(sorted(payload.items())))
+
+    def whatif(self, payload: dict, sweep: list) -> dict:
+        """
+        The API's /whatif answer: the prices of one property with one or
+        two fields swept, e.g. [{"field": "living_area", "start": 60,
+        "stop": 180, "points": 41}, {"field": "state_of_building"}].
+        """
+        key = ("whatif", tuple(sorted(payload.items())), repr(sweep))
+        return self.post("/whatif", {"base": payload, "sweep": sweep}, key)
+
+    def post(self, path: str, body: dict, key) -> dict:
+        # One memoized, retried call; `key` identifies the answer in the memo
+        cached = self.memo_get(key)
+        if cached is not None:
+            return cached
+
+        if time.monotonic() < self.down_until:
+            raise ApiUnavailable("API marked unavailable after a recent failure")
+
+        self.calls += 1
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=body, timeout=self.timeout)
+        except requests.RequestException as e:
+            self.mark_down()
+            raise ApiUnavailable(f"API unreachable: {e}")
+
+        if response.status_code == 422:
+            raise ValueError(f"Invalid input: {response.json().get('detail')}")
+        if response.status_code != 200:
+            self.mark_down()
+            raise ApiUnavailable(f"API answered {response.status_code}")
+
+        result = response.json()
+        self.memo_set(key, result)
+        return result
+
+    def memo_get(self, key):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.memo.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self.memo[key]
+                return None
+            self.memo.move_to_end(key)
+            self.memo_hits += 1
+            return entry[0]
+
+    def memo_set(self, key, result: dict):
+        with self.lock:
+            self.memo[key] = (result, time.monotonic() + self.memo_ttl)
+            self.memo.move_to_end(key)
+            while len(self.memo) > self.memo_size:
+                self.memo.popitem(last=False)
+
+    def mark_down(self):
+        self.failures += 1
+        self.down_until = time.monotonic() + self.cooldown
+
+    def close(self):
+        self.session.close()
+
+
+def client_from_env():
+    """
+    A PriceClient for API_URL, or None (local model only) when it is not
+    set. API_CONNECT_TIMEOUT, API_READ_TIMEOUT, API_RETRIES, API_COOLDOWN
+    and API_MEMO_TTL tune it.
+    """
+    base_url = os.getenv("API_URL", "")
+    if not base_url:
+        return None
+    return PriceClient(
+        base_url,
+        connect_timeout=float(os.getenv("API_CONNECT_TIMEOUT", "2")),
+        read_timeout=float(os.getenv("API_READ_TIMEOUT", "10")),
+        retries=int(os.getenv("API_RETRIES", "2")),
+        cooldown=float(os.getenv("API_COOLDOWN", "30")),
+        memo_ttl=float(os.getenv("API_MEMO_TTL", "60")),
+    )
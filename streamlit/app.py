@@ -1,11 +1,25 @@
 from utils import FullXGBPipeline
+from api_client import ApiUnavailable, client_from_env
+from api.features import (  # shared feature spec (utils puts the project root on sys.path)
+    FEATURES, FEATURES_BY_NAME, PROPERTY_TYPES, PROPERTY_SUBTYPES, PROVINCES,
+    STATE_OF_BUILDING, YES_NO, flag_value
+)
 from PIL import Image
 import streamlit as st
+import io
+import os
 import pickle
 import pandas as pd
 import numpy as np
 
+# Streamlit re-executes this whole script on every interaction: anything
+# expensive below is cached for the process (st.cache_resource/cache_data),
+# and each step is an st.form, so a step runs the script once when it is
+# submitted instead of once per widget.
+st.set_page_config(page_title="Property Pricing Predictor", page_icon="🏡", layout="centered")
+
 # --- 1. CSS INJECTION FOR THE BUTTON STYLE AND ANIMATION ---
+# (part of the page: Streamlit needs it on every run, it is a constant string)
 st.markdown("""
 <style>
 /* CSS for the animated gradient button */
@@ -17,7 +31,7 @@ st.markdown("""
     width: 100%; /* Ensure the container spans full width to center effectively */
 }
 
-.stButton > button {
+.stButton > button, .stFormSubmitButton > button {
     /* Base styles for the Streamlit button element */
     width: 250px;
     height: 60px;
@@ -39,7 +53,7 @@ st.markdown("""
 }
 
 /* Hover Effect: The "Jump Out" and speed up animation */
-.stButton > button:hover {
+.stButton > button:hover, .stFormSubmitButton > button:hover {
     transform: scale(1.08) translateY(-3px); /* Jump out (scale and slight lift) */
     box-shadow: 0 8px 15px rgba(0, 0, 0, 0.4); /* Deeper shadow */
     animation: gradientShift 4s ease infinite; /* Speed up gradient movement on hover */
@@ -55,21 +69,113 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 #-----------------------
-# Load the trained model
+# Price backend
 #-----------------------
-with open("../models/xgb_pipeline.pkl", "rb") as file:
-    model = pickle.load(file)
+# With API_URL set, prices come from the FastAPI backend through one
+# pooled client per process (see api_client.py); the local model is only
+# loaded without API_URL, or when the API can't answer. Both are cached
+# for the whole process: Streamlit reruns this script on every click.
+@st.cache_resource
+def load_client():
+    return client_from_env()
+
+
+@st.cache_resource
+def load_model():
+    with open("../models/xgb_pipeline.pkl", "rb") as file:
+        return pickle.load(file)
+
+
+def local_prediction(input_df):
+    """
+    (prediction, lower, upper, coverage) from the local model; no
+    bounds or coverage for older models without intervals.
+    """
+    model = load_model()
+    prediction, lower, upper = model.predict_interval(input_df)
+    if lower is None:
+        return prediction[0], None, None, None
+    return prediction[0], lower[0], upper[0], model.intervals.coverage
+
+
+def api_prediction(payload):
+    """
+    The same from the API's /predict answer.
+    """
+    response = load_client().predict(payload)
+    interval = response.get("price_interval")
+    if interval is None:
+        return response["predicted_price"], None, None, None
+    return response["predicted_price"], interval["lower"], interval["upper"], interval["coverage"]
+
+
+# What-if curves: the price by living area (half to twice the property's),
+# one line per state of the building, all from one /whatif call – or one
+# local predict call on the same grid
+WHATIF_POINTS = 41
+
+
+def whatif_sweep(living_area):
+    area = FEATURES_BY_NAME["living_area"]
+    return [
+        {"field": "living_area", "start": max(area.minimum, round(living_area / 2)),
+         "stop": min(area.maximum, round(living_area * 2)), "points": WHATIF_POINTS},
+        {"field": "state_of_building"},
+    ]
+
+
+def api_whatif(payload, sweep):
+    """
+    Prices of the what-if grid from the API: living areas as the index,
+    one column per state of the building.
+    """
+    response = load_client().whatif(payload, sweep)
+    values = response["values"]
+    return pd.DataFrame(response["predicted_price"], index=values["living_area"],
+                        columns=values["state_of_building"])
+
+
+def local_whatif(input_df, sweep):
+    """
+    The same from the local model, the whole grid in one predict call.
+    """
+    areas = np.linspace(sweep[0]["start"], sweep[0]["stop"], sweep[0]["points"])
+    grid = input_df.loc[input_df.index.repeat(len(areas) * len(STATE_OF_BUILDING))].reset_index(drop=True)
+    grid["living_area (m²)"] = np.repeat(areas, len(STATE_OF_BUILDING))
+    grid["state_of_building"] = np.tile(STATE_OF_BUILDING, len(areas))
+    prices = load_model().predict(grid)
+    return pd.DataFrame(prices.reshape(len(areas), len(STATE_OF_BUILDING)), index=areas,
+                        columns=STATE_OF_BUILDING)
+
 
 # ----------------------------
 # SIDEBAR CONTENT
 # ----------------------------
-with st.sidebar:
-    # Load image from project folder
-    image = Image.open("assets/sidebar_image_immo_eliza.png")
+SIDEBAR_IMAGE = "assets/sidebar_image_immo_eliza.png"           # 1024 px original
+SIDEBAR_IMAGE_SMALL = "assets/sidebar_image_immo_eliza_small.jpg"  # pre-resized copy
+SIDEBAR_IMAGE_WIDTH = 480  # about twice the sidebar width (sharp on HiDPI screens)
+
+
+@st.cache_data
+def sidebar_image():
+    """
+    JPEG bytes of the sidebar image at SIDEBAR_IMAGE_WIDTH, read once per
+    process: the pre-resized copy, else resized from the original.
+    """
+    if os.path.exists(SIDEBAR_IMAGE_SMALL):
+        with open(SIDEBAR_IMAGE_SMALL, "rb") as file:
+            return file.read()
+    with Image.open(SIDEBAR_IMAGE) as image:
+        image.thumbnail((SIDEBAR_IMAGE_WIDTH, SIDEBAR_IMAGE_WIDTH))
+        buffer = io.BytesIO()
+        image.convert("RGB").save(buffer, "JPEG", quality=85, optimize=True)
+    return buffer.getvalue()
+
 
+with st.sidebar:
     # Center the image using markdown container
     st.markdown("<div style='text-align: center;'>", unsafe_allow_html=True)
-    st.image(image, use_container_width=True)
+    st.image(sidebar_image(), use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
     # Centered & styled text
@@ -86,7 +192,6 @@ with st.sidebar:
 # --------------------
 # Title and subtitle
 # --------------------
-st.set_page_config(page_title="Property Pricing Predictor", page_icon="🏡", layout="centered")
 st.title("Belgian Real Estate Price Predictor")
 st.write("Fill in the 14 required fields to get a price prediction of your property.")
 
@@ -111,32 +216,32 @@ st.write(f"### Step {st.session_state.step} of {TOTAL_STEPS}")
 # -----------------------------------------------
 if st.session_state.step == 1:
 
-    st.session_state.type = st.selectbox("Select property type", sorted(["House", "Apartment"]), 
-        index=None,  # forces the user to pick something (no default)
-        placeholder="Choose a property type")
-
-    st.session_state.subtype = st.selectbox("Select property subtype", 
-        sorted(["Apartment", "Residence", "Villa", "Ground floor", "Penthouse", "Duplex", "Mixed building", "Studio", "Chalet", "Bungalow", "Cottage", "Loft", "Triplex", "Mansion", "Masterhouse"]),
-        index = None,
-        placeholder = "Choose a property subtype")
-
-    st.session_state.province = st.selectbox(
-        "Select province",
-        sorted([
-            "Brussels", "Antwerp", "West-Flanders", "East-Flanders", "Flemish-Brabant",
-            "Limburg", "Liège", "Brabant-Wallon", "Hainaut", "Luxembourg", "Namur"
-        ]),
-        index=None,
-        placeholder="Choose a province")
+    with st.form("step_1"):
+        st.session_state.type = st.selectbox("Select property type", sorted(PROPERTY_TYPES), 
+            index=None,  # forces the user to pick something (no default)
+            placeholder="Choose a property type")
+
+        st.session_state.subtype = st.selectbox("Select property subtype", 
+            sorted(PROPERTY_SUBTYPES),
+            index = None,
+            placeholder = "Choose a property subtype")
+
+        st.session_state.province = st.selectbox(
+            "Select province",
+            sorted(PROVINCES),
+            index=None,
+            placeholder="Choose a province")
     
 
-    st.session_state.state_of_building = st.selectbox(
-        "Select state of the building",
-        sorted(["To demolish", "Under construction", "To restore", "To renovate", "To be renovated", "Normal", "Fully renovated", "Excellent", "New"]),
-        index=None,
-        placeholder="Choose the state of the building")
+        st.session_state.state_of_building = st.selectbox(
+            "Select state of the building",
+            sorted(STATE_OF_BUILDING),
+            index=None,
+            placeholder="Choose the state of the building")
     
-    if st.button("Next →"):
+        next_step = st.form_submit_button("Next →")
+
+    if next_step:
         st.session_state.step = 2
         st.rerun()
 
@@ -144,37 +249,42 @@ if st.session_state.step == 1:
 # User input: STEP 2 of 3 — info about the inside of the property
 # ---------------------------------------------------------------
 elif st.session_state.step == 2:
-    st.session_state.living_area = st.number_input('Living area in m²', 
-                            min_value= 18, 
-                            max_value= 2670, 
-                            value= 100)
-    st.session_state.number_of_bedrooms = st.number_input('Number of bedrooms', 
-                            min_value= 1, 
-                            max_value= 50, 
-                            value= 2)
-
-    st.session_state.has_equiped_kitchen = st.radio(
-        "Does the property have an equiped kitchen?",
-        options=["Yes", "No"],
-        index=None  # forces selection
-    )
 
-    st.session_state.is_furnished = st.radio(
-        "Is the property furnished?",
-        options=["Yes", "No"],
-        index=None  
-    )
-
-    st.session_state.has_open_fire = st.radio(
-        "Does the property have an open fireplace?",
-        options=["Yes", "No"],
-        index=None  
-    )
-    col1, col2 = st.columns(2)
-    if col1.button("← Back"):
+    with st.form("step_2"):
+        st.session_state.living_area = st.number_input('Living area in m²', 
+                                min_value= FEATURES_BY_NAME["living_area"].minimum, 
+                                max_value= FEATURES_BY_NAME["living_area"].maximum, 
+                                value= 100)
+        st.session_state.number_of_bedrooms = st.number_input('Number of bedrooms', 
+                                min_value= FEATURES_BY_NAME["number_of_bedrooms"].minimum, 
+                                max_value= FEATURES_BY_NAME["number_of_bedrooms"].maximum, 
+                                value= 2)
+
+        st.session_state.has_equiped_kitchen = st.radio(
+            "Does the property have an equiped kitchen?",
+            options=YES_NO,
+            index=None  # forces selection
+        )
+
+        st.session_state.is_furnished = st.radio(
+            "Is the property furnished?",
+            options=YES_NO,
+            index=None  
+        )
+
+        st.session_state.has_open_fire = st.radio(
+            "Does the property have an open fireplace?",
+            options=YES_NO,
+            index=None  
+        )
+        col1, col2 = st.columns(2)
+        back = col1.form_submit_button("← Back")
+        next_step = col2.form_submit_button("Next →")
+
+    if back:
         st.session_state.step = 1
         st.rerun()
-    if col2.button("Next →"):
+    if next_step:
         st.session_state.step = 3
         st.rerun()
 
@@ -184,94 +294,59 @@ elif st.session_state.step == 2:
 # ------------------------------------------------------------------
 elif st.session_state.step == 3:
 
-    st.session_state.has_terrace = st.radio(
-        "Does the property have a terrace?",
-        options=["Yes", "No"],
-        index=None  
-    )
-
-    st.session_state.terrace_area = st.number_input('Terrace area in m² (Enter zero if there is no terrace) ', 
-                            min_value= 0, 
-                            max_value= 150, 
-                            value= 21)
-    st.session_state.has_garden = st.radio(
-        "Does the property have a garden?",
-        options=["Yes", "No"],
-        index=None  
-    )
-
-    st.session_state.number_facades = st.number_input('Number of facades', 
-                            min_value= 1, 
-                            max_value= 4, 
-                            value=3)
+    with st.form("step_3"):
+        st.session_state.has_terrace = st.radio(
+            "Does the property have a terrace?",
+            options=YES_NO,
+            index=None  
+        )
+
+        st.session_state.terrace_area = st.number_input('Terrace area in m² (Enter zero if there is no terrace) ', 
+                                min_value= FEATURES_BY_NAME["terrace_area"].minimum, 
+                                max_value= FEATURES_BY_NAME["terrace_area"].maximum, 
+                                value= 21)
+        st.session_state.has_garden = st.radio(
+            "Does the property have a garden?",
+            options=YES_NO,
+            index=None  
+        )
+
+        st.session_state.number_facades = st.number_input('Number of facades', 
+                                min_value= FEATURES_BY_NAME["number_facades"].minimum, 
+                                max_value= FEATURES_BY_NAME["number_facades"].maximum, 
+                                value=3)
     
-    st.session_state.has_swimming_pool = st.radio(
-        "Does the property have a swimming pool?",
-        options=["Yes", "No"],
-        index=None  
-    )
+        st.session_state.has_swimming_pool = st.radio(
+            "Does the property have a swimming pool?",
+            options=YES_NO,
+            index=None  
+        )
+
+        # Buttons (back + predict): both submit the step
+        col_back, _ = st.columns([1, 5])
+        with col_back:
+            # Back Button logic (remains left-aligned)
+            back = st.form_submit_button("← Back")
+
+        # --- PREDICT BUTTON IMPLEMENTATION (Centered, Below Back Button) ---
+        st.markdown('<div class="predict-button-container">', unsafe_allow_html=True)
+        predict = st.form_submit_button("💰 Predict Price")
+
+    if back:
+        st.session_state.step = 2
+        st.rerun()
 
-    # --- VALIDATION: ensure all fields are filled in ---
-    all_inputs_valid = (
-        st.session_state.type is not None and
-        st.session_state.subtype is not None and
-        st.session_state.province is not None and
-        st.session_state.state_of_building is not None and
-        st.session_state.living_area is not None and
-        st.session_state.number_of_bedrooms is not None and
-        st.session_state.has_equiped_kitchen is not None and
-        st.session_state.is_furnished is not None and
-        st.session_state.has_open_fire is not None and
-        st.session_state.has_garden is not None and
-        st.session_state.has_terrace is not None and
-        st.session_state.terrace_area is not None and
-        st.session_state.number_facades is not None and
-        st.session_state.has_swimming_pool is not None
-    )
-    # Buttons (back + forward)
-    col_back, _ = st.columns([1, 5])
-
-    with col_back:
-        # Back Button logic (remains left-aligned)
-        if st.button("← Back"):
-            st.session_state.step = 2
-            st.rerun()
-        
-    # Show warning if something is missing
-    if not all_inputs_valid:
-        st.warning("⚠️ Please fill in all fields to get a prediction.")
-        st.stop()
-
-
-    # --- PREDICT BUTTON IMPLEMENTATION (Centered, Below Back Button) ---
-    st.markdown('<div class="predict-button-container">', unsafe_allow_html=True)
-    
-    # The actual Streamlit button that triggers Python logic. 
-    if st.button("💰 Predict Price"):
-        # Convert Yes/No to 1/0
-        garden = 1 if st.session_state.has_garden == "Yes" else 0
-        terrace = 1 if st.session_state.has_terrace == "Yes" else 0
-        equiped_kitchen = 1 if st.session_state.has_equiped_kitchen == "Yes" else 0
-        furnished = 1 if st.session_state.is_furnished == "Yes" else 0
-        open_fire = 1 if st.session_state.has_open_fire == "Yes" else 0
-        swimming_pool = 1 if st.session_state.has_swimming_pool == "Yes" else 0
-
-        # Build dataframe
+    # The submit that triggers the prediction
+    if predict:
+        # --- VALIDATION: ensure all fields are filled in ---
+        if not all(st.session_state.get(f.name) is not None for f in FEATURES):
+            st.warning("⚠️ Please fill in all fields to get a prediction.")
+            st.stop()
+
+        # Build dataframe: model columns of the shared feature spec, Yes/No → 1/0
         input_df = pd.DataFrame([{
-            "type": st.session_state.type,
-            "subtype": st.session_state.subtype,
-            "province": st.session_state.province,
-            "state_of_building": st.session_state.state_of_building,
-            "living_area (m²)": st.session_state.living_area,
-            "number_of_bedrooms": st.session_state.number_of_bedrooms,
-            "number_facades": st.session_state.number_facades,
-            "equiped_kitchen (yes:1, no:0)": equiped_kitchen,
-            "furnished (yes:1, no:0)": furnished,
-            "open_fire (yes:1, no:0)": open_fire,
-            "terrace (yes:1, no:0)": terrace,
-            "terrace_area (m²)": st.session_state.terrace_area,
-            "garden (yes:1, no:0)": garden,
-            "swimming_pool (yes:1, no:0)": swimming_pool
+            f.column: flag_value(st.session_state[f.name]) if f.kind == "flag" else st.session_state[f.name]
+            for f in FEATURES
         }])
 
         # Reorder input_df to match the numeric + categorical column order pipeline expects
@@ -283,11 +358,29 @@ elif st.session_state.step == 3:
         ]
         input_df = input_df[numeric_and_cat_cols]
 
-        # Run model prediction 
-        prediction = model.predict(input_df)[0]
-        # Calculate estimaded 15% range
-        lower = prediction * 0.85
-        upper = prediction * 1.15
+        # Ask the API first (memoized per input set), else run the local model
+        # (with its calibrated interval, when the model has one)
+        payload = {f.name: st.session_state[f.name] for f in FEATURES}
+        result = None
+        if load_client() is not None:
+            try:
+                result = api_prediction(payload)
+            except ApiUnavailable:
+                st.info("The prediction API is unreachable: using the local model.")
+            except ValueError as e:
+                st.error(str(e))
+                st.stop()
+        if result is None:
+            result = local_prediction(input_df)
+
+        prediction, lower, upper, coverage = result
+        if lower is not None:
+            range_title = f"{coverage:.0%} Prediction Interval in Euros (€):"
+        else:
+            # Older models without intervals: fixed 15% range
+            lower = prediction * 0.85
+            upper = prediction * 1.15
+            range_title = "Estimated Price Range in Euros (€):"
 
         # Full width thin grey horizontal line
         st.markdown("<hr style='border: 1px solid grey; margin-top:40px;'>", unsafe_allow_html=True)
@@ -306,7 +399,7 @@ elif st.session_state.step == 3:
         # Price range section
         st.markdown(f"""
             <h4 style='text-align:center; color:#0077cc;'>
-                Estimated Price Range in Euros (€):
+                {range_title}
             </h4>
 
             <p style='text-align:center; font-size:20px; color:#0077cc;'>
@@ -314,6 +407,21 @@ elif st.session_state.step == 3:
             </p>
         """, unsafe_allow_html=True)
 
+        # What-if curves (the API's grid, else the local model's)
+        sweep = whatif_sweep(st.session_state.living_area)
+        curves = None
+        if load_client() is not None:
+            try:
+                curves = api_whatif(payload, sweep)
+            except (ApiUnavailable, ValueError):
+                pass
+        if curves is None:
+            curves = local_whatif(input_df, sweep)
+
+        st.markdown("<h4 style='text-align:center; color:#0077cc;'>What if…</h4>", unsafe_allow_html=True)
+        st.caption("Price by living area, one line per state of the building")
+        st.line_chart(curves, x_label="Living area (m²)", y_label="Price (€)")
+
         # Overview section using an expander
         with st.expander("Show overview of answers"):
             
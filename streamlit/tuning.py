@@ -0,0 +1,257 @@
+# ---------------------------------------------------------
+# CROSS-VALIDATION AND HYPERPARAMETER SEARCH
+# ---------------------------------------------------------
+# k-fold CV of FullXGBPipeline over a parameter grid or a random
+# search. The encoders are fitted once per fold and the encoded
+# float32 fold matrices are cached as .npy files, so every
+# (config, fold) job only memory-maps them and fits XGBoost.
+# Jobs run in a process pool where each process gets
+# `threads_per_job` XGBoost threads and there are at most
+# cores // threads_per_job processes, which keeps every core busy
+# without oversubscribing them.
+#
+# Run from the project root:
+#   python streamlit/tuning.py listings.csv --target price --folds 5 --threads-per-job 4
+#   python streamlit/tuning.py listings.csv --target price --random 40 --export models/xgb_bundle
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import KFold
+
+from utils import FullXGBPipeline, DEFAULT_XGB_PARAMS, regression_metrics
+
+# Grid searched when none is given (the defaults are one of its points)
+DEFAULT_GRID = {
+    "max_depth": [6, 8, 10],
+    "learning_rate": [0.05, 0.1],
+    "colsample_bytree": [0.6, 0.8],
+    "min_child_weight": [1, 5],
+}
+
+# Space sampled by --random: a list is a choice, {"low", "high", "log"} a range
+DEFAULT_SPACE = {
+    "n_estimators": [300, 600, 1000],
+    "learning_rate": {"low": 0.02, "high": 0.2, "log": True},
+    "max_depth": [4, 6, 8, 10, 12],
+    "subsample": {"low": 0.6, "high": 1.0},
+    "colsample_bytree": {"low": 0.4, "high": 1.0},
+    "min_child_weight": [1, 3, 5, 10],
+}
+
+# Metrics where higher is better
+MAXIMIZE = {"R2"}
+
+
+# ----------------------------------------
+# CONFIGS
+# ----------------------------------------
+def grid_configs(grid: dict) -> list:
+    """
+    Every combination of the grid's values.
+    """
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def random_configs(space: dict, n: int, seed: int = 0) -> list:
+    """
+    n configs sampled from the space.
+    """
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(n):
+        config = {}
+        for key, values in space.items():
+            if isinstance(values, dict):
+                low, high = values["low"], values["high"]
+                if values.get("log"):
+                    value = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+                else:
+                    value = float(rng.uniform(low, high))
+                config[key] = int(round(value)) if isinstance(low, int) and isinstance(high, int) else value
+            else:
+                config[key] = values[rng.integers(len(values))]
+                if isinstance(config[key], np.generic):
+                    config[key] = config[key].item()
+        configs.append(config)
+    return configs
+
+
+# ----------------------------------------
+# FOLDS
+# ----------------------------------------
+def data_hash(X: pd.DataFrame, y) -> str:
+    digest = hashlib.sha256(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    digest.update(np.ascontiguousarray(y, dtype=np.float64).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def prepare_folds(X: pd.DataFrame, y, k: int, cache_dir: str, seed: int = 0) -> list:
+    """
+    Encodes every fold with encoders fitted on its training part and
+    writes X_train/y_train/X_val/y_val as .npy files. Folds already
+    cached for the same data, k and seed are reused. Returns the fold
+    folders.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    root = os.path.join(cache_dir, f"{data_hash(X, y)}_k{k}_s{seed}")
+    fold_dirs = [os.path.join(root, f"fold_{i}") for i in range(k)]
+    if all(os.path.exists(os.path.join(d, "meta.json")) for d in fold_dirs):
+        return fold_dirs
+
+    splits = KFold(n_splits=k, shuffle=True, random_state=seed).split(X)
+    for fold_dir, (train_idx, val_idx) in zip(fold_dirs, splits):
+        os.makedirs(fold_dir, exist_ok=True)
+        X_train = X.iloc[train_idx]
+        pipeline = FullXGBPipeline().fit_encoders(X_train)
+        np.save(os.path.join(fold_dir, "X_train.npy"), pipeline.encode(X_train))
+        np.save(os.path.join(fold_dir, "y_train.npy"), y[train_idx])
+        np.save(os.path.join(fold_dir, "X_val.npy"), pipeline.encode(X.iloc[val_idx]))
+        np.save(os.path.join(fold_dir, "y_val.npy"), y[val_idx])
+        # Written last: its presence marks a complete fold
+        with open(os.path.join(fold_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"feature_cols": pipeline.feature_cols,
+                       "n_train": len(train_idx), "n_val": len(val_idx)}, f, ensure_ascii=False)
+    return fold_dirs
+
+
+# ----------------------------------------
+# SEARCH
+# ----------------------------------------
+def _init_worker(threads: int):
+    # Also caps OpenMP users other than XGBoost (n_jobs is set per fit)
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+
+
+def fit_fold(fold_dir: str, params: dict, threads: int, max_bin: int = 256) -> dict:
+    """
+    Fits one config on one cached fold and scores it on the fold's
+    validation part, in price space like FullXGBPipeline.evaluate.
+    """
+    with open(os.path.join(fold_dir, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    X_train = np.load(os.path.join(fold_dir, "X_train.npy"), mmap_mode="r")
+    y_train = np.load(os.path.join(fold_dir, "y_train.npy"), mmap_mode="r")
+    X_val = np.load(os.path.join(fold_dir, "X_val.npy"), mmap_mode="r")
+    y_val = np.load(os.path.join(fold_dir, "y_val.npy"), mmap_mode="r")
+
+    start = time.perf_counter()
+    pipeline = FullXGBPipeline(xgb_params=params)
+    pipeline.feature_cols = meta["feature_cols"]
+    pipeline.fit_encoded(X_train, y_train, n_threads=threads, max_bin=max_bin)
+    seconds = time.perf_counter() - start
+
+    metrics = regression_metrics(y_val, pipeline.predict_encoded(X_val))
+    return {**{k: float(v) for k, v in metrics.items()}, "fit_seconds": seconds}
+
+
+def search(X: pd.DataFrame, y, configs: list, k: int = 5, threads_per_job: int = 1,
+           workers: int = None, cache_dir: str = ".tuning_cache", rank_by: str = "MAE",
+           seed: int = 0, max_bin: int = 256) -> list:
+    """
+    Cross-validates every config and returns one result per config
+    (mean and std of each metric over the folds), best first.
+    """
+    fold_dirs = prepare_folds(X, y, k, cache_dir, seed)
+    workers = workers or max(1, (os.cpu_count() or 1) // threads_per_job)
+    jobs = [(c, f) for c in range(len(configs)) for f in range(len(fold_dirs))]
+
+    scores = [[None] * len(fold_dirs) for _ in configs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(threads_per_job,),
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {pool.submit(fit_fold, fold_dirs[f], {**DEFAULT_XGB_PARAMS, **configs[c]},
+                               threads_per_job, max_bin): (c, f)
+                   for c, f in jobs}
+        for future, (c, f) in futures.items():
+            scores[c][f] = future.result()
+
+    results = []
+    for config, folds in zip(configs, scores):
+        result = {"params": {**DEFAULT_XGB_PARAMS, **config}}
+        for metric in ["MAE", "RMSE", "R2", "fit_seconds"]:
+            values = np.array([fold[metric] for fold in folds])
+            result[metric] = float(values.mean())
+            result[metric + "_std"] = float(values.std())
+        results.append(result)
+
+    sign = -1 if rank_by in MAXIMIZE else 1
+    results.sort(key=lambda r: sign * r[rank_by])
+    for rank, result in enumerate(results, start=1):
+        result["rank"] = rank
+    return results
+
+
+def write_results(results: list, path: str):
+    """
+    Writes the ranked results to <path>.json and a flat <path>.csv.
+    """
+    with open(path + ".json", "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    rows = [{"rank": r["rank"], **r["params"],
+             **{k: v for k, v in r.items() if k not in ("rank", "params")}} for r in results]
+    pd.DataFrame(rows).to_csv(path + ".csv", index=False)
+
+
+def export_best(X: pd.DataFrame, y, params: dict, bundle_dir: str = None,
+                pickle_path: str = None, n_threads: int = None) -> FullXGBPipeline:
+    """
+    Refits the winning config on all the data and writes it as the
+    serving artifact bundle (and/or the pickle the API also loads).
+    """
+    from api.artifacts import save_bundle
+
+    pipeline = FullXGBPipeline(xgb_params=params).fit_hist(X, y, n_threads=n_threads)
+    if bundle_dir:
+        save_bundle(pipeline, bundle_dir)
+    if pickle_path:
+        with open(pickle_path, "wb") as f:
+            pickle.dump(pipeline, f)
+    return pipeline
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter search for FullXGBPipeline")
+    parser.add_argument("data", help="training data (.csv or .parquet) with the model columns")
+    parser.add_argument("--target", default="price")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--grid", type=json.loads, default=None, help="JSON grid (default: DEFAULT_GRID)")
+    parser.add_argument("--random", type=int, default=0, help="sample N configs instead of the grid")
+    parser.add_argument("--space", type=json.loads, default=None, help="JSON space for --random")
+    parser.add_argument("--threads-per-job", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=None, help="default: cores // threads-per-job")
+    parser.add_argument("--rank-by", choices=["MAE", "RMSE", "R2"], default="MAE")
+    parser.add_argument("--max-bin", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache-dir", default=".tuning_cache")
+    parser.add_argument("--out", default="tuning_results", help="writes <out>.json and <out>.csv")
+    parser.add_argument("--export", default=None, help="refit the best config and write this bundle folder")
+    parser.add_argument("--export-pickle", default=None, help="also write the refitted pipeline pickle")
+    args = parser.parse_args()
+
+    data = pd.read_parquet(args.data) if args.data.endswith(".parquet") else pd.read_csv(args.data)
+    y = data.pop(args.target).to_numpy()
+    if args.random:
+        configs = random_configs(args.space or DEFAULT_SPACE, args.random, args.seed)
+    else:
+        configs = grid_configs(args.grid or DEFAULT_GRID)
+
+    start = time.perf_counter()
+    results = search(data, y, configs, args.folds, args.threads_per_job, args.workers,
+                     args.cache_dir, args.rank_by, args.seed, args.max_bin)
+    write_results(results, args.out)
+    print(f"{len(configs)} configs × {args.folds} folds in {time.perf_counter() - start:.1f} s")
+    for r in results[:5]:
+        print(f"#{r['rank']:<3} MAE {r['MAE']:>10.0f} ± {r['MAE_std']:<8.0f} RMSE {r['RMSE']:>10.0f} "
+              f"R2 {r['R2']:.4f}  {r['params']}")
+
+    if args.export or args.export_pickle:
+        export_best(data, y, results[0]["params"], args.export, args.export_pickle)
+        print(f"best config exported to {args.export or args.export_pickle}")
@@ -3,15 +3,50 @@ from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder
 from sklearn.impute import SimpleImputer
-from xgboost import XGBRegressor
+from xgboost import XGBRegressor, DMatrix
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import numpy as np
 import pandas as pd
+import os
+import sys
+
+# The dependency-light encoding code is shared with the API (api/encoding.py)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+from api.encoding import EncodingPlan
+from api.intervals import ConformalIntervals
+from api.features import LABEL_CATEGORIES, STATE_ORDER, category_codes
+
+# XGBoost hyperparameters used when none are given (tuning.py searches them)
+DEFAULT_XGB_PARAMS = {
+    "n_estimators": 600,
+    "learning_rate": 0.05,
+    "max_depth": 8,
+    "subsample": 1.0,
+    "colsample_bytree": 0.6,
+    "min_child_weight": 5,
+}
+
+
+def regression_metrics(y_true, y_pred):
+    return {
+        "MAE": mean_absolute_error(y_true, y_pred),
+        "RMSE": np.sqrt(mean_squared_error(y_true, y_pred)),
+        "R2": r2_score(y_true, y_pred)
+    }
+
 
 class FullXGBPipeline(BaseEstimator, TransformerMixin):
-    def __init__(self, log_target=True, random_state=888):
+    # Pipelines pickled before xgb_params / intervals existed fall back to
+    # the defaults and have no intervals
+    xgb_params = None
+    intervals = None
+
+    def __init__(self, log_target=True, random_state=888, xgb_params=None):
         self.log_target = log_target
         self.random_state = random_state
+        self.xgb_params = xgb_params
         
         # Placeholders for fitted transformers
         self.num_imputer = None
@@ -20,6 +55,9 @@ class FullXGBPipeline(BaseEstimator, TransformerMixin):
         self.model = None
         self.feature_cols = None
 
+    def get_xgb_params(self):
+        return {**DEFAULT_XGB_PARAMS, **(self.xgb_params or {})}
+
     def fit(self, X, y):
         # 1) Handle log transform
         if self.log_target:
@@ -39,18 +77,17 @@ class FullXGBPipeline(BaseEstimator, TransformerMixin):
         X_train['state_of_building'] = X_train['state_of_building'].fillna('unknown')
 
         # 4) Ordinal encode 'state_of_building'
-        state_order = [["unknown","To demolish","Under construction","To restore",
-                        "To renovate","To be renovated","Normal","Fully renovated",
-                        "Excellent","New"]]
+        state_order = [STATE_ORDER]
         self.state_encoder = OrdinalEncoder(categories=state_order)
         X_train['state_of_building_oe'] = self.state_encoder.fit_transform(
             X_train[['state_of_building']]
         ).flatten()
 
-        # 5) Label encode other categorical columns
-        cat_cols = ['type', 'subtype', 'province']
+        # 5) Label encode other categorical columns (codes of the shared
+        # feature spec, then any other value seen in training)
+        cat_cols = list(LABEL_CATEGORIES)
         for col in cat_cols:
-            mapping = {cat: idx for idx, cat in enumerate(X_train[col].astype(str).unique())}
+            mapping = category_codes(col, X_train[col].astype(str).unique())
             X_train[col + '_le'] = X_train[col].astype(str).map(mapping)
             self.label_encoders[col] = mapping
 
@@ -62,18 +99,93 @@ class FullXGBPipeline(BaseEstimator, TransformerMixin):
 
         # 7) Fit XGBoost
         self.model = XGBRegressor(
-            n_estimators=600,
-            learning_rate=0.05,
-            max_depth=8,
-            subsample=1.0,
-            colsample_bytree=0.6,
+            **self.get_xgb_params(),
             random_state=self.random_state,
-            n_jobs=-1,
-            min_child_weight=5
+            n_jobs=-1
         )
         self.model.fit(X_train, y_fit)
+        self._booster = None    # native_booster() extracts the new one
+        return self
+
+    def fit_encoders(self, X):
+        # The encoders of fit, fitted without copying or transforming X
+
+        # 1) Numerical imputer
+        num_cols = X.select_dtypes(include=["int64", "float64"]).columns.tolist()
+        self.num_imputer = SimpleImputer(strategy="mean").fit(X[num_cols])
+
+        # 2) Ordinal encoder for 'state_of_building'
+        state_order = [STATE_ORDER]
+        self.state_encoder = OrdinalEncoder(categories=state_order).fit(
+            pd.DataFrame({"state_of_building": state_order[0]})
+        )
+
+        # 3) Label mappings of the shared feature spec (as in fit)
+        cat_cols = list(LABEL_CATEGORIES)
+        self.label_encoders = {col: category_codes(col, X[col].unique()) for col in cat_cols}
+
+        self.feature_cols = (
+            [c for c in X.columns if c not in ['type','subtype','state_of_building','province']]
+            + ['state_of_building_oe'] + [col + '_le' for col in cat_cols]
+        )
         return self
 
+    def encode(self, X):
+        # Same values as transform, straight into a float32 matrix
+        return EncodingPlan.from_pipeline(self).encode_columns(X)
+
+    def fit_encoded(self, X_enc, y, n_threads=None, max_bin=256, early_stopping_rounds=None,
+                    eval_set=None):
+        # Fits the XGBoost model on an already encoded float32 matrix (the
+        # encoders must be fitted). `hist` builds a QuantileDMatrix from it.
+        # eval_set = (X_val_enc, y_val) is needed for early stopping, and the
+        # trees after the best round are dropped
+        y_fit = np.log1p(y) if self.log_target else y
+        y_fit = np.asarray(y_fit, dtype=np.float32)
+
+        if eval_set is not None:
+            X_val, y_val = eval_set
+            y_val = np.log1p(y_val) if self.log_target else y_val
+            eval_set = [(X_val, np.asarray(y_val, dtype=np.float32))]
+
+        self.model = XGBRegressor(
+            **self.get_xgb_params(),
+            random_state=self.random_state,
+            n_jobs=n_threads or os.cpu_count(),
+            tree_method="hist",
+            max_bin=max_bin,
+            early_stopping_rounds=early_stopping_rounds,
+        )
+        self.model.fit(X_enc, y_fit, eval_set=eval_set, verbose=False)
+
+        # Keep only the trees up to the best round, so every inference
+        # path (wrapper, booster, compiled, bundle) scores the same model
+        booster = self.model.get_booster()
+        if early_stopping_rounds:
+            booster = booster[: self.model.best_iteration + 1]
+        booster.feature_names = self.feature_cols
+        self.model.load_model(bytearray(booster.save_raw("ubj")))
+        self._booster = None
+        return self
+
+    def fit_hist(self, X, y, n_threads=None, max_bin=256, early_stopping_rounds=None,
+                 validation_fraction=0.1):
+        # Same encoders and model as fit, but without copying the frame:
+        # features are encoded straight into float32 and XGBoost trains
+        # with `hist` on a QuantileDMatrix and an explicit thread budget.
+        # With early_stopping_rounds, a random validation_fraction of the
+        # rows is held out and the trees after the best round are dropped.
+        X_enc = self.fit_encoders(X).encode(X)
+        y = np.asarray(y)
+
+        if not early_stopping_rounds:
+            return self.fit_encoded(X_enc, y, n_threads, max_bin)
+
+        rng = np.random.default_rng(self.random_state)
+        is_val = rng.random(len(X_enc)) < validation_fraction
+        return self.fit_encoded(X_enc[~is_val], y[~is_val], n_threads, max_bin,
+                                early_stopping_rounds, eval_set=(X_enc[is_val], y[is_val]))
+
     def transform(self, X):
         X_trans = X.copy()
         # 1) Impute numeric
@@ -104,12 +216,63 @@ class FullXGBPipeline(BaseEstimator, TransformerMixin):
         else:
             return y_pred
 
+    def predict_encoded(self, X_enc):
+        # X_enc is already encoded in feature_cols order (e.g. by the
+        # EncodingPlan in api/encoding.py), so transform is skipped
+        y_pred = self.model.predict(X_enc)
+        if self.log_target:
+            return np.expm1(y_pred)  # inverse log1p
+        else:
+            return y_pred
+
+    def native_booster(self, nthread=None):
+        # Fitted Booster, extracted from the sklearn wrapper once and cached.
+        # nthread caps the threads of one predict call (the model was fitted
+        # with n_jobs=-1, which would otherwise use every core)
+        if getattr(self, "_booster", None) is None:
+            self._booster = self.model.get_booster()
+            self._booster_nthread = None
+        if nthread is not None and nthread != self._booster_nthread:
+            self._booster.set_param({"nthread": nthread})
+            self._booster_nthread = nthread
+        return self._booster
+
+    def predict_booster(self, X_enc, nthread=None):
+        # Same as predict_encoded, but through Booster.inplace_predict on a
+        # contiguous float32 buffer (no DMatrix, no wrapper checks)
+        X_enc = np.ascontiguousarray(X_enc, dtype=np.float32)
+        y_pred = self.native_booster(nthread).inplace_predict(X_enc)
+        if self.log_target:
+            return np.expm1(y_pred)  # inverse log1p
+        else:
+            return y_pred
+
+    def predict_contributions(self, X_enc, approx=False, nthread=None):
+        # Per-feature contributions of an encoded matrix in log-price (margin)
+        # space, from the booster's native pred_contribs: exact TreeSHAP, or
+        # the much faster path attribution with approx=True. The last column
+        # is the bias; every row sums to the margin
+        booster = self.native_booster(nthread)
+        dmatrix = DMatrix(np.asarray(X_enc, dtype=np.float32), feature_names=self.feature_cols)
+        return booster.predict(dmatrix, pred_contribs=True, approx_contribs=approx)
+
+    def calibrate_intervals(self, X_cal, y_cal, coverage=0.8, n_bins=10):
+        # Conformal price intervals (api/intervals.py) from rows the model
+        # was NOT trained on; they are saved with the pickle and the bundle
+        self.intervals = ConformalIntervals.fit(y_cal, self.predict(X_cal), coverage, n_bins)
+        return self
+
+    def predict_interval(self, X):
+        # Point predictions and their (lower, upper) bounds, or None
+        # bounds when the pipeline has no calibrated intervals
+        y_pred = self.predict(X)
+        if self.intervals is None:
+            return y_pred, None, None
+        lower, upper = self.intervals.apply(y_pred)
+        return y_pred, lower, upper
+
     def evaluate(self, X, y_true):
         y_pred = self.predict(X)
-        metrics = {
-            "MAE": mean_absolute_error(y_true, y_pred),
-            "RMSE": np.sqrt(mean_squared_error(y_true, y_pred)),
-            "R2": r2_score(y_true, y_pred)
-        }
+        metrics = regression_metrics(y_true, y_pred)
         return metrics
 
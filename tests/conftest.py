@@ -0,0 +1,147 @@
+# ---------------------------------------------------------
+# SHARED TEST FIXTURES
+# ---------------------------------------------------------
+# A small FullXGBPipeline fitted on synthetic rows of the feature spec,
+# so the tests do not need the trained model of models/. Importing
+# api.predict loads a model: the API tests go through the `api` fixture,
+# which serves a temporary registry of small bundles instead.
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "streamlit"))
+
+from api.features import FEATURES  # noqa: E402
+
+# Model column order of the Streamlit DataFrame and the API (predict.MODEL_ORDER)
+MODEL_ORDER = [
+    'number_of_bedrooms', 'living_area (m²)', 'equiped_kitchen (yes:1, no:0)',
+    'furnished (yes:1, no:0)', 'open_fire (yes:1, no:0)', 'terrace (yes:1, no:0)',
+    'terrace_area (m²)', 'garden (yes:1, no:0)', 'number_facades',
+    'swimming_pool (yes:1, no:0)', 'state_of_building', 'type', 'subtype', 'province'
+]
+
+
+def random_rows(n: int, seed: int = 0) -> list:
+    """
+    n model rows (model column names, 1/0 flags) drawn from the spec.
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for feature in FEATURES:
+        if feature.kind == "category":
+            columns[feature.column] = [feature.choices[i] for i in rng.integers(0, len(feature.choices), n)]
+        elif feature.kind == "flag":
+            columns[feature.column] = rng.integers(0, 2, n).tolist()
+        elif feature.kind == "int":
+            columns[feature.column] = rng.integers(feature.minimum, min(feature.maximum, 8) + 1, n).tolist()
+        else:
+            columns[feature.column] = np.round(rng.uniform(feature.minimum, min(feature.maximum, 400), n), 1).tolist()
+    return [{column: columns[column][i] for column in MODEL_ORDER} for i in range(n)]
+
+
+def frame(rows: list) -> pd.DataFrame:
+    return pd.DataFrame.from_records(rows, columns=MODEL_ORDER)
+
+
+def payload(row: dict) -> dict:
+    """
+    API request body of a model row (API field names, Yes/No flags).
+    """
+    body = {}
+    for feature in FEATURES:
+        value = row[feature.column]
+        body[feature.name] = ("Yes" if value == 1 else "No") if feature.kind == "flag" else value
+    return body
+
+
+def training_data(seed: int = 1, scale: float = 1.0) -> tuple:
+    rows = random_rows(2000, seed=seed)
+    rng = np.random.default_rng(seed)
+    for i in np.flatnonzero(rng.random(len(rows)) < 0.1):
+        rows[i] = dict(rows[i], **{"living_area (m²)": np.nan, "state_of_building": None})
+    X = frame(rows)
+    area = X["living_area (m²)"].fillna(120).to_numpy()
+    y = 2500 * area + 15000 * X["number_of_bedrooms"] + 40000 * X["swimming_pool (yes:1, no:0)"]
+    return X, scale * y * np.exp(rng.normal(0, 0.15, len(X)))
+
+
+@pytest.fixture(scope="session")
+def pipeline():
+    from utils import FullXGBPipeline
+
+    return FullXGBPipeline(xgb_params={"n_estimators": 50, "max_depth": 6}).fit(*training_data())
+
+
+# ----------------------------------------
+# THE API ON A TEMPORARY REGISTRY
+# ----------------------------------------
+ADMIN_TOKEN = "test-token"
+
+
+@pytest.fixture(scope="session")
+def registry_root(pipeline, tmp_path_factory):
+    """
+    v1: the `pipeline` fixture; v2: the same model on prices twice as
+    high; invalid: a model giving negative prices (refused at warm-up).
+    """
+    from utils import FullXGBPipeline
+    from api.artifacts import save_bundle
+    from api.registry import ModelRegistry
+
+    X, y = training_data(seed=3, scale=2.0)
+    models = {
+        "v1": pipeline,
+        "v2": FullXGBPipeline(xgb_params={"n_estimators": 50, "max_depth": 6}).fit(X, y),
+        "invalid": FullXGBPipeline(log_target=False, xgb_params={"n_estimators": 10}).fit(X, -y),
+    }
+    root = tmp_path_factory.mktemp("registry")
+    registry = ModelRegistry(str(root))
+    for name, model in models.items():
+        bundle = tmp_path_factory.mktemp(f"bundle-{name}")
+        save_bundle(model, str(bundle))
+        registry.publish(str(bundle), name)
+    registry.set_current("v1")
+    return root
+
+
+@pytest.fixture(scope="session")
+def api(registry_root):
+    """
+    The api.api module, serving the registry's v1 with the thread
+    executor, without caches, lookup table, comparables or candidate.
+    """
+    for name in ("MODEL_VERSION", "CANDIDATE_MODEL_VERSION", "LOOKUP_TABLE_PATH", "COMPARABLES_INDEX_PATH",
+                 "PREDICTION_CACHE_URL", "MICRO_BATCHING", "MODEL_WATCH_INTERVAL"):
+        os.environ.pop(name, None)
+    os.environ.update(MODEL_REGISTRY_PATH=str(registry_root), ADMIN_TOKEN=ADMIN_TOKEN,
+                      MODEL_EXECUTOR="thread", PREDICTION_CACHE_SIZE="0", EXPLANATION_CACHE_SIZE="0")
+    from api import api
+    return api
+
+
+@pytest.fixture(scope="session")
+def app_client(api):
+    from fastapi.testclient import TestClient
+
+    with TestClient(api.app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def rows():
+    """
+    Rows with every edge case of the encoders: missing numbers (None and
+    NaN), a missing state of the building, unknown and missing labels.
+    """
+    rows = random_rows(300, seed=2)
+    rows[0] = dict(rows[0], **{"living_area (m²)": None})
+    rows[1] = dict(rows[1], **{"terrace_area (m²)": np.nan})
+    rows[2] = dict(rows[2], state_of_building=None)
+    rows[3] = dict(rows[3], province="Atlantis")
+    rows[4] = dict(rows[4], subtype="Castle", type=None)
+    rows[5] = dict(rows[5], **{"living_area (m²)": np.nan, "state_of_building": None, "province": "Paris"})
+    return rows
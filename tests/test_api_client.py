@@ -0,0 +1,158 @@
+# ---------------------------------------------------------
+# STREAMLIT API CLIENT: retries, errors, cooldown and memo
+# ---------------------------------------------------------
+# A local stub server answers with a scripted list of status codes
+# (then 200), and counts the requests it got.
+import json
+import os
+import pickle
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+from api_client import ApiUnavailable, PriceClient
+from conftest import PROJECT_ROOT
+
+PAYLOAD = {"type": "House", "living_area": 120}
+FORM = {
+    "type": "House", "subtype": "Villa", "province": "Namur", "state_of_building": "Normal",
+    "living_area": 150.0, "number_of_bedrooms": 3, "has_equiped_kitchen": "Yes", "is_furnished": "No",
+    "has_open_fire": "No", "has_terrace": "Yes", "terrace_area": 20.0, "has_garden": "Yes",
+    "number_facades": 4, "has_swimming_pool": "No",
+}
+ANSWER = {"predicted_price": 350000.0, "model_version": "v1", "status": "success"}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("content-length", 0)))
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            status = server.script.pop(0) if server.script else 200
+        body = json.dumps(ANSWER if status == 200 else {"detail": f"status {status}"}).encode()
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.script, server.requests, server.lock = [], 0, threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    yield server
+    server.shutdown()
+
+
+def client(url: str, **kwargs) -> PriceClient:
+    return PriceClient(url, backoff=0, **kwargs)
+
+
+@pytest.mark.parametrize("status", [502, 503, 504])
+def test_retries_gateway_errors(stub, status):
+    stub.script = [status, status]
+    assert client(stub.url, retries=2).predict(PAYLOAD) == ANSWER
+    assert stub.requests == 3
+
+
+def test_gives_up_after_the_retries(stub):
+    stub.script = [503, 503, 503]
+    with pytest.raises(ApiUnavailable):
+        client(stub.url, retries=2).predict(PAYLOAD)
+    assert stub.requests == 3
+
+
+def test_invalid_input_raises_value_error(stub):
+    stub.script = [422]
+    price_client = client(stub.url)
+    with pytest.raises(ValueError):
+        price_client.predict(PAYLOAD)
+    assert stub.requests == 1 and price_client.failures == 0     # no cooldown for bad input
+
+
+def test_cooldown_skips_the_api(stub):
+    stub.script = [500]
+    price_client = client(stub.url, cooldown=60)
+    with pytest.raises(ApiUnavailable):
+        price_client.predict(PAYLOAD)
+    with pytest.raises(ApiUnavailable):
+        price_client.predict(dict(PAYLOAD, living_area=80))
+    assert stub.requests == 1
+
+    price_client.down_until = 0.0       # cooldown over
+    assert price_client.predict(PAYLOAD) == ANSWER
+
+
+def test_memo_hits(stub):
+    price_client = client(stub.url)
+    for _ in range(3):
+        assert price_client.predict(PAYLOAD) == ANSWER
+    assert stub.requests == 1 and price_client.memo_hits == 2
+    price_client.predict(dict(PAYLOAD, living_area=80))
+    assert stub.requests == 2
+
+
+def test_memo_entries_expire(stub):
+    price_client = client(stub.url, memo_ttl=0)
+    price_client.predict(PAYLOAD)
+    price_client.predict(PAYLOAD)
+    assert stub.requests == 2 and price_client.memo_hits == 0
+
+
+def test_memo_is_bounded_and_thread_safe(stub):
+    price_client = client(stub.url, memo_size=8)
+    payloads = [dict(PAYLOAD, living_area=area) for area in range(16)]
+
+    def session():
+        for _ in range(20):
+            for payload in payloads:
+                price_client.predict(payload)
+
+    threads = [threading.Thread(target=session) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(price_client.memo) <= 8
+
+
+def test_app_falls_back_to_local_model(stub, pipeline, tmp_path, monkeypatch):
+    # app.py reads ../models/xgb_pipeline.pkl and assets/ relative to its working directory
+    st = pytest.importorskip("streamlit")
+    from streamlit.testing.v1 import AppTest
+
+    (tmp_path / "models").mkdir()
+    (tmp_path / "app").mkdir()
+    (tmp_path / "app" / "assets").symlink_to(os.path.join(PROJECT_ROOT, "streamlit", "assets"))
+    with open(tmp_path / "models" / "xgb_pipeline.pkl", "wb") as file:
+        pickle.dump(pipeline, file)
+    monkeypatch.chdir(tmp_path / "app")
+    monkeypatch.setenv("API_URL", stub.url)
+    monkeypatch.setenv("API_RETRIES", "0")
+    st.cache_resource.clear()
+    stub.script = [503]
+
+    # Fields of steps 1-2 through the session state, step 3 through its widgets
+    at = AppTest.from_file(os.path.join(PROJECT_ROOT, "streamlit", "app.py"), default_timeout=60)
+    at.session_state["step"] = 3
+    for field, value in FORM.items():
+        at.session_state[field] = value
+    at.run()
+    for radio, field in zip(at.radio, ["has_terrace", "has_garden", "has_swimming_pool"]):
+        radio.set_value(FORM[field])
+    for number, field in zip(at.number_input, ["terrace_area", "number_facades"]):
+        number.set_value(FORM[field])
+    next(button for button in at.button if "Predict" in button.label).click().run()
+    assert not at.exception, at.exception
+    assert any("local model" in info.value for info in at.info)
+    assert any("€" in md.value for md in at.markdown)
+    st.cache_resource.clear()
@@ -0,0 +1,72 @@
+# ---------------------------------------------------------
+# PARITY: /predict/batch with an Arrow IPC stream vs. JSON
+# ---------------------------------------------------------
+import json
+import pytest
+
+from conftest import payload, random_rows
+
+pa = pytest.importorskip("pyarrow")
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+
+def batch_columns(n: int) -> dict:
+    # Yes/No string flags, as the Streamlit app and most clients send them
+    rows = [payload(row) for row in random_rows(n, seed=9)]
+    columns = {name: [row[name] for row in rows] for name in rows[0]}
+    columns["province"][3] = "Paris"                 # unknown categories
+    columns["subtype"][4] = "Castle"
+    columns["has_garden"][5] = "Maybe"               # not a Yes/No string
+    columns["has_terrace"][6] = "yes"                # accepted, any case
+    columns["number_of_bedrooms"][7] = 0             # out of range
+    columns["living_area"][8] = -20.0
+    columns["terrace_area"][9] = 1e9
+    columns["living_area"][10] = None                # nulls
+    columns["province"][11] = None
+    columns["has_swimming_pool"][12] = None
+    columns["number_of_bedrooms"][13] = 0            # several errors in one row
+    columns["type"][13] = "Boat"
+    return columns
+
+
+def arrow_body(columns: dict) -> bytes:
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table, max_chunksize=16)     # several record batches
+    return sink.getvalue().to_pybytes()
+
+
+def json_body(columns: dict) -> str:
+    return json.dumps([dict(zip(columns, values)) for values in zip(*columns.values())])
+
+
+def test_json_and_arrow_give_the_same_answers(app_client):
+    columns = batch_columns(60)
+    json_response = app_client.post("/predict/batch", content=json_body(columns),
+                                    headers={"content-type": "application/json"})
+    arrow_response = app_client.post("/predict/batch", content=arrow_body(columns),
+                                     headers={"content-type": ARROW_STREAM})
+    assert json_response.status_code == arrow_response.status_code == 200
+
+    results = json_response.json()["results"]
+    table = pa.ipc.open_stream(arrow_response.content).read_all()
+    assert table.schema.metadata[b"model_version"].decode() == json_response.json()["model_version"]
+    assert table.column("index").to_pylist() == list(range(60))
+
+    prices = table.column("predicted_price").to_pylist()
+    statuses = table.column("status").to_pylist()
+    errors = table.column("errors").to_pylist()
+    invalid = [i for i, result in enumerate(results) if result["status"] == "invalid"]
+    assert invalid == [3, 4, 5, 7, 8, 9, 10, 11, 12, 13]
+
+    for i, result in enumerate(results):
+        assert statuses[i] == result["status"]
+        if result["status"] == "success":
+            assert prices[i] == pytest.approx(result["predicted_price"], rel=1e-6)
+            assert errors[i] is None
+        else:
+            assert prices[i] is None
+            expected = [(e["type"], list(e["loc"]), e["msg"]) for e in result["errors"]]
+            assert [(e["type"], e["loc"], e["msg"]) for e in json.loads(errors[i])] == expected, (i, errors[i])
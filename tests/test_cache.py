@@ -0,0 +1,115 @@
+# ---------------------------------------------------------
+# PREDICTION CACHE: LRU, TTL, model hashes and shared backend
+# ---------------------------------------------------------
+import numpy as np
+import pytest
+
+from api import cache as cache_module
+from api.cache import LocalBackend, PredictionCache
+
+OLD_HASH = "a" * 64
+NEW_HASH = "b" * 64
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+def row(i: int) -> np.ndarray:
+    return np.array([[i, 120.0, 3.0]], dtype=np.float32)
+
+
+def test_evicts_least_recently_used():
+    cache = PredictionCache(maxsize=3)
+    keys = [cache.key(row(i), OLD_HASH) for i in range(4)]
+    for i, key in enumerate(keys[:3]):
+        cache.set(key, float(i))
+    assert cache.get(keys[0]) == 0.0            # keys[1] is now the least recently used
+    cache.set(keys[3], 3.0)
+
+    assert cache.get(keys[1]) is None
+    assert [cache.get(key) for key in (keys[0], keys[2], keys[3])] == [0.0, 2.0, 3.0]
+    assert cache.stats()["size"] == 3
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = PredictionCache(ttl=10)
+    key = cache.key(row(0), OLD_HASH)
+    cache.set(key, 1.0)
+    clock.now += 9.9
+    assert cache.get(key) == 1.0
+    clock.now += 0.2
+    assert cache.get(key) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_retain_keeps_served_models_only():
+    cache = PredictionCache()
+    hashes = [OLD_HASH, NEW_HASH, "c" * 64]
+    for model_hash in hashes:
+        cache.set(cache.key(row(0), model_hash), 1.0)
+    assert cache.stats()["models"] == 3
+
+    cache.retain([NEW_HASH, "c" * 64])
+    assert cache.get(cache.key(row(0), OLD_HASH)) is None
+    assert cache.get(cache.key(row(0), NEW_HASH)) == 1.0
+    assert cache.stats()["models"] == 2
+
+    cache.retain([])
+    assert cache.stats()["size"] == 0
+
+
+def test_hit_and_miss_counters():
+    cache = PredictionCache()
+    key = cache.key(row(0), OLD_HASH)
+    assert cache.get(key) is None
+    cache.set(key, 1.0)
+    cache.get(key)
+    cache.get(key)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+
+def test_shared_backend_fills_the_local_cache(clock):
+    backend = LocalBackend()
+    writer = PredictionCache(ttl=10, backend=backend)
+    reader = PredictionCache(ttl=10, backend=backend)    # another worker
+    key = writer.key(row(0), OLD_HASH)
+    writer.set(key, 1.0)
+
+    assert reader.get(key) == 1.0                        # from the backend
+    backend.data.clear()
+    assert reader.get(key) == 1.0                        # now local
+    assert (reader.hits, reader.misses) == (2, 0)
+    assert reader.stats()["shared_backend"] == "LocalBackend"
+
+    clock.now += 11
+    writer.set(writer.key(row(1), OLD_HASH), 2.0)
+    assert reader.get(writer.key(row(1), OLD_HASH)) == 2.0
+    assert reader.get(key) is None                       # expired in both
+
+
+def test_new_model_hash_never_returns_old_entries():
+    backend = LocalBackend()
+    cache = PredictionCache(backend=backend)
+    for i in range(50):
+        cache.set(cache.key(row(i), OLD_HASH), float(i))
+    # Same hash prefix, another artifact: the keyed digest differs as well
+    other = OLD_HASH[:12] + "f" * 52
+    for i in range(50):
+        assert cache.key(row(i), NEW_HASH) != cache.key(row(i), OLD_HASH)
+        assert cache.get(cache.key(row(i), NEW_HASH)) is None
+        assert cache.get(cache.key(row(i), other)) is None
+    assert cache.hits == 0
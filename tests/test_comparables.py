@@ -0,0 +1,51 @@
+# ---------------------------------------------------------
+# COMPARABLES INDEX vs. a brute-force scan
+# ---------------------------------------------------------
+import numpy as np
+
+from api.comparables import ComparablesIndex, build_index
+from api.encoding import EncodingPlan
+from conftest import frame, payload, random_rows
+
+
+def brute_force(index: ComparablesIndex, listings, row: dict, k: int) -> np.ndarray:
+    # Distances to every listing of the row's partition, nearest first
+    X = index.plan.encode_row(row)[0]
+    encoded = index.plan.encode_columns(listings)
+    same = np.all(encoded[:, index.partition_index] == X[index.partition_index], axis=1)
+    points = (encoded[same][:, index.neighbour_index] - index.center) / index.scale
+    point = (X[index.neighbour_index] - index.center) / index.scale
+    return np.sort(np.sqrt(((points - point) ** 2).sum(axis=1)))[:k]
+
+
+def test_index_matches_brute_force(pipeline, tmp_path):
+    listings = frame(random_rows(3000, seed=7))
+    listings["price"] = np.arange(len(listings), dtype=np.float64)
+    listings["listing_id"] = np.arange(len(listings))
+    build_index(listings, str(tmp_path), EncodingPlan.from_pipeline(pipeline), id_column="listing_id")
+    index = ComparablesIndex.load(str(tmp_path))
+
+    for row in random_rows(100, seed=8):
+        matches = index.query(row, k=10)
+        np.testing.assert_allclose([distance for *_, distance in matches], brute_force(index, listings, row, 10),
+                                   rtol=1e-9, atol=1e-12)
+        for listing, price, listing_id, _ in matches:
+            # A listing is returned with its own price and id
+            assert price == listing_id
+            assert (listing["province"], listing["type"]) == (row["province"], row["type"])
+            assert listing["living_area (m²)"] == listings["living_area (m²)"][listing_id]
+
+
+def test_index_loads_without_memory_map(pipeline, tmp_path):
+    listings = frame(random_rows(500, seed=7))
+    build_index(listings, str(tmp_path), EncodingPlan.from_pipeline(pipeline))
+    row = random_rows(1, seed=8)[0]
+    mapped = ComparablesIndex.load(str(tmp_path)).query(row, k=5)
+    loaded = ComparablesIndex.load(str(tmp_path), mmap=False).query(row, k=5)
+    assert [m[3] for m in mapped] == [m[3] for m in loaded]
+    assert all(price is None and listing_id is None for _, price, listing_id, _ in loaded)
+
+
+def test_endpoint_without_index_answers_503(app_client):
+    response = app_client.post("/comparables", json=payload(random_rows(1)[0]))
+    assert response.status_code == 503
@@ -0,0 +1,39 @@
+# ---------------------------------------------------------
+# PARITY: CompiledEnsemble vs. the XGBoost booster
+# ---------------------------------------------------------
+import numpy as np
+
+from api.compiled_model import CompiledEnsemble
+from api.encoding import EncodingPlan
+from conftest import frame
+
+
+def test_margins_are_bit_identical(pipeline, rows):
+    compiled = CompiledEnsemble.from_pipeline(pipeline)
+    X = EncodingPlan.from_pipeline(pipeline).encode_rows(rows)
+    expected = pipeline.native_booster().inplace_predict(X, predict_type="margin")
+    np.testing.assert_array_equal(compiled.margin(X), expected)
+
+
+def test_missing_values_follow_the_default_branch(pipeline, rows):
+    compiled = CompiledEnsemble.from_pipeline(pipeline)
+    X = EncodingPlan.from_pipeline(pipeline).encode_rows(rows)
+    X[::3, 1] = np.nan
+    X[::5, -1] = np.nan
+    expected = pipeline.native_booster().inplace_predict(X, predict_type="margin")
+    np.testing.assert_array_equal(compiled.margin(X), expected)
+
+
+def test_prices_match_booster_and_pipeline(pipeline, rows):
+    compiled = CompiledEnsemble.from_pipeline(pipeline)
+    X = EncodingPlan.from_pipeline(pipeline).encode_rows(rows)
+    np.testing.assert_array_equal(compiled.predict_encoded(X), pipeline.predict_booster(X))
+    np.testing.assert_array_equal(compiled.predict_encoded(X), pipeline.predict(frame(rows)))
+
+
+def test_saved_arrays_score_the_same(pipeline, rows, tmp_path):
+    compiled = CompiledEnsemble.from_pipeline(pipeline)
+    X = EncodingPlan.from_pipeline(pipeline).encode_rows(rows)
+    compiled.save(str(tmp_path / "compiled.npz"))
+    loaded = CompiledEnsemble.load(str(tmp_path / "compiled.npz"))
+    np.testing.assert_array_equal(loaded.predict_encoded(X), compiled.predict_encoded(X))
@@ -0,0 +1,53 @@
+# ---------------------------------------------------------
+# PARITY: EncodingPlan vs. FullXGBPipeline.transform
+# ---------------------------------------------------------
+import numpy as np
+
+from api.encoding import EncodingPlan
+from conftest import frame
+
+
+def expected_matrix(pipeline, rows):
+    return pipeline.transform(frame(rows)).to_numpy(dtype=np.float32)
+
+
+def test_encode_row_matches_transform(pipeline, rows):
+    plan = EncodingPlan.from_pipeline(pipeline)
+    X = np.vstack([plan.encode_row(row) for row in rows])
+    np.testing.assert_array_equal(X, expected_matrix(pipeline, rows))
+
+
+def test_encode_rows_matches_transform(pipeline, rows):
+    plan = EncodingPlan.from_pipeline(pipeline)
+    np.testing.assert_array_equal(plan.encode_rows(rows), expected_matrix(pipeline, rows))
+
+
+def test_encode_columns_matches_transform(pipeline, rows):
+    plan = EncodingPlan.from_pipeline(pipeline)
+    df = frame(rows)
+    np.testing.assert_array_equal(plan.encode_columns(df), expected_matrix(pipeline, rows))
+    columns = {column: df[column].to_numpy() for column in df.columns}
+    np.testing.assert_array_equal(plan.encode_columns(columns), expected_matrix(pipeline, rows))
+
+
+def test_unknown_and_missing_values(pipeline, rows):
+    plan = EncodingPlan.from_pipeline(pipeline)
+    X = plan.encode_rows(rows)
+    means = dict(zip(pipeline.num_imputer.feature_names_in_, pipeline.num_imputer.statistics_))
+
+    assert X[0, plan.feature_index("living_area (m²)")] == np.float32(means["living_area (m²)"])
+    assert X[2, plan.feature_index("state_of_building")] == 0           # 'unknown'
+    assert X[3, plan.feature_index("province")] == -1
+    assert X[4, plan.feature_index("subtype")] == -1
+    assert X[4, plan.feature_index("type")] == -1
+
+
+def test_plan_round_trips_through_dict(pipeline, rows):
+    plan = EncodingPlan.from_pipeline(pipeline)
+    restored = EncodingPlan.from_dict(plan.to_dict())
+    np.testing.assert_array_equal(restored.encode_rows(rows), plan.encode_rows(rows))
+
+
+def test_predictions_match_pipeline(pipeline, rows):
+    plan = EncodingPlan.from_pipeline(pipeline)
+    np.testing.assert_array_equal(pipeline.predict_encoded(plan.encode_rows(rows)), pipeline.predict(frame(rows)))
@@ -0,0 +1,109 @@
+# ---------------------------------------------------------
+# MODEL HOT-SWAP: admin endpoint, warm-up checks and swaps under load
+# ---------------------------------------------------------
+import threading
+import numpy as np
+import pytest
+
+from api.registry import ModelRegistry, UnloadedVersion, VersionNotLoaded
+from conftest import ADMIN_TOKEN, payload, random_rows
+
+
+def swap(app_client, version: str, token: str = ADMIN_TOKEN):
+    headers = {} if token is None else {"x-admin-token": token}
+    return app_client.post("/admin/model", params={"version": version}, headers=headers)
+
+
+@pytest.fixture
+def v1(api, app_client):
+    # Every test starts and ends on v1
+    assert swap(app_client, "v1").status_code == 200
+    yield
+    assert swap(app_client, "v1").status_code == 200
+
+
+def test_requests_during_swaps_match_their_version(api, app_client, v1):
+    from api import predict
+
+    rows = random_rows(40, seed=5)
+    expected = {name: predict.make_batch_prediction(rows, version=predict.load_model(name)) for name in ("v1", "v2")}
+    assert not np.allclose(expected["v1"], expected["v2"])
+
+    responses, stop = [], threading.Event()
+
+    def session(offset):
+        k = offset
+        while not stop.is_set():
+            response = app_client.post("/predict", json=payload(rows[k % len(rows)]))
+            responses.append((k % len(rows), response.status_code, response.json()))
+            k += 1
+
+    threads = [threading.Thread(target=session, args=(i * 10,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for i in range(6):
+            assert swap(app_client, "v2" if i % 2 == 0 else "v1").json()["status"] == "swapped"
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    assert responses and all(status == 200 for _, status, _ in responses)
+    for k, _, body in responses:
+        assert np.isclose(body["predicted_price"], expected[body["model_version"]][k], rtol=1e-5), body
+    assert {body["model_version"] for _, _, body in responses} == {"v1", "v2"}
+
+
+@pytest.mark.parametrize("token", [None, "", "wrong-token"])
+def test_admin_token_is_required(app_client, v1, token):
+    response = swap(app_client, "v2", token)
+    assert response.status_code == 403
+    assert app_client.get("/model").json()["version"] == "v1"
+
+
+def test_invalid_version_is_refused(app_client, v1):
+    response = swap(app_client, "invalid")
+    assert response.status_code == 500
+    assert "invalid prices" in response.json()["detail"]
+    assert app_client.get("/model").json()["version"] == "v1"
+
+
+def test_unloaded_version_answers_503(api, app_client, v1, monkeypatch):
+    from api import predict
+
+    assert isinstance(predict.loaded_version("gone"), UnloadedVersion)
+    with pytest.raises(VersionNotLoaded):
+        predict.loaded_version("gone").plan
+
+    # A call read before a swap and scored after it
+    monkeypatch.setattr(api, "serving_version", lambda request: UnloadedVersion("gone"))
+    response = app_client.post("/predict", json=payload(random_rows(1)[0]))
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_set_current_is_atomic(registry_root, tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    for name in ("v1", "v2"):
+        registry.publish(str(registry_root / name), name)
+    registry.set_current("v1")
+
+    reads, stop = [], threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            reads.append(registry.current())
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    for i in range(500):
+        registry.set_current("v2" if i % 2 == 0 else "v1")
+    stop.set()
+    thread.join()
+
+    assert set(reads) <= {"v1", "v2"}
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["CURRENT", "v1", "v2"]
+    with pytest.raises(KeyError):
+        registry.set_current("v3")
+    assert registry.current() == "v1"
@@ -0,0 +1,64 @@
+# ---------------------------------------------------------
+# CONFORMAL INTERVALS: coverage, bin merging and edge cases
+# ---------------------------------------------------------
+import numpy as np
+import pytest
+
+from api.intervals import ConformalIntervals
+
+
+def synthetic_prices(n: int, seed: int) -> tuple:
+    # Heteroscedastic: the log-space noise grows with the predicted price
+    rng = np.random.default_rng(seed)
+    y_pred = np.exp(rng.uniform(np.log(80_000), np.log(2_000_000), n))
+    sigma = 0.05 + 0.1 * (np.log(y_pred) - np.log(80_000)) / np.log(25)
+    return y_pred * np.exp(rng.normal(0, sigma)), y_pred
+
+
+@pytest.mark.parametrize("coverage", [0.8, 0.9])
+def test_coverage_on_held_out_rows(coverage):
+    intervals = ConformalIntervals.fit(*synthetic_prices(5000, seed=1), coverage=coverage)
+    y_true, y_pred = synthetic_prices(50_000, seed=2)
+    lower, upper = intervals.apply(y_pred)
+
+    assert np.mean((lower <= y_true) & (y_true <= upper)) == pytest.approx(coverage, abs=0.02)
+    # Narrower where the noise is smaller
+    width = (upper - lower) / y_pred
+    assert width[y_pred < 200_000].mean() < width[y_pred > 1_000_000].mean()
+
+
+def test_interval_matches_apply_and_round_trips():
+    intervals = ConformalIntervals.fit(*synthetic_prices(3000, seed=1))
+    restored = ConformalIntervals.from_dict(intervals.to_dict())
+    y_pred = synthetic_prices(200, seed=3)[1]
+    lower, upper = restored.apply(y_pred)
+    for p, lo, hi in zip(y_pred, lower, upper):
+        assert intervals.interval(p) == pytest.approx((lo, hi), rel=1e-12)
+        assert lo <= p <= hi
+
+
+def test_merge_small_bins_with_ties():
+    # Three tied prediction values: the middle bin is too small
+    log_pred = np.repeat([1.0, 2.0, 3.0], [500, 30, 300])
+    edges = ConformalIntervals._merge_small_bins([1.5, 2.5], log_pred, 100)
+    counts = np.bincount(np.searchsorted(edges, log_pred, side="right"))
+    assert len(edges) == 1 and counts.min() >= 100
+    assert edges == [1.5]       # merged into its smaller neighbour (300 rows)
+
+    # Bins that can never reach the minimum collapse into one
+    assert ConformalIntervals._merge_small_bins([1.5, 2.5], log_pred, 10_000) == []
+
+
+def test_tied_predictions_give_one_bin():
+    y_true = np.linspace(90_000, 110_000, 500)
+    intervals = ConformalIntervals.fit(y_true, np.full(500, 100_000.0), n_bins=10, min_bin_size=50)
+    assert intervals.edges == []
+    lower, upper = intervals.interval(100_000.0)
+    assert lower < 100_000.0 < upper
+
+
+def test_empty_calibration_set():
+    with pytest.raises(ValueError):
+        ConformalIntervals.fit([], [])
+    with pytest.raises(ValueError):
+        ConformalIntervals.fit([1.0], [1.0], coverage=1.0)
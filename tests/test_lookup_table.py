@@ -0,0 +1,91 @@
+# ---------------------------------------------------------
+# LOOKUP TABLE on a tiny lattice vs. the model
+# ---------------------------------------------------------
+import json
+import numpy as np
+import pytest
+
+from api.encoding import EncodingPlan
+from api.lookup_table import (META_FILE, TABLE_FILE, LookupTable, encode_cells, grid_axes,
+                              measure_error)
+
+LATTICE = [[40, 100, 200], [2, 3], [0, 30]]
+
+
+@pytest.fixture(scope="module")
+def table(pipeline, tmp_path_factory):
+    """
+    A table over the first two values of every grid axis, scored like
+    `materialize` does (in one process) and saved with its measured error.
+    """
+    plan = EncodingPlan.from_pipeline(pipeline)
+    axes = [(col, list(values[:2])) for col, values in grid_axes(plan)]
+    n_cells = int(np.prod([len(values) for _, values in axes]))
+    X = encode_cells(plan, axes, LATTICE, np.arange(n_cells))
+    values = pipeline.predict_encoded(X).astype(np.float32).reshape((n_cells,) + tuple(map(len, LATTICE)))
+
+    meta = {"model_hash": "test", "axes": [[col, values] for col, values in axes], "lattice": LATTICE,
+            "n_cells": n_cells}
+    meta["error"] = measure_error(LookupTable(values, meta), plan, pipeline.predict_encoded, n_samples=500)
+    path = tmp_path_factory.mktemp("price_table")
+    np.save(path / TABLE_FILE, values)
+    with open(path / META_FILE, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return path
+
+
+def grid_rows(table: LookupTable, n: int, seed: int) -> list:
+    rng = np.random.default_rng(seed)
+    return [{col: values[rng.integers(len(values))] for col, values in table.axes} for _ in range(n)]
+
+
+def model_price(pipeline, row: dict) -> float:
+    return float(pipeline.predict_encoded(EncodingPlan.from_pipeline(pipeline).encode_row(row))[0])
+
+
+def test_exact_at_lattice_points(pipeline, table):
+    lookup = LookupTable.load(str(table))
+    for row in grid_rows(lookup, 50, seed=1):
+        for area in LATTICE[0]:
+            for bedrooms in LATTICE[1]:
+                for terrace in LATTICE[2]:
+                    row = dict(row, **{"living_area (m²)": area, "number_of_bedrooms": bedrooms,
+                                       "terrace_area (m²)": terrace})
+                    assert lookup.lookup(row) == np.float32(model_price(pipeline, row))
+
+
+def test_interpolates_between_lattice_points(table):
+    lookup = LookupTable.load(str(table))
+    row = dict(grid_rows(lookup, 1, seed=2)[0], number_of_bedrooms=3)
+    corners = {(a, t): lookup.lookup(dict(row, **{"living_area (m²)": a, "terrace_area (m²)": t}))
+               for a in (40, 100) for t in (0, 30)}
+    middle = lookup.lookup(dict(row, **{"living_area (m²)": 70, "terrace_area (m²)": 15}))
+    assert middle == pytest.approx(sum(corners.values()) / 4, rel=1e-6)
+    edge = lookup.lookup(dict(row, **{"living_area (m²)": 55, "terrace_area (m²)": 0}))
+    assert edge == pytest.approx(0.75 * corners[40, 0] + 0.25 * corners[100, 0], rel=1e-6)
+
+
+def test_off_grid_rows_are_not_answered(table):
+    lookup = LookupTable.load(str(table))
+    row = dict(grid_rows(lookup, 1, seed=3)[0], **{"living_area (m²)": 100, "number_of_bedrooms": 2,
+                                                   "terrace_area (m²)": 0})
+    assert lookup.lookup(row) is not None
+    assert lookup.lookup(dict(row, province="Atlantis")) is None
+    assert lookup.lookup(dict(row, number_of_bedrooms=4)) is None        # not on the lattice
+    assert lookup.lookup(dict(row, **{"living_area (m²)": 250})) is None  # beyond the lattice
+    assert lookup.lookup(dict(row, **{"living_area (m²)": None})) is None
+
+
+def test_interpolation_follows_the_measured_error(table):
+    with open(table / META_FILE, encoding="utf-8") as f:
+        p99 = json.load(f)["error"]["p99_rel_error"]
+    on_lattice = {"living_area (m²)": 100, "number_of_bedrooms": 2, "terrace_area (m²)": 30}
+    between = {"living_area (m²)": 70, "number_of_bedrooms": 2, "terrace_area (m²)": 30}
+
+    allowed = LookupTable.load(str(table), max_error=p99)
+    refused = LookupTable.load(str(table), max_error=p99 / 2)
+    row = grid_rows(allowed, 1, seed=4)[0]
+    assert allowed.interpolate and not refused.interpolate
+    assert allowed.lookup(dict(row, **between)) is not None
+    assert refused.lookup(dict(row, **between)) is None
+    assert refused.lookup(dict(row, **on_lattice)) == allowed.lookup(dict(row, **on_lattice))
@@ -0,0 +1,71 @@
+# ---------------------------------------------------------
+# PARITY: /whatif sweeps vs. one /predict per grid point
+# ---------------------------------------------------------
+import pytest
+
+from api.features import FEATURES_BY_NAME
+from conftest import payload, random_rows
+
+STATES = list(FEATURES_BY_NAME["state_of_building"].choices)
+
+
+@pytest.fixture
+def base():
+    return payload(random_rows(1, seed=11)[0])
+
+
+def whatif(app_client, base: dict, *sweep):
+    return app_client.post("/whatif", json={"base": base, "sweep": list(sweep)})
+
+
+def predicted(app_client, body: dict) -> float:
+    response = app_client.post("/predict", json=body)
+    assert response.status_code == 200, response.text
+    return response.json()["predicted_price"]
+
+
+def test_one_field_sweep_matches_predict(app_client, base):
+    response = whatif(app_client, base, {"field": "living_area", "start": 50, "stop": 300, "points": 11})
+    assert response.status_code == 200, response.text
+    body = response.json()
+
+    areas = body["values"]["living_area"]
+    assert len(areas) == body["n_points"] == 11 and areas[0] == 50 and areas[-1] == 300
+    for area, price in zip(areas, body["predicted_price"]):
+        assert price == pytest.approx(predicted(app_client, dict(base, living_area=area)), rel=1e-6)
+    assert body["base_price"] == pytest.approx(predicted(app_client, base), rel=1e-6)
+
+
+def test_two_field_sweep_matches_predict(app_client, base):
+    response = whatif(app_client, base, {"field": "living_area", "start": 60, "stop": 180, "points": 4},
+                      {"field": "state_of_building"})
+    assert response.status_code == 200, response.text
+    body = response.json()
+
+    assert body["fields"] == ["living_area", "state_of_building"]
+    assert body["values"]["state_of_building"] == STATES
+    assert body["n_points"] == 4 * len(STATES)
+    # Nested per value of the second field, the first field varying slowest
+    for area, prices in zip(body["values"]["living_area"], body["predicted_price"]):
+        assert len(prices) == len(STATES)
+        for state, price in zip(STATES, prices):
+            expected = predicted(app_client, dict(base, living_area=area, state_of_building=state))
+            assert price == pytest.approx(expected, rel=1e-6)
+
+
+def test_grid_size_is_limited(api, app_client, base, monkeypatch):
+    monkeypatch.setattr(api, "WHATIF_MAX_POINTS", 3 * len(STATES))
+    area = {"field": "living_area", "start": 60, "stop": 180}
+    state = {"field": "state_of_building"}
+    assert whatif(app_client, base, dict(area, points=3), state).status_code == 200
+    assert whatif(app_client, base, dict(area, points=4), state).status_code == 422
+    assert whatif(app_client, base, dict(area, points=3 * len(STATES))).status_code == 200
+    assert whatif(app_client, base, dict(area, points=3 * len(STATES) + 1)).status_code == 422
+
+
+def test_invalid_sweeps_are_refused(app_client, base):
+    area = {"field": "living_area", "start": 60, "stop": 180}
+    assert whatif(app_client, base, area, area).status_code == 422                          # swept twice
+    assert whatif(app_client, base, dict(area, start=180, stop=60)).status_code == 422       # start ≥ stop
+    assert whatif(app_client, base, dict(area, stop=1e9)).status_code == 422                 # out of bounds
+    assert whatif(app_client, base, {"field": "province"}).status_code == 422                # not sweepable